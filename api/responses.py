@@ -51,6 +51,13 @@ def created_response(created_obj_id):
     return Response(created_dict, status=created_status)
 
 
+# 202
+def accepted_response(job_id):
+    accepted_dict = {RESPONSE_KEY: job_id}
+    accepted_status = status.HTTP_202_ACCEPTED
+    return Response(accepted_dict, status=accepted_status)
+
+
 # 204
 def no_content_response(delete_id):
     deleted_dict = {RESPONSE_KEY: delete_id}
@@ -2,7 +2,15 @@ import logging
 import json
 import os
 import datetime
+import queue
+import shutil
+import threading
 
+import numpy as np
+
+from api.utils.result_store import STATS_FOLDER_NAME, PROCESS_KEY_PREFIX, PROCESS_RECORDS_SUFFIX, StatsStore, \
+    get_process_keys, get_process_records_path, get_stats_meta_path, read_process_records, records_to_columns, \
+    entries_to_columns, columns_to_entries, slice_generations, pack_records, write_stats_store, set_result_process
 from modeling_system_backend import settings
 
 RESULT_ROOT = settings.RESULT_ROOT
@@ -22,6 +30,22 @@ PDF_RESULTS_FILE_NAME = "export_file.pdf"
 
 RESULT_KEY = "results"
 
+# Через сколько записей буфер журнала процесса сбрасывается на диск
+LOG_FLUSH_INTERVAL = 100
+
+# Режимы записи журнала: в потоке ГА или в фоновом потоке
+SYNC_LOG_WRITER = "sync"
+BACKGROUND_LOG_WRITER = "background"
+
+# Поведение при заполнении очереди фонового потока
+BACKPRESSURE_BLOCK = "block"
+BACKPRESSURE_DROP_DETAIL = "drop_detail"
+
+LOG_QUEUE_SIZE = 1000
+LOG_WRITE_BATCH_SIZE = 256
+# Как часто (в секундах) поток ГА, ожидающий места в очереди, проверяет, что поток записи жив
+LOG_PUT_TIMEOUT = 1
+
 def get_user_folder_name(user_id) -> str:
     return f"user_id-{user_id}"
 
@@ -30,6 +54,88 @@ def get_task_folder_name(task_id) -> str:
     return f"task_id-{task_id}"
 
 
+def get_process_records_paths(results_folder) -> dict:
+    return {process_key: get_process_records_path(results_folder, process_key)
+            for process_key in get_process_keys(results_folder)}
+
+
+def get_results_source_paths(results_folder) -> list:
+    """Файлы, из которых строятся результаты задачи: журналы записей процессов и meta.json хранилища."""
+    source_paths = [*get_process_records_paths(results_folder).values(), get_stats_meta_path(results_folder)]
+    return [path for path in source_paths if os.path.exists(path)]
+
+
+def load_results(results_folder, process_keys=None, start_generation=None, stop_generation=None, stride=None) -> dict:
+    """Возвращает статистику задачи в виде столбцов {process_key: {column: array}}.
+
+    Источник выбирается по готовности: сводное хранилище, журналы записей процессов
+    (задача выполняется или прервана), json_log.json старого формата.
+    Если задан итоговый процесс, его статистика дублируется под ключом RESULT_KEY.
+    stride оставляет каждое stride-е поколение выбранного диапазона.
+    """
+    results = {}
+    result_process = None
+
+    store = StatsStore.open(results_folder)
+    if store is not None:
+        result_process = store.result_process
+        for process_key in store.get_process_keys():
+            results[process_key] = store.get_process_stats(process_key, start_generation, stop_generation)
+    elif get_process_keys(results_folder):
+        for process_key, records_path in get_process_records_paths(results_folder).items():
+            columns = records_to_columns(read_process_records(records_path))
+            results[process_key] = slice_generations(columns, start_generation, stop_generation)
+    else:
+        json_path = os.path.join(results_folder, ALL_JSON_RESULTS_FILE_NAME)
+        if not os.path.exists(json_path):
+            return {}
+        with open(json_path, "r") as json_file:
+            json_log = json.load(json_file)
+        for process_key, entries in json_log.items():
+            columns = entries_to_columns(entries)
+            results[process_key] = slice_generations(columns, start_generation, stop_generation)
+
+    if result_process in results:
+        results[RESULT_KEY] = results[result_process]
+    if process_keys is not None:
+        results = {process_key: columns for process_key, columns in results.items() if process_key in process_keys}
+    if stride and stride > 1:
+        results = {process_key: {column: values[::stride] for column, values in columns.items()}
+                   for process_key, columns in results.items()}
+    return results
+
+
+def load_json_log(results_folder) -> dict:
+    """Возвращает сводный журнал задачи в формате json_log.json, собирая файл по запросу.
+
+    Готовый json_log.json используется, если он не старше хранилища статистики и журналов процессов.
+    """
+    json_path = materialize_json_log(results_folder)
+    if json_path is None:
+        return {}
+    with open(json_path, "r") as json_file:
+        return json.load(json_file)
+
+
+def materialize_json_log(results_folder):
+    """Пересобирает json_log.json, если он старше источников. Возвращает путь к файлу или None, если данных нет."""
+    json_path = os.path.join(results_folder, ALL_JSON_RESULTS_FILE_NAME)
+    source_paths = get_results_source_paths(results_folder)
+
+    if os.path.exists(json_path):
+        json_mtime = os.path.getmtime(json_path)
+        if all(os.path.getmtime(path) < json_mtime for path in source_paths):
+            return json_path
+    if not source_paths:
+        return None
+
+    full_log = {process_key: columns_to_entries(columns)
+                for process_key, columns in load_results(results_folder).items()}
+    with open(json_path, "w") as json_file:
+        json.dump(full_log, json_file, indent=4)
+    return json_path
+
+
 def get_logger(experiment_name: str, user_id, task_id):
     """Создаёт и возвращает логгер с динамическим именем файла"""
 
@@ -55,10 +161,85 @@ def get_logger(experiment_name: str, user_id, task_id):
     return logger
 
 
+class BackgroundLogWriter:
+    """Фоновый поток, который форматирует и записывает записи журнала пачками.
+
+    Поток ГА только кладет компактные записи в ограниченную очередь.
+    При backpressure="block" поток ГА ждет места в очереди. При "drop_detail" после заполнения
+    очереди наполовину особи в записи не передаются, статистика поколений при этом не теряется.
+    Ошибка записи сохраняется и поднимается в потоке ГА при следующем submit или в close.
+    """
+
+    _stop = object()
+
+    def __init__(self, write_records, queue_size=LOG_QUEUE_SIZE, backpressure=BACKPRESSURE_BLOCK):
+        self.write_records = write_records
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.backpressure = backpressure
+        self.dropped_details = 0
+        self.error = None
+        self.error_raised = False
+
+        self.thread = threading.Thread(target=self.run, name="experiment-log-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, record):
+        if self.backpressure == BACKPRESSURE_DROP_DETAIL and self.queue.qsize() * 2 >= self.queue.maxsize:
+            record["min_fitness_individual"] = None
+            record["max_fitness_individual"] = None
+            self.dropped_details += 1
+        self.put(record)
+
+    def put(self, item):
+        """Кладет элемент в очередь, не зависая, если поток записи упал или остановился."""
+        while True:
+            self.raise_error()
+            try:
+                self.queue.put(item, timeout=LOG_PUT_TIMEOUT)
+                return
+            except queue.Full:
+                if not self.thread.is_alive():
+                    self.raise_error()
+                    raise RuntimeError("Background log writer stopped")
+
+    def raise_error(self):
+        if self.error is not None and not self.error_raised:
+            self.error_raised = True
+            raise self.error
+
+    def run(self):
+        stopped = False
+        while not stopped:
+            batch = [self.queue.get()]
+            while len(batch) < LOG_WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if batch[-1] is self._stop:
+                batch.pop()
+                stopped = True
+            # После ошибки очередь продолжает разбираться, чтобы поток ГА не ждал места в ней
+            if batch and self.error is None:
+                try:
+                    self.write_records(batch)
+                except Exception as error:
+                    self.error = error
+
+    def close(self):
+        """Дожидается записи всех поставленных в очередь записей и останавливает поток."""
+        if self.thread.is_alive():
+            self.put(self._stop)
+            self.thread.join()
+        self.raise_error()
+
+
 class ExperimentLogger:
     """Логирование работы ГА"""
 
-    def __init__(self, experiment_name, user_id, task_id):
+    def __init__(self, experiment_name, user_id, task_id, reset_results=True):
+        """reset_results=False подключается к уже идущему запуску, не удаляя журналы других процессов."""
         self.experiment_name = experiment_name
         self.user_id = user_id
         self.task_id = task_id
@@ -66,100 +247,171 @@ class ExperimentLogger:
         logger = get_logger(experiment_name, user_id, task_id)
 
         self.logger_log = logger
-        self.log_file_json = self.get_json_log_path(logger)
+        self.log_file_json = self.get_json_log_path(logger, reset_results)
 
         self.logs = {}
 
         self._process_id = None
+        self._process_log = None
+        self._unflushed_entries = 0
+
+        self._writer = None
+        self.configure_writer()
 
     @staticmethod
-    def get_json_log_path(logger):
+    def get_json_log_path(logger, reset_results=True):
         logger_filepath = logger.handlers[0].baseFilename
         results_folder, _ = os.path.split(logger_filepath)
 
         json_logger = os.path.join(results_folder, ALL_JSON_RESULTS_FILE_NAME)
+        if not reset_results:
+            return json_logger
         if os.path.exists(json_logger):
             os.remove(json_logger)
         files_in_folder = os.listdir(results_folder)
         for file in files_in_folder:
-            if file.endswith(".tmp"):
+            if file.endswith(".tmp") or file.endswith(PROCESS_RECORDS_SUFFIX):
                 os.remove(os.path.join(results_folder, file))
+        shutil.rmtree(os.path.join(results_folder, STATS_FOLDER_NAME), ignore_errors=True)
         return json_logger
 
+    def configure_writer(self, log_writer=None, backpressure=None, queue_size=LOG_QUEUE_SIZE):
+        """Выбор режима записи журнала поколений: sync (по умолчанию) или background."""
+        if log_writer not in (None, SYNC_LOG_WRITER, BACKGROUND_LOG_WRITER):
+            raise ValueError(f"Unsupported log writer: {log_writer}")
+        if backpressure not in (None, BACKPRESSURE_BLOCK, BACKPRESSURE_DROP_DETAIL):
+            raise ValueError(f"Unsupported log backpressure: {backpressure}")
+
+        self.log_writer = log_writer or SYNC_LOG_WRITER
+        self.log_backpressure = backpressure or BACKPRESSURE_BLOCK
+        self.log_queue_size = queue_size
+
     def log(self, task_id, generation, min_fitness, min_fitness_individual,
             max_fitness, max_fitness_individual,
             avg_fitness):
         """Логирование данных о поколении"""
 
-        self.logger_log.info(f"[{task_id}/{self._process_id}] || Generation {generation}:")
-        self.logger_log.info(
-            f"[{task_id}/{self._process_id}] || Min fitness = {min_fitness}, Individual = {min_fitness_individual}")
-        self.logger_log.info(
-            f"[{task_id}/{self._process_id}] || Max fitness = {max_fitness}, Individual = {max_fitness_individual}")
-        self.logger_log.info(f"[{task_id}/{self._process_id}] || Average fitness = {avg_fitness}")
-        self.logger_log.debug("")
-
-        entry = {
+        record = {
+            "task_id": task_id,
             "generation": generation,
             "min_fitness": min_fitness,
+            "min_fitness_individual": min_fitness_individual,
             "max_fitness": max_fitness,
+            "max_fitness_individual": max_fitness_individual,
             "avg_fitness": avg_fitness,
-            "timestamp": datetime.datetime.now().isoformat()
+            "timestamp": datetime.datetime.now().timestamp()
         }
 
-        process_key = f"process_{self._process_id}"
-
-        temp_path_file = f"{self.log_file_json}_{process_key}.tmp"
-        if os.path.exists(temp_path_file) and os.path.getsize(temp_path_file) > 0:
-            with open(temp_path_file, "r") as json_file:
-                self.logs = json.load(json_file)
-        else:
-            self.logs = {}
-
-        if process_key not in self.logs:
-            self.logs[process_key] = []
-        self.logs[process_key].append(entry)
-
-        with open(temp_path_file, "w") as json_file:
-            json.dump(self.logs, json_file, indent=4)
-
-    def merge_logs(self, process_count):
-        full_log = {}
-
-        for process_key in range(process_count):
-            process_key_name = f"process_{process_key}"
-            temp_path_file = f"{self.log_file_json}_{process_key_name}.tmp"
-            if os.path.exists(temp_path_file) and os.path.getsize(temp_path_file) > 0:
-                with open(temp_path_file, "r") as json_file:
-                    process_log = json.load(json_file)
+        if self.log_writer != BACKGROUND_LOG_WRITER:
+            self.write_records([record])
+            if self._unflushed_entries >= LOG_FLUSH_INTERVAL:
+                self.flush()
+            return
+
+        # Особи копируются: популяция может измениться раньше, чем фоновый поток дойдет до записи
+        record["min_fitness_individual"] = np.array(min_fitness_individual, copy=True)
+        record["max_fitness_individual"] = np.array(max_fitness_individual, copy=True)
+        if self._writer is None:
+            self._writer = BackgroundLogWriter(self.write_records_batch, self.log_queue_size,
+                                               self.log_backpressure)
+        self._writer.submit(record)
+
+    def write_records(self, records):
+        """Пишет записи в текстовый журнал и журнал записей поколений процесса."""
+        process_log = self.get_process_log()
+        for record in records:
+            task_id = record["task_id"]
+            generation = record["generation"]
+            min_fitness_individual = record["min_fitness_individual"]
+            max_fitness_individual = record["max_fitness_individual"]
+
+            self.logger_log.info(f"[{task_id}/{self._process_id}] || Generation {generation}:")
+            if min_fitness_individual is None:
+                self.logger_log.info(f"[{task_id}/{self._process_id}] || Min fitness = {record['min_fitness']}")
+                self.logger_log.info(f"[{task_id}/{self._process_id}] || Max fitness = {record['max_fitness']}")
             else:
-                process_log = {}
-
-            process_log_data = process_log.get(process_key_name, [])
-            full_log[process_key_name] = process_log_data
+                self.logger_log.info(f"[{task_id}/{self._process_id}] || Min fitness = {record['min_fitness']}, "
+                                     f"Individual = {min_fitness_individual}")
+                self.logger_log.info(f"[{task_id}/{self._process_id}] || Max fitness = {record['max_fitness']}, "
+                                     f"Individual = {max_fitness_individual}")
+            self.logger_log.info(f"[{task_id}/{self._process_id}] || Average fitness = {record['avg_fitness']}")
+            self.logger_log.debug("")
+
+        process_log.write(pack_records(records))
+        self._unflushed_entries += len(records)
+
+    def write_records_batch(self, records):
+        """Запись пачки в фоновом потоке: буфер сбрасывается один раз на пачку."""
+        self.write_records(records)
+        self.flush()
+
+    def drain(self):
+        """Останавливает фоновый поток, дождавшись записи очереди, и сбрасывает буфер на диск."""
+        if self._writer is not None:
+            writer, self._writer = self._writer, None
+            writer.close()
+            if writer.dropped_details:
+                self.logger_log.info(f"[{self.task_id}/{self._process_id}] || "
+                                     f"Log writer dropped individuals in {writer.dropped_details} records")
+        self.flush()
+
+    def get_results_folder(self):
+        return os.path.dirname(self.log_file_json)
+
+    def get_process_log(self):
+        """Открывает журнал записей текущего процесса на дозапись."""
+        if self._process_log is None:
+            process_key = f"{PROCESS_KEY_PREFIX}{self._process_id}"
+            records_path = get_process_records_path(self.get_results_folder(), process_key)
+            self._process_log = open(records_path, "ab")
+        return self._process_log
+
+    def flush(self):
+        if self._process_log is not None:
+            self._process_log.flush()
+        self._unflushed_entries = 0
+
+    def close(self):
+        try:
+            self.drain()
+        finally:
+            if self._process_log is not None:
+                self._process_log.close()
+                self._process_log = None
+            self._unflushed_entries = 0
 
-        with open(self.log_file_json, "w") as json_file:
-            json.dump(full_log, json_file, indent=4)
+    def merge_logs(self, process_count):
+        """Сводит журналы процессов в хранилище статистики. Вызывается один раз по завершении расчета.
 
-    def create_result_log(self):
-        process_key_name = f"process_{self._process_id}"
+        json_log.json при этом не пишется: он собирается по запросу функцией load_json_log.
+        """
+        self.drain()
 
-        with open(self.log_file_json, "r") as json_file:
-            process_log = json.load(json_file)
+        results_folder = self.get_results_folder()
+        process_records = {}
+        for process_key in range(process_count):
+            process_key_name = f"{PROCESS_KEY_PREFIX}{process_key}"
+            records_path = get_process_records_path(results_folder, process_key_name)
+            process_records[process_key_name] = read_process_records(records_path)
 
-        process_data = process_log.get(process_key_name)
-        process_log[RESULT_KEY] = process_data
+        write_stats_store(results_folder, process_records)
 
-        with open(self.log_file_json, "w") as json_file:
-            json.dump(process_log, json_file, indent=4)
+    def create_result_log(self, process_id=None):
+        """Отмечает итоговым журнал процесса process_id (по умолчанию текущего)."""
+        process_id = self._process_id if process_id is None else process_id
+        set_result_process(self.get_results_folder(), f"{PROCESS_KEY_PREFIX}{process_id}")
 
     def get_logs(self):
         """Получение всех логов"""
-        if os.path.exists(self.log_file_json):
-            with open(self.log_file_json, "r") as f:
-                self.logs = json.load(f)
-        else:
-            self.logs = {}
+        self.logs = load_json_log(self.get_results_folder())
+
+    def __getstate__(self):
+        """Файл журнала не передается между процессами: буфер сбрасывается, на новом месте файл открывается заново."""
+        self.close()
+        state = self.__dict__.copy()
+        state["_process_log"] = None
+        state["_writer"] = None
+        return state
 
     def get_process_id(self):
         return self._process_id
@@ -1,53 +1,217 @@
+import hashlib
+import io
 import json
 import csv
 import logging
 import os
+import threading
 import traceback
 from datetime import datetime
 
-import matplotlib.pyplot as plt
+import numpy as np
 from django.template.loader import render_to_string
-from xhtml2pdf import pisa
-from xhtml2pdf.files import pisaFileObject
 
-from api.utils.custom_logger import RESULT_KEY
+from api.utils.custom_logger import RESULT_KEY, ALL_JSON_RESULTS_FILE_NAME, BEST_PLOT_FILE_NAME, \
+    ALL_RESULTS_PLOT_FILE_NAME, PDF_RESULTS_FILE_NAME, get_results_source_paths, load_results
+from api.utils.result_store import STATS_COLUMNS, columns_to_entries, format_timestamp
 from modeling_system_backend import settings
 
 logger = logging.getLogger('common')
 
+ARTIFACT_FINGERPRINT_SUFFIX = ".fingerprint"
 
-def save_results_to_csv(results, filename="results/fitness_results.csv", only_best_result=False):
-    """Сохранение результатов в CSV файл"""
-    if only_best_result:
-        result_data = results.get(RESULT_KEY)
+# Максимум точек на один ряд графика и длина ряда, после которой маркеры точек отключаются
+PLOT_POINT_BUDGET = 2000
+MARKER_POINTS_THRESHOLD = 200
 
-        results = {}
-        if result_data:
-            results[RESULT_KEY] = result_data
+_plot_figure = None
+_plot_lock = threading.Lock()
 
-    if not results:
-        return "Невозможно выгрузить данные"
+# Виды выгрузок совпадают с параметрами запроса ExportResult, порядок задает приоритет параметров
+FINAL_RESULT_PNG = "final_result_png"
+ALL_WORKERS_PNG = "all_workers_png"
+CSV_BEST_RESULTS = "csv_best_results"
+CSV_ALL_RESULTS = "csv_all_results"
+JSON_BEST_RESULTS = "json_best_results"
+JSON_ALL_RESULTS = "json_all_results"
+PDF_RESULTS = "pdf_results"
+
+EXPORT_TYPES = (
+    FINAL_RESULT_PNG,
+    ALL_WORKERS_PNG,
+    CSV_BEST_RESULTS,
+    CSV_ALL_RESULTS,
+    JSON_BEST_RESULTS,
+    JSON_ALL_RESULTS,
+    PDF_RESULTS,
+)
+
+# Графики и PDF строятся в файл и кэшируются, для больших задач — фоновой задачей Celery
+EXPORT_FILE_NAMES = {
+    FINAL_RESULT_PNG: BEST_PLOT_FILE_NAME,
+    ALL_WORKERS_PNG: ALL_RESULTS_PLOT_FILE_NAME,
+    PDF_RESULTS: PDF_RESULTS_FILE_NAME,
+}
+HEAVY_EXPORTS = (FINAL_RESULT_PNG, ALL_WORKERS_PNG, PDF_RESULTS)
+
+# CSV и JSON отдаются потоком прямо из хранилища статистики
+STREAMING_EXPORTS = (CSV_BEST_RESULTS, CSV_ALL_RESULTS, JSON_BEST_RESULTS, JSON_ALL_RESULTS)
+BEST_RESULT_EXPORTS = (FINAL_RESULT_PNG, CSV_BEST_RESULTS, JSON_BEST_RESULTS)
+
+# Число строк в одном фрагменте потоковой выгрузки
+STREAM_CHUNK_ROWS = 5000
+
+
+def get_results_fingerprint(results_folder):
+    """Отпечаток источников результатов задачи по времени изменения и размеру файлов.
 
-    with open(filename, mode='w', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow(["Process", "Generation", "Min Fitness", "Max Fitness", "Avg Fitness", "Timestamp"])
+    Возвращает (fingerprint, last_modified) или (None, None), если результатов нет.
+    """
+    source_paths = get_results_source_paths(results_folder)
+    if not source_paths:
+        json_path = os.path.join(results_folder, ALL_JSON_RESULTS_FILE_NAME)
+        source_paths = [json_path] if os.path.exists(json_path) else []
+    if not source_paths:
+        return None, None
 
-        for process, data in results.items():
-            for entry in data:
+    fingerprint = hashlib.sha1()
+    last_modified = 0
+    for path in sorted(source_paths):
+        stat = os.stat(path)
+        fingerprint.update(f"{os.path.basename(path)}:{stat.st_mtime_ns}:{stat.st_size};".encode())
+        last_modified = max(last_modified, stat.st_mtime)
+    return fingerprint.hexdigest(), int(last_modified)
+
+
+def is_artifact_fresh(artifact_path, fingerprint):
+    """Файл выгрузки актуален, если он построен из источников с тем же отпечатком."""
+    fingerprint_path = f"{artifact_path}{ARTIFACT_FINGERPRINT_SUFFIX}"
+    if fingerprint is None or not os.path.exists(artifact_path) or not os.path.exists(fingerprint_path):
+        return False
+    with open(fingerprint_path, "r") as fingerprint_file:
+        return fingerprint_file.read() == fingerprint
+
+
+def save_artifact_fingerprint(artifact_path, fingerprint):
+    if fingerprint is None:
+        return
+    with open(f"{artifact_path}{ARTIFACT_FINGERPRINT_SUFFIX}", "w") as fingerprint_file:
+        fingerprint_file.write(fingerprint)
+
+
+def iter_rows(columns, chunk_size=STREAM_CHUNK_ROWS):
+    """Перебирает строки столбцов блоками по chunk_size, не загружая весь ряд в память."""
+    for start in range(0, len(columns["generation"]), chunk_size):
+        yield zip(*(columns[column][start:start + chunk_size].tolist() for column in STATS_COLUMNS))
+
+
+def stream_results_csv(results):
+    """Генератор CSV-выгрузки: заголовок, затем по одному фрагменту текста на блок строк."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["Process", "Generation", "Min Fitness", "Max Fitness", "Avg Fitness", "Timestamp"])
+
+    for process, columns in results.items():
+        for rows in iter_rows(columns):
+            for generation, min_fitness, max_fitness, avg_fitness, timestamp in rows:
                 writer.writerow([
                     process,
-                    entry.get("generation"),
-                    entry.get("min_fitness"),
-                    entry.get("max_fitness"),
-                    entry.get("avg_fitness"),
-                    entry.get("timestamp")
+                    generation,
+                    min_fitness,
+                    max_fitness,
+                    avg_fitness,
+                    format_timestamp(timestamp)
                 ])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_results_json(results):
+    """Генератор JSON-выгрузки в формате json_log.json: {process_key: [записи поколений]}."""
+    yield "{"
+    for process_number, (process, columns) in enumerate(results.items()):
+        separator = ", " if process_number else ""
+        yield f"{separator}{json.dumps(process)}: ["
+
+        first_row = True
+        for rows in iter_rows(columns):
+            entries = []
+            for generation, min_fitness, max_fitness, avg_fitness, timestamp in rows:
+                entries.append(json.dumps({
+                    "generation": generation,
+                    "min_fitness": min_fitness,
+                    "max_fitness": max_fitness,
+                    "avg_fitness": avg_fitness,
+                    "timestamp": format_timestamp(timestamp),
+                }))
+            if entries:
+                yield ("" if first_row else ", ") + ", ".join(entries)
+                first_row = False
+        yield "]"
+    yield "}"
+
+
+def lttb_indices(x, y, point_budget):
+    """Индексы точек ряда, выбранные алгоритмом Largest-Triangle-Three-Buckets.
+
+    Первая и последняя точки сохраняются, из каждой промежуточной корзины берется точка,
+    образующая наибольший треугольник с предыдущей выбранной точкой и средним следующей корзины.
+    Поэтому пики и провалы ряда остаются на графике.
+    """
+    points_count = len(x)
+    if point_budget >= points_count or point_budget < 3:
+        return np.arange(points_count)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    bucket_edges = np.linspace(1, points_count - 1, point_budget - 1).astype(int)
+
+    indices = np.empty(point_budget, dtype=int)
+    indices[0] = 0
+    indices[-1] = points_count - 1
+
+    selected = 0
+    for bucket in range(point_budget - 2):
+        start, stop = bucket_edges[bucket], bucket_edges[bucket + 1]
+        next_stop = bucket_edges[bucket + 2] if bucket + 2 < len(bucket_edges) else points_count
+        next_x = x[stop:next_stop].mean()
+        next_y = y[stop:next_stop].mean()
+
+        areas = np.abs((x[selected] - next_x) * (y[start:stop] - y[selected])
+                       - (x[selected] - x[start:stop]) * (next_y - y[selected]))
+        selected = start + int(np.argmax(areas))
+        indices[bucket + 1] = selected
+    return indices
+
+
+def decimate_series(x, y, point_budget=PLOT_POINT_BUDGET):
+    indices = lttb_indices(x, y, point_budget)
+    return np.asarray(x)[indices], np.asarray(y)[indices]
+
+
+def get_plot_figure():
+    """Одна неинтерактивная фигура Agg на процесс: создание фигуры дороже очистки.
+
+    matplotlib импортируется при первом построении графика, а не при загрузке модуля.
+    """
+    global _plot_figure
+    if _plot_figure is None:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        _plot_figure = Figure(figsize=(10, 5))
+        FigureCanvasAgg(_plot_figure)
+    _plot_figure.clf()
+    return _plot_figure
 
 
 def plot_results(results, filename="results/fitness_plot.png", only_best_result=False):
-    """Построение графика изменения значений фитнес-функции"""
-    plt.figure(figsize=(10, 5))
+    """Построение графика изменения значений фитнес-функции
 
+    Каждый ряд прореживается до PLOT_POINT_BUDGET точек, поэтому время построения не зависит от длины запуска.
+    """
     if only_best_result:
         result_data = results.get(RESULT_KEY)
 
@@ -58,46 +222,37 @@ def plot_results(results, filename="results/fitness_plot.png", only_best_result=
     if not results:
         return "Невозможно выгрузить данные"
 
-    for process, data in results.items():
-        generations = [entry.get("generation") for entry in data]
-        min_fitness = [entry.get("min_fitness") for entry in data]
-        max_fitness = [entry.get("max_fitness") for entry in data]
-        avg_fitness = [entry.get("avg_fitness") for entry in data]
-
-        plt.plot(generations, min_fitness, marker='o', linestyle='-', label=f'{process} Min Fitness')
-        plt.plot(generations, max_fitness, marker='o', linestyle='-', label=f'{process} Max Fitness')
-        plt.plot(generations, avg_fitness, marker='o', linestyle='-', label=f'{process} Avg Fitness')
+    with _plot_lock:
+        figure = get_plot_figure()
+        axes = figure.add_subplot()
 
-    plt.xlabel("Generation")
-    plt.ylabel("Fitness")
-    plt.title("Fitness Evolution Over Generations")
-    plt.legend()
-    plt.grid(True)
-    plt.savefig(filename)
-    plt.show()
+        for process, columns in results.items():
+            generations = columns["generation"]
+            marker = 'o' if len(generations) <= MARKER_POINTS_THRESHOLD else None
 
+            for column, label in (("min_fitness", "Min"), ("max_fitness", "Max"), ("avg_fitness", "Avg")):
+                plot_x, plot_y = decimate_series(generations, columns[column])
+                axes.plot(plot_x, plot_y, marker=marker, linestyle='-', label=f'{process} {label} Fitness')
 
-def best_result_json(results, filename="results/fitness_plot.png"):
-    result_data = results.get(RESULT_KEY)
-
-    results = {}
-    if result_data:
-        results[RESULT_KEY] = result_data
-
-    if not results:
-        return "Невозможно выгрузить данные"
-
-    with open(filename, "w") as json_file:
-        json.dump(results, json_file, indent=4)
+        axes.set_xlabel("Generation")
+        axes.set_ylabel("Fitness")
+        axes.set_title("Fitness Evolution Over Generations")
+        axes.legend()
+        axes.grid(True)
+        figure.savefig(filename)
 
 
 def save_results_to_pdf(results, chart_path=None, filename="results/fitness_results.pdf"):
+    # xhtml2pdf тянет reportlab и pyhanko, поэтому загружается только при построении PDF
+    from xhtml2pdf import pisa
+    from xhtml2pdf.files import pisaFileObject
+
     font_name = "arial.ttf"
     font_path = os.path.join(settings.BASE_DIR, "fonts", font_name)
     font_path = font_path.replace(os.sep, "/")
 
     html_context = {
-        "results": results,
+        "results": {process: columns_to_entries(columns) for process, columns in results.items()},
         "chart_path": chart_path,
         "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "font_path": font_path
@@ -114,3 +269,38 @@ def save_results_to_pdf(results, chart_path=None, filename="results/fitness_resu
             logger.error(f"Error: {str(e)}")
             logger.error(traceback.format_exc())
             return "Ошибка при создании PDF"
+
+
+def build_export_artifact(result_path, export_type, fingerprint, set_progress=None):
+    """Строит файл выгрузки или возвращает актуальный из кэша.
+
+    set_progress(stage, progress) вызывается на этапах построения, чтобы фоновая задача могла сообщать о ходе работы.
+    Возвращает (путь к файлу, None) или (None, текст ошибки).
+    """
+    artifact_path = os.path.join(result_path, EXPORT_FILE_NAMES[export_type])
+    if is_artifact_fresh(artifact_path, fingerprint):
+        return artifact_path, None
+
+    if set_progress:
+        set_progress("loading", 0.1)
+    results = load_results(result_path)
+
+    if export_type in (FINAL_RESULT_PNG, ALL_WORKERS_PNG):
+        if set_progress:
+            set_progress("plotting", 0.3)
+        not_valid = plot_results(results, artifact_path, only_best_result=export_type == FINAL_RESULT_PNG)
+    elif export_type == PDF_RESULTS:
+        plot_path, not_valid = build_export_artifact(result_path, ALL_WORKERS_PNG, fingerprint, set_progress)
+        if not not_valid:
+            if set_progress:
+                set_progress("rendering", 0.6)
+            not_valid = save_results_to_pdf(results, plot_path, artifact_path)
+    else:
+        not_valid = f"Unsupported export: {export_type}"
+
+    if not_valid:
+        return None, not_valid
+    save_artifact_fingerprint(artifact_path, fingerprint)
+    if set_progress:
+        set_progress("done", 1.0)
+    return artifact_path, None
@@ -4,10 +4,8 @@ from rest_framework.response import Response
 
 from api.responses import permission_denied_response, bad_request_response, not_found_response
 from api.utils.custom_logger import get_user_folder_name
-from api.utils.load_custom_funcs.core_function_utils import CROSSOVER_FUNCTION_MAPPING, FITNESS_FUNCTION_MAPPING, \
-    MUTATION_FUNCTION_MAPPING, SELECTION_FUNCTION_MAPPING, ADAPTATION_FUNCTION_MAPPING, \
-    INIT_POPULATION_FUNCTION_MAPPING, TERMINATION_FUNCTION_MAPPING
-from api.utils.load_custom_funcs.load_custom_functions import get_functions_with_import_paths
+from api.utils.load_custom_funcs.core_function_utils import CORE_FUNCTIONS_FOLDERS
+from api.utils.load_custom_funcs.load_custom_functions import get_functions_index
 from modeling_system_backend import settings
 
 MEDIA_ROOT = settings.MEDIA_ROOT
@@ -39,68 +37,31 @@ class UserFunctionMixin:
                 user_termination_folder)
 
     @classmethod
-    def get_functions_mapping(cls, user_id):
+    def get_functions_index(cls, user_id):
+        """Описания встроенных и пользовательских функций по типам; пользовательские перекрывают встроенные."""
         functions_folder = cls.get_functions_folder(user_id)
         if isinstance(functions_folder, Response):
             return functions_folder
 
-        for folder in functions_folder:
-            os.makedirs(folder, exist_ok=True)
+        functions_index = []
+        for core_folder, user_folder in zip(CORE_FUNCTIONS_FOLDERS, functions_folder):
+            os.makedirs(user_folder, exist_ok=True)
+            functions_index.append({
+                **get_functions_index(core_folder, persist=False),
+                **get_functions_index(user_folder)
+            })
+        return tuple(functions_index)
 
-        (user_adaptation_folder,
-         user_crossover_folder,
-         user_fitness_folder,
-         user_init_population_folder,
-         user_mutation_folder,
-         user_selection_folder,
-         user_termination_folder) = functions_folder
-
-        user_adaptation_func_mapping = get_functions_with_import_paths(user_adaptation_folder)
-        adaptation_functions = {
-            **ADAPTATION_FUNCTION_MAPPING,
-            **user_adaptation_func_mapping
-        }
-
-        user_crossover_func_mapping = get_functions_with_import_paths(user_crossover_folder)
-        crossover_functions = {
-            **CROSSOVER_FUNCTION_MAPPING,
-            **user_crossover_func_mapping
-        }
-        user_fitness_func_mapping = get_functions_with_import_paths(user_fitness_folder)
-        fitness_functions = {
-            **FITNESS_FUNCTION_MAPPING,
-            **user_fitness_func_mapping
-        }
-        user_init_population_func_mapping = get_functions_with_import_paths(user_init_population_folder)
-        init_population_functions = {
-            **INIT_POPULATION_FUNCTION_MAPPING,
-            **user_init_population_func_mapping
-        }
-
-        user_mutation_func_mapping = get_functions_with_import_paths(user_mutation_folder)
-        mutation_functions = {
-            **MUTATION_FUNCTION_MAPPING,
-            **user_mutation_func_mapping
-        }
-        user_selection_func_mapping = get_functions_with_import_paths(user_selection_folder)
-        selection_functions = {
-            **SELECTION_FUNCTION_MAPPING,
-            **user_selection_func_mapping
-        }
-
-        user_termination_func_mapping = get_functions_with_import_paths(user_termination_folder)
-        termination_functions = {
-            **TERMINATION_FUNCTION_MAPPING,
-            **user_termination_func_mapping
-        }
-
-        return (adaptation_functions,
-                crossover_functions,
-                fitness_functions,
-                init_population_functions,
-                mutation_functions,
-                selection_functions,
-                termination_functions)
+    @classmethod
+    def get_functions_mapping(cls, user_id):
+        functions_index = cls.get_functions_index(user_id)
+        if isinstance(functions_index, Response):
+            return functions_index
+
+        return tuple(
+            {function_name: function["path"] for function_name, function in function_index.items()}
+            for function_index in functions_index
+        )
 
     @staticmethod
     def choose_func_folder(type_of_function, functions_folder):
@@ -1,38 +1,59 @@
+import importlib
 import os.path
+from collections.abc import Mapping
 
-from api.utils.load_custom_funcs.load_custom_functions import get_functions_with_import_paths
+from modeling_system_backend.settings import BASE_DIR
 
-from core.models.asynchronous_model import AsynchronousGA
-from core.models.island_model import IslandGA
-from core.models.master_worker_model import MasterWorkerGA
 
-from modeling_system_backend.settings import BASE_DIR
+class LazyModelsMapping(Mapping):
+    """Словарь моделей ГА, классы которых импортируются при первом обращении.
+
+    Модули моделей загружают celery и redis, поэтому веб-процесс, которому нужны только названия моделей,
+    их не импортирует.
+    """
+
+    def __init__(self, models_routes):
+        self.models_routes = models_routes
+        self.models = {}
+
+    def __getitem__(self, model_name):
+        model = self.models.get(model_name)
+        if model is None:
+            module_path, class_name = self.models_routes[model_name].rsplit(".", 1)
+            model = getattr(importlib.import_module(module_path), class_name)
+            self.models[model_name] = model
+        return model
+
+    def __iter__(self):
+        return iter(self.models_routes)
+
+    def __len__(self):
+        return len(self.models_routes)
+
 
-SUPPORTED_MODELS_GA = {
-    "master_worker": MasterWorkerGA,
-    "island_model": IslandGA,
-    "asynchronous_model": AsynchronousGA
-}
+SUPPORTED_MODELS_GA = LazyModelsMapping({
+    "master_worker": "core.models.master_worker_model.MasterWorkerGA",
+    "island_model": "core.models.island_model.IslandGA",
+    "asynchronous_model": "core.models.asynchronous_model.AsynchronousGA",
+    "steady_state_model": "core.models.steady_state_model.SteadyStateGA",
+    "cellular_model": "core.models.cellular_model.CellularGA",
+})
 
 route_to_core = os.path.join(BASE_DIR, "core")
 
 route_to_core_adaptation = os.path.join(route_to_core, "adaptation")
-ADAPTATION_FUNCTION_MAPPING = get_functions_with_import_paths(route_to_core_adaptation)
-
 route_to_core_crossover = os.path.join(route_to_core, "crossover")
-CROSSOVER_FUNCTION_MAPPING = get_functions_with_import_paths(route_to_core_crossover)
-
 route_to_core_fitness = os.path.join(route_to_core, "fitness")
-FITNESS_FUNCTION_MAPPING = get_functions_with_import_paths(route_to_core_fitness)
-
 route_to_core_init_population = os.path.join(route_to_core, "init_population")
-INIT_POPULATION_FUNCTION_MAPPING = get_functions_with_import_paths(route_to_core_init_population)
-
 route_to_core_mutation = os.path.join(route_to_core, "mutation")
-MUTATION_FUNCTION_MAPPING = get_functions_with_import_paths(route_to_core_mutation)
-
 route_to_core_selection = os.path.join(route_to_core, "selection")
-SELECTION_FUNCTION_MAPPING = get_functions_with_import_paths(route_to_core_selection)
-
 route_to_core_termination = os.path.join(route_to_core, "termination")
-TERMINATION_FUNCTION_MAPPING = get_functions_with_import_paths(route_to_core_termination)
+
+# Папки встроенных функций в порядке UserFunctionMixin.get_functions_folder
+CORE_FUNCTIONS_FOLDERS = (route_to_core_adaptation,
+                          route_to_core_crossover,
+                          route_to_core_fitness,
+                          route_to_core_init_population,
+                          route_to_core_mutation,
+                          route_to_core_selection,
+                          route_to_core_termination)
@@ -1,7 +1,6 @@
 import ast
+import json
 import os
-import importlib.util
-import inspect
 
 import logging
 
@@ -9,104 +8,134 @@ from modeling_system_backend.settings import BASE_DIR
 
 common_logger = logging.getLogger("common")
 
-def extract_kwargs_params_from_module_path(module_path):
-    """Принимает путь в формате 'path.to.your.file' и возвращает список параметров, использующихся через kwargs.get()."""
-    params = set()
-    try:
-        # Преобразуем модульный путь в путь к файлу и название функции
-        function_route = [*module_path.split(".")]
+# Индекс папки функций: сохраняется рядом с файлами и пересобирается при их изменении
+FUNCTIONS_INDEX_FILE_NAME = ".functions_index.json"
 
-        file_route = function_route[:-1]
-        function_name = function_route[-1]
-        file_path = os.path.join(BASE_DIR, *file_route) + ".py"
+# Кэш индексов на процесс: папка -> индекс
+_functions_cache = {}
 
-        with open(file_path, "r", encoding="utf-8") as f:
-            file_code = f.read()
-
-        # Разбираем файл в AST
-        tree = ast.parse(file_code)
-
-        # Ищем конкретную функцию в AST
-        for node in tree.body:
-            if isinstance(node, ast.FunctionDef) and node.name == function_name:
-                # Ищем внутри функции все вызовы kwargs.get()
-                for sub_node in ast.walk(node):
-                    if isinstance(sub_node, ast.Call) and isinstance(sub_node.func, ast.Attribute):
-                        if sub_node.func.attr == 'get':
-                            if len(sub_node.args) > 0:
-                                arg = sub_node.args[0]
-                                if isinstance(arg, ast.Str):  # Python < 3.8
-                                    params.add(arg.s)
-                                elif isinstance(arg, ast.Constant) and isinstance(arg.value, str):  # Python >= 3.8
-                                    params.add(arg.value)
-                break  # Нашли функцию — выходим из цикла
-
-    except FileNotFoundError:
-        common_logger.error(f"Файл {module_path} не найден.")
-    except Exception as e:
-        common_logger.error(f"Ошибка при обработке файла {module_path}: {e}")
 
-    return list(params)
+def get_string_value(node):
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
 
 
-def get_translations_from_function(path_to_func: str) -> dict:
-    # Разбиваем путь на модуль и имя функции
-    *module_parts, func_name = path_to_func.split(".")
-    module_path = ".".join(module_parts)
-
-    # Импортируем модуль
-    module = importlib.import_module(module_path)
-
-    # Получаем саму функцию
-    func = getattr(module, func_name)
-
-    # Получаем исходный код функции
-    source = inspect.getsource(func)
+def get_function_kwargs(function_node) -> list:
+    """Возвращает список параметров, использующихся в функции через kwargs.get()."""
+    params = set()
+    for sub_node in ast.walk(function_node):
+        if isinstance(sub_node, ast.Call) and isinstance(sub_node.func, ast.Attribute):
+            if sub_node.func.attr == 'get' and len(sub_node.args) > 0:
+                param = get_string_value(sub_node.args[0])
+                if param is not None:
+                    params.add(param)
+    return sorted(params)
 
-    # Парсим исходный код в AST
-    tree = ast.parse(source)
 
-    # Словарь для переводов
+def get_function_translations(function_node) -> dict:
+    """Собирает переводы из переменных _ru_* внутри функции. _ru_function_name переводит имя самой функции."""
     translations = {}
-
-    # Проходим по телу функции
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Assign):
-            for target in node.targets:
+    for sub_node in ast.walk(function_node):
+        if isinstance(sub_node, ast.Assign):
+            for target in sub_node.targets:
                 if isinstance(target, ast.Name) and target.id.startswith("_ru_"):
-                    var_name = target.id[4:]  # убираем '_ru_'
-                    if isinstance(node.value, ast.Str):  # Python < 3.8
-                        translations[var_name] = node.value.s
-                    elif isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):  # Python 3.8+
-                        translations[var_name] = node.value.value
-
-    # Добавим имя функции как ключ
-    translations[func_name] = translations.pop('function_name', func_name)
+                    translation = get_string_value(sub_node.value)
+                    if translation is not None:
+                        translations[target.id[4:]] = translation
 
+    translations[function_node.name] = translations.pop('function_name', function_node.name)
     return translations
 
 
-def get_functions_with_import_paths(folder_path):
-    functions_dict = {}
+def index_module_file(file_path) -> dict:
+    """Разбирает файл один раз и описывает функции, объявленные в нем на верхнем уровне.
 
+    Модуль не импортируется. Функции, импортированные из других модулей, и приватные функции (_name) пропускаются.
+    """
+    relative_module_path = os.path.relpath(file_path, start=BASE_DIR).replace(os.path.sep, ".")[:-3]
     try:
-        for file_name in os.listdir(folder_path):
-            if file_name.endswith(".py"):
-                file_path = os.path.join(folder_path, file_name)
-                module_name = file_name[:-3]
+        with open(file_path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+    except (SyntaxError, UnicodeDecodeError) as e:
+        common_logger.error(f"Ошибка при обработке файла {file_path}: {e}")
+        return {}
+
+    functions = {}
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and not node.name.startswith("_"):
+            functions[node.name] = {
+                "path": f"{relative_module_path}.{node.name}",
+                "kwargs": get_function_kwargs(node),
+                "translations": get_function_translations(node),
+            }
+    return functions
+
+
+def get_folder_signature(folder_path):
+    """Подпись папки: (имя, mtime, размер) каждого .py файла. None, если папки нет."""
+    try:
+        return sorted(
+            [entry.name, entry.stat().st_mtime_ns, entry.stat().st_size]
+            for entry in os.scandir(folder_path) if entry.name.endswith(".py")
+        )
+    except FileNotFoundError:
+        return None
 
-                relative_module_path = os.path.relpath(file_path, start=BASE_DIR).replace(os.path.sep, ".")[:-3]
 
-                spec = importlib.util.spec_from_file_location(module_name, file_path)
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
+def build_functions_index(folder_path, signature) -> dict:
+    functions = {}
+    for file_name, _, _ in signature or []:
+        functions.update(index_module_file(os.path.join(folder_path, file_name)))
+    return {"signature": signature, "functions": dict(sorted(functions.items()))}
 
-                functions = inspect.getmembers(module, inspect.isfunction)
 
-                for function_name, _ in functions:
-                    function_path = f"{relative_module_path}.{function_name}"
-                    functions_dict[function_name] = function_path
-    except FileNotFoundError:
-        pass
+def read_functions_index(folder_path):
+    index_path = os.path.join(folder_path, FUNCTIONS_INDEX_FILE_NAME)
+    try:
+        with open(index_path, "r", encoding="utf-8") as index_file:
+            return json.load(index_file)
+    except (FileNotFoundError, ValueError):
+        return None
 
-    return functions_dict
+
+def write_functions_index(folder_path, index):
+    index_path = os.path.join(folder_path, FUNCTIONS_INDEX_FILE_NAME)
+    temp_index_path = f"{index_path}.tmp"
+    try:
+        with open(temp_index_path, "w", encoding="utf-8") as index_file:
+            json.dump(index, index_file, ensure_ascii=False)
+        os.replace(temp_index_path, index_path)
+    except OSError as e:
+        common_logger.error(f"Не удалось сохранить индекс функций {index_path}: {e}")
+
+
+def get_functions_index(folder_path, persist=True) -> dict:
+    """Возвращает описание функций папки: {имя: {"path", "kwargs", "translations"}}.
+
+    Индекс берется из кэша процесса или из файла индекса в папке, пока не изменилась подпись папки;
+    иначе файлы разбираются заново. persist=False не пишет файл индекса (для папок с исходным кодом).
+    """
+    signature = get_folder_signature(folder_path)
+    index = _functions_cache.get(folder_path)
+    if index is None or index["signature"] != signature:
+        index = read_functions_index(folder_path) if persist else None
+        if index is None or index.get("signature") != signature:
+            index = build_functions_index(folder_path, signature)
+            if persist and signature is not None:
+                write_functions_index(folder_path, index)
+        _functions_cache[folder_path] = index
+    return index["functions"]
+
+
+def refresh_functions_index(folder_path):
+    """Пересобирает индекс папки после загрузки или удаления файла функции."""
+    _functions_cache.pop(folder_path, None)
+    index = build_functions_index(folder_path, get_folder_signature(folder_path))
+    write_functions_index(folder_path, index)
+    _functions_cache[folder_path] = index
+
+
+def get_functions_with_import_paths(folder_path, persist=True):
+    return {function_name: function["path"]
+            for function_name, function in get_functions_index(folder_path, persist).items()}
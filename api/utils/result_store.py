@@ -0,0 +1,187 @@
+import datetime
+import json
+import os
+
+import numpy as np
+
+# Журнал поколений процесса: записи фиксированной длины, дописываемые в конец файла
+RECORD_DTYPE = np.dtype([
+    ("generation", "<i8"),
+    ("min_fitness", "<f8"),
+    ("max_fitness", "<f8"),
+    ("avg_fitness", "<f8"),
+    ("timestamp", "<f8"),
+])
+STATS_COLUMNS = RECORD_DTYPE.names
+
+PROCESS_KEY_PREFIX = "process_"
+PROCESS_RECORDS_PREFIX = "stats_"
+PROCESS_RECORDS_SUFFIX = ".bin"
+
+# Сводное хранилище задачи: по одному .npy на столбец и meta.json со смещениями процессов
+STATS_FOLDER_NAME = "stats"
+STATS_META_FILE_NAME = "meta.json"
+
+
+def get_process_records_path(results_folder, process_key) -> str:
+    return os.path.join(results_folder, f"{PROCESS_RECORDS_PREFIX}{process_key}{PROCESS_RECORDS_SUFFIX}")
+
+
+def get_process_keys(results_folder) -> list:
+    """Возвращает ключи процессов (process_N), для которых есть журналы записей, по порядку номеров."""
+    if not os.path.isdir(results_folder):
+        return []
+
+    prefix = f"{PROCESS_RECORDS_PREFIX}{PROCESS_KEY_PREFIX}"
+    process_numbers = []
+    for file in os.listdir(results_folder):
+        if file.startswith(prefix) and file.endswith(PROCESS_RECORDS_SUFFIX):
+            process_number = file[len(prefix):-len(PROCESS_RECORDS_SUFFIX)]
+            if process_number.isdigit():
+                process_numbers.append(int(process_number))
+    return [f"{PROCESS_KEY_PREFIX}{process_number}" for process_number in sorted(process_numbers)]
+
+
+def get_stats_meta_path(results_folder) -> str:
+    return os.path.join(results_folder, STATS_FOLDER_NAME, STATS_META_FILE_NAME)
+
+
+def pack_records(records) -> bytes:
+    """Упаковывает записи журнала (словари со статистикой поколения) в байты фиксированной длины."""
+    packed = np.array([tuple(record[column] for column in STATS_COLUMNS) for record in records], dtype=RECORD_DTYPE)
+    return packed.tobytes()
+
+
+def read_process_records(records_path) -> np.ndarray:
+    """Открывает журнал записей процесса только на чтение через memmap. Недописанная последняя запись пропускается."""
+    if not os.path.exists(records_path):
+        return np.empty(0, dtype=RECORD_DTYPE)
+    count = os.path.getsize(records_path) // RECORD_DTYPE.itemsize
+    if not count:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return np.memmap(records_path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+
+
+def slice_generations(columns, start_generation=None, stop_generation=None) -> dict:
+    """Оставляет поколения из диапазона [start_generation, stop_generation]. Поколения идут по возрастанию."""
+    generations = columns["generation"]
+    start = 0 if start_generation is None else np.searchsorted(generations, start_generation, side="left")
+    stop = len(generations) if stop_generation is None else np.searchsorted(generations, stop_generation,
+                                                                             side="right")
+    return {column: values[start:stop] for column, values in columns.items()}
+
+
+def records_to_columns(records) -> dict:
+    return {column: records[column] for column in STATS_COLUMNS}
+
+
+def entries_to_columns(entries) -> dict:
+    """Преобразует записи старого формата json_log.json в столбцы."""
+    columns = {column: np.array([entry.get(column) for entry in entries]) for column in STATS_COLUMNS}
+    columns["generation"] = columns["generation"].astype(np.int64)
+    return columns
+
+
+def format_timestamp(timestamp) -> str:
+    if isinstance(timestamp, str):
+        return timestamp
+    return datetime.datetime.fromtimestamp(float(timestamp)).isoformat()
+
+
+def columns_to_entries(columns) -> list:
+    """Преобразует столбцы в список словарей формата json_log.json."""
+    return [
+        {
+            "generation": int(generation),
+            "min_fitness": float(min_fitness),
+            "max_fitness": float(max_fitness),
+            "avg_fitness": float(avg_fitness),
+            "timestamp": format_timestamp(timestamp),
+        }
+        for generation, min_fitness, max_fitness, avg_fitness, timestamp in zip(
+            *(columns[column] for column in STATS_COLUMNS))
+    ]
+
+
+def write_stats_store(results_folder, process_records, result_process=None):
+    """Сводит журналы процессов в столбцы .npy. meta.json пишется последним и отмечает готовность хранилища."""
+    stats_folder = os.path.join(results_folder, STATS_FOLDER_NAME)
+    os.makedirs(stats_folder, exist_ok=True)
+
+    offsets = {}
+    start = 0
+    for process_key, records in process_records.items():
+        offsets[process_key] = [start, start + len(records)]
+        start += len(records)
+
+    all_records = np.concatenate(list(process_records.values())) if process_records else \
+        np.empty(0, dtype=RECORD_DTYPE)
+    for column in STATS_COLUMNS:
+        np.save(os.path.join(stats_folder, f"{column}.npy"), np.ascontiguousarray(all_records[column]))
+
+    write_stats_meta(results_folder, {"processes": offsets, "result_process": result_process})
+
+
+def write_stats_meta(results_folder, meta):
+    meta_path = get_stats_meta_path(results_folder)
+    temp_meta_path = f"{meta_path}.tmp"
+    with open(temp_meta_path, "w") as meta_file:
+        json.dump(meta, meta_file, indent=4)
+    os.replace(temp_meta_path, meta_path)
+
+
+def set_result_process(results_folder, process_key):
+    """Отмечает процесс, результат которого считается итоговым."""
+    meta_path = get_stats_meta_path(results_folder)
+    with open(meta_path, "r") as meta_file:
+        meta = json.load(meta_file)
+    meta["result_process"] = process_key
+    write_stats_meta(results_folder, meta)
+
+
+def count_records(results_folder):
+    """Число записей статистики задачи без чтения данных. None, если сводного хранилища и журналов процессов нет."""
+    meta_path = get_stats_meta_path(results_folder)
+    if os.path.exists(meta_path):
+        with open(meta_path, "r") as meta_file:
+            meta = json.load(meta_file)
+        return sum(stop - start for start, stop in meta.get("processes", {}).values())
+
+    process_keys = get_process_keys(results_folder)
+    if not process_keys:
+        return None
+    return sum(os.path.getsize(get_process_records_path(results_folder, process_key)) // RECORD_DTYPE.itemsize
+               for process_key in process_keys)
+
+
+class StatsStore:
+    """Сводное хранилище статистики задачи.
+
+    Столбцы открываются через np.load(mmap_mode="r"), поэтому загрузка не зависит от числа поколений,
+    а срезы по процессам и диапазонам поколений читают с диска только нужные страницы.
+    """
+
+    def __init__(self, results_folder):
+        with open(get_stats_meta_path(results_folder), "r") as meta_file:
+            meta = json.load(meta_file)
+        self.offsets = meta.get("processes", {})
+        self.result_process = meta.get("result_process")
+
+        stats_folder = os.path.join(results_folder, STATS_FOLDER_NAME)
+        self.columns = {column: np.load(os.path.join(stats_folder, f"{column}.npy"), mmap_mode="r")
+                        for column in STATS_COLUMNS}
+
+    @classmethod
+    def open(cls, results_folder):
+        """Возвращает хранилище или None, если задача еще не сведена."""
+        if not os.path.exists(get_stats_meta_path(results_folder)):
+            return None
+        return cls(results_folder)
+
+    def get_process_keys(self) -> list:
+        return list(self.offsets)
+
+    def get_process_stats(self, process_key, start_generation=None, stop_generation=None) -> dict:
+        start, stop = self.offsets[process_key]
+        columns = {column: values[start:stop] for column, values in self.columns.items()}
+        return slice_generations(columns, start_generation, stop_generation)
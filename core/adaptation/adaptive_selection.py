@@ -2,7 +2,7 @@ from core.selection.roulette_wheel_selection import roulette_wheel_selection
 from core.selection.tournament_selection import tournament_selection
 
 
-def adaptive_selection(self):
+def adaptive_selection(self, size=None):
     """Динамическая адаптация стратегии селекции по мере развития поколений."""
     _ru_function_name = "Адаптивная селекция"
 
@@ -11,7 +11,10 @@ def adaptive_selection(self):
 
     if generation < max_generations / 2:
         # Турнирная селекция на ранних стадиях
-        return tournament_selection(self)
+        return tournament_selection(self, size)
     else:
         # Рулеточная селекция на более поздних стадиях
-        return roulette_wheel_selection(self)
\ No newline at end of file
+        return roulette_wheel_selection(self, size)
+
+
+adaptive_selection.vectorized = True
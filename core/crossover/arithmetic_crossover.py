@@ -9,4 +9,7 @@ def arithmetic_crossover(self, parent1, parent2):
 
     child1 = alpha * parent1 + (1 - alpha) * parent2
     child2 = alpha * parent2 + (1 - alpha) * parent1
-    return child1, child2
\ No newline at end of file
+    return child1, child2
+
+
+arithmetic_crossover.vectorized = True
@@ -17,4 +17,7 @@ def blx_alpha_crossover(self, parent1, parent2):
     upper_bound = max_vals + alpha * diff
     child1 = np.random.uniform(lower_bound, upper_bound)
     child2 = np.random.uniform(lower_bound, upper_bound)
-    return child1, child2
\ No newline at end of file
+    return child1, child2
+
+
+blx_alpha_crossover.vectorized = True
@@ -5,15 +5,20 @@ def single_point_crossover(self, parent1, parent2):
     """Выполняет одноточечный кроссовер между двумя родителями.
 
     Args:
-        parent1 (np.ndarray): Первая родительская хромосома.
-        parent2 (np.ndarray): Вторая родительская хромосома.
+        parent1 (np.ndarray): Первая родительская хромосома (L,) или матрица родителей (N, L).
+        parent2 (np.ndarray): Вторая родительская хромосома (L,) или матрица родителей (N, L).
 
     Returns:
-        tuple: Две дочерние хромосомы.
+        tuple: Две дочерние хромосомы (или две матрицы потомков, по своей точке разреза на каждую пару).
     """
     _ru_function_name = "Одноточечный кроссовер"
 
-    point = np.random.randint(1, len(parent1))
-    child1 = np.concatenate((parent1[:point], parent2[point:]))
-    child2 = np.concatenate((parent2[:point], parent1[point:]))
-    return child1, child2
\ No newline at end of file
+    chrom_length = parent1.shape[-1]
+    point = np.random.randint(1, chrom_length, size=parent1.shape[:-1] + (1,))
+    mask = np.arange(chrom_length) < point
+    child1 = np.where(mask, parent1, parent2)
+    child2 = np.where(mask, parent2, parent1)
+    return child1, child2
+
+
+single_point_crossover.vectorized = True
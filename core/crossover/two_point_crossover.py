@@ -2,10 +2,26 @@ import numpy as np
 
 
 def two_point_crossover(self, parent1, parent2):
-    """Выполняет двухточечный кроссовер между двумя родителями."""
+    """Выполняет двухточечный кроссовер между двумя родителями.
+
+    Принимает как пару хромосом (L,), так и матрицы родителей (N, L) — тогда точки выбираются для каждой пары.
+    """
     _ru_function_name = "Двухточечный кроссовер"
 
-    point1, point2 = sorted(np.random.choice(range(1, len(parent1)), 2, replace=False))
-    child1 = np.concatenate((parent1[:point1], parent2[point1:point2], parent1[point2:]))
-    child2 = np.concatenate((parent2[:point1], parent1[point1:point2], parent2[point2:]))
-    return child1, child2
\ No newline at end of file
+    chrom_length = parent1.shape[-1]
+    points_shape = parent1.shape[:-1] + (1,)
+
+    # Две различные точки из [1, L - 1]: вторая сдвигается, если совпала с первой
+    point1 = np.random.randint(1, chrom_length, size=points_shape)
+    point2 = np.random.randint(1, chrom_length - 1, size=points_shape)
+    point2 = point2 + (point2 >= point1)
+    point1, point2 = np.minimum(point1, point2), np.maximum(point1, point2)
+
+    genes = np.arange(chrom_length)
+    mask = (genes >= point1) & (genes < point2)
+    child1 = np.where(mask, parent2, parent1)
+    child2 = np.where(mask, parent1, parent2)
+    return child1, child2
+
+
+two_point_crossover.vectorized = True
@@ -2,13 +2,19 @@ import numpy as np
 
 
 def ackley_function(chromosome):
-    """Вычисляет значение функции Акермана для заданной хромосомы."""
+    """Вычисляет значение функции Акермана для заданной хромосомы.
+
+    Принимает как одну хромосому (L,), так и всю популяцию (N, L) — тогда возвращает вектор фитнеса (N,).
+    """
     _ru_function_name = "Функция Акермана"
 
     a = 20
     b = 0.2
     c = 2 * np.pi
-    d = len(chromosome)
-    sum1 = sum(x**2 for x in chromosome) / d
-    sum2 = sum(np.cos(c * x) for x in chromosome) / d
-    return -a * np.exp(-b * np.sqrt(sum1)) - np.exp(sum2) + a + np.exp(1)
\ No newline at end of file
+    chromosome = np.asarray(chromosome, dtype=float)
+    sum1 = np.mean(chromosome ** 2, axis=-1)
+    sum2 = np.mean(np.cos(c * chromosome), axis=-1)
+    return -a * np.exp(-b * np.sqrt(sum1)) - np.exp(sum2) + a + np.exp(1)
+
+
+ackley_function.vectorized = True
@@ -2,8 +2,15 @@ import numpy as np
 
 
 def rastrigin_fitness(chromosome):
-    """Вычисляет значение функции Растригина для заданной хромосомы."""
+    """Вычисляет значение функции Растригина для заданной хромосомы.
+
+    Принимает как одну хромосому (L,), так и всю популяцию (N, L) — тогда возвращает вектор фитнеса (N,).
+    """
     _ru_function_name = "Функция Растригина"
 
     A = 10
-    return A * len(chromosome) + sum(x**2 - A * np.cos(2 * np.pi * x) for x in chromosome)
\ No newline at end of file
+    chromosome = np.asarray(chromosome, dtype=float)
+    return A * chromosome.shape[-1] + np.sum(chromosome ** 2 - A * np.cos(2 * np.pi * chromosome), axis=-1)
+
+
+rastrigin_fitness.vectorized = True
@@ -1,6 +1,17 @@
+import numpy as np
+
+
 def rosenbrock_function(chromosome):
-    """Вычисляет значение функции Розенброка."""
+    """Вычисляет значение функции Розенброка.
+
+    Принимает как одну хромосому (L,), так и всю популяцию (N, L) — тогда возвращает вектор фитнеса (N,).
+    """
     _ru_function_name = "Функция Розенброка"
 
-    return sum(100 * (chromosome[i+1] - chromosome[i]**2)**2 + (1 - chromosome[i])**2
-               for i in range(len(chromosome) - 1))
\ No newline at end of file
+    chromosome = np.asarray(chromosome, dtype=float)
+    current = chromosome[..., :-1]
+    following = chromosome[..., 1:]
+    return np.sum(100 * (following - current ** 2) ** 2 + (1 - current) ** 2, axis=-1)
+
+
+rosenbrock_function.vectorized = True
@@ -1,5 +1,15 @@
+import numpy as np
+
+
 def sphere_function(chromosome):
-    """Вычисляет значение сферической функции."""
+    """Вычисляет значение сферической функции.
+
+    Принимает как одну хромосому (L,), так и всю популяцию (N, L) — тогда возвращает вектор фитнеса (N,).
+    """
     _ru_function_name = "Сферическая функция"
 
-    return sum(x**2 for x in chromosome)
\ No newline at end of file
+    chromosome = np.asarray(chromosome, dtype=float)
+    return np.sum(chromosome ** 2, axis=-1)
+
+
+sphere_function.vectorized = True
@@ -1,124 +1,160 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
-from celery import shared_task
-from redis.asyncio import lock
+from celery import shared_task, group
 
-from core.models.mixin_models.ga_mixin_models import GeneticAlgorithmMixin
+from core.models.island_model import IslandGA
+from core.models.island_state import get_worker_island, release_worker_islands
+from core.models.mailbox import REDIS_MAILBOX, MEMORY_MAILBOX, create_mailbox
+from core.models.migration import get_migration_params, get_migration_targets, select_migrants, accept_migrants
+from modeling_system_backend.celery import app
 
+# Координатор ждет весь запуск островов, а не одно поколение, поэтому ожидание по умолчанию дольше, чем у IslandGA
+ASYNC_ISLAND_TIMEOUT_SECONDS = 60 * 60
 
-class AsynchronousGA:
-    REQUIRED_PARAMS = [
-        *GeneticAlgorithmMixin.REQUIRED_PARAMS,
-        "num_islands",
-        "migration_interval",
-        "migration_rate",
-    ]
 
-    def __init__(self, num_islands, population_size, max_generations, fitness_function,
-                 crossover_function, mutation_function, migration_rate=0.1,
-                 mutation_rate=0.01, crossover_rate=0.7,
-                 initialize_population_fn=None, termination_fn=None, adaptation_fn=None, selection_fn=None,
-                 fitness_threshold=None, stagnation_threshold=None, stagnation_generations=5):
-        """
-        num_islands: Количество островов (или процессов)
-        population_size: Размер популяции на каждом острове
-        max_generations: Максимальное количество поколений
-        fitness_function: Функция фитнеса
-        crossover_function: Функция кроссовера
-        mutation_function: Функция мутации
-        migration_rate: Процент популяции для миграции
-        mutation_rate: Вероятность мутации
-        crossover_rate: Вероятность кроссовера
-        initialize_population_fn: Функция для инициализации популяции
-        termination_fn: Функция завершения
-        adaptation_fn: Функция адаптации параметров
-        selection_fn: Функция селекции
-        fitness_threshold: Пороговое значение для фитнеса
+@shared_task
+def async_run_island(island_state, mailbox, num_migrants, additional_params, ga_params, functions_routes):
+    """Все поколения одного острова. Остров не ждет других: мигранты приходят через почтовый ящик."""
+    return run_async_island(island_state, mailbox, num_migrants, additional_params, ga_params, functions_routes)
+
+
+def exchange_migrants(island, mailbox, island_id, num_migrants, migration_params, num_islands):
+    """Отправляет эмигрантов соседям и принимает все мигранты, уже пришедшие в ящик острова.
+
+    Популяция перед обменом оценивается, эта оценка используется следующим поколением вместо повторной.
+    """
+    min_max_rule = migration_params["min_max_rule"]
+    migrant_policy = migration_params["migrant_policy"]
+
+    island.population_fitness = island.evaluate_fitness(island.population)
+
+    targets = get_migration_targets(migration_params["topology"], num_islands,
+                                    migration_params["neighbours"])[island_id]
+    if targets:
+        indices = select_migrants(migrant_policy, island.population, island.population_fitness, num_migrants,
+                                  min_max_rule)
+        migrants, migrants_fitness = island.population[indices], island.population_fitness[indices]
+        for target in targets:
+            mailbox.send(target, migrants, migrants_fitness)
+
+    parcels = mailbox.receive(island_id)
+    if not parcels:
+        return 0
+
+    migrants = np.concatenate([parcel[0] for parcel in parcels])
+    migrants_fitness = np.concatenate([parcel[1] for parcel in parcels])
+    accept_migrants(island.population, island.population_fitness, migrants, migrants_fitness, num_migrants,
+                    migrant_policy, migration_params["replacement_policy"], min_max_rule)
+    return len(parcels)
+
+
+def run_async_island(island_state, mailbox, num_migrants, additional_params, ga_params, functions_routes):
+    """Прогоняет остров от первого поколения до завершения.
+
+    Каждые migration_interval поколений остров обменивается мигрантами без ожидания соседей и проверяет
+    общий флаг остановки. Флаг ставит остров, на котором сработала функция завершения; остров,
+    дошедший до лимита поколений, других не останавливает.
+    """
+    island = get_worker_island(island_state, additional_params, ga_params, functions_routes)
+    island_state.apply_to(island)
+
+    num_islands = int(ga_params.get("num_islands"))
+    migration_interval = int(ga_params.get("migration_interval"))
+    min_max_rule = (island.selection_kwargs or {}).get("min_max_rule") or "max"
+    migration_params = get_migration_params(ga_params.get("migration_kwargs"), min_max_rule)
+
+    with island_state.random_state():
+        for generation in range(1, island.max_generations + 1):
+            island.generation = generation
+            if island.run_generation():
+                if generation < island.max_generations:
+                    mailbox.stop()
+                break
+
+            if generation % migration_interval == 0:
+                if mailbox.is_stopped():
+                    island.logger.logger_log.info(f"[{island.task_id}] || Island {island_state.island_id} stopped")
+                    break
+                received = exchange_migrants(island, mailbox, island_state.island_id, num_migrants,
+                                             migration_params, num_islands)
+                island.logger.logger_log.info(
+                    f"[{island.task_id}] || Island {island_state.island_id}: generation {generation}, {received = }")
+
+    island.logger.drain()
+    island_state.generation = island.generation
+    island_state.update_from(island)
+    return island_state
+
+
+class AsynchronousGA(IslandGA):
+    def __init__(self, additional_params, ga_params, functions_routes):
         """
-        self.num_islands = num_islands
-        self.population_size = population_size
-        self.max_generations = max_generations
-        self.fitness_function = fitness_function
-        self.crossover_function = crossover_function
-        self.mutation_function = mutation_function
-        self.migration_rate = migration_rate
-        self.mutation_rate = mutation_rate
-        self.crossover_rate = crossover_rate
-
-        # Пользовательские функции
-        self.initialize_population_fn = initialize_population_fn or self.default_initialize_population
-        self.termination_fn = termination_fn
-        self.adaptation_fn = adaptation_fn
-        self.selection_fn = selection_fn or self.default_selection_fn
-
-        # Условия завершения
-        self.fitness_threshold = fitness_threshold
-        self.stagnation_threshold = stagnation_threshold
-        self.stagnation_generations = stagnation_generations
-
-        # Инициализация островов
-        self.islands = [self.initialize_population_fn() for _ in range(self.num_islands)]
-
-    def migrate(self, island_index):
-        """Асинхронная миграция между островами."""
-        with lock:
-            num_migrants = int(self.population_size * self.migration_rate)
-            source_island = self.islands[island_index]
-            target_island = self.islands[(island_index + 1) % self.num_islands]
-            indices = np.random.choice(len(source_island), num_migrants, replace=False)
-            migrants = source_island[indices]
-            target_island[:num_migrants] = migrants
-
-    def evaluate_fitness(self, population):
-        """Оценка фитнеса для каждой хромосомы."""
-        return np.array([self.fitness_function(ind) for ind in population])
-
-    def run_island(self, island_index):
-        """Асинхронный запуск ГА на одном острове."""
-        island = self.islands[island_index]
-        for generation in range(self.max_generations):
-            fitness = self.evaluate_fitness(island)
-            if self.termination_fn and self.termination_fn(generation, fitness):
-                # logger.info(f"Остров {island_index}: Завершение по пользовательской функции.")
-                return island, fitness
-
-            # Селекция, кроссовер и мутация
-            mating_pool = self.selection_fn(island, fitness)
-            offspring = self.crossover_and_mutate(mating_pool)
-
-            # Обновление популяции
-            self.islands[island_index] = offspring
-
-            # Миграция
-            if np.random.rand() < self.migration_rate:
-                self.migrate(island_index)
-
-        return self.islands[island_index]
-
-    def crossover_and_mutate(self, mating_pool):
-        """Кроссовер и мутация."""
-        offspring = []
-        for individual in mating_pool:
-            if np.random.rand() < self.crossover_rate:
-                partner = mating_pool[np.random.randint(len(mating_pool))]
-                child1, child2 = self.crossover_function(individual, partner)
-            else:
-                child1, child2 = individual.copy(), individual.copy()
-
-            if np.random.rand() < self.mutation_rate:
-                child1 = self.mutation_function(child1)
-            if np.random.rand() < self.mutation_rate:
-                child2 = self.mutation_function(child2)
-
-            offspring.extend([child1, child2])
-        return np.array(offspring)
-
-    def run(self):
-        """Запуск асинхронной модели ГА."""
-        tasks = [async_run_island.delay(self, i) for i in range(self.num_islands)]
-        results = [task.get() for task in tasks]
-        return results
+        Острова работают независимо от первого до последнего поколения и обмениваются мигрантами
+        через почтовые ящики, не дожидаясь друг друга.
 
-@shared_task
-def async_run_island(ga_instance, island_index):
-    """Асинхронная задача для запуска ГА на острове."""
-    return ga_instance.run_island(island_index)
+        Режим redis требует не меньше num_islands + 1 свободных процессов воркеров: один занимает координатор,
+        и каждому острову нужен свой процесс. Иначе острова выполняются друг за другом и мигранты
+        не доходят до соседей, которые уже завершились.
+
+        mailbox: Почтовые ящики миграции: redis (острова — отдельные задачи на воркерах)
+            или memory (острова — потоки текущего процесса, только для тестов: потоки делят глобальный
+            генератор numpy и журнал experiment, поэтому запуск не воспроизводим, а текстовый журнал перемешан)
+        island_timeout: Сколько секунд ждать завершения всех островов, по умолчанию ASYNC_ISLAND_TIMEOUT_SECONDS
+        """
+        super().__init__(additional_params, ga_params, functions_routes)
+        self.island_timeout = float(ga_params.get("island_timeout") or ASYNC_ISLAND_TIMEOUT_SECONDS)
+
+        self.mailbox_type = ga_params.get("mailbox") or REDIS_MAILBOX
+        if self.mailbox_type not in (REDIS_MAILBOX, MEMORY_MAILBOX):
+            raise ValueError(f"Unsupported mailbox: {self.mailbox_type}")
+
+    def start_calc(self):
+        self.init_islands()
+        task_id = self.additional_params.get("task_id")
+        mailbox = create_mailbox(self.mailbox_type, task_id, self.num_islands)
+        # Ящики и флаг остановки прошлого, аварийно завершенного запуска той же задачи остановили бы новый
+        mailbox.clear()
+        try:
+            self.islands = self.run_islands(mailbox)
+        finally:
+            mailbox.clear()
+            release_worker_islands(task_id, self.run_id)
+
+        self.generation = max(island.generation for island in self.islands)
+        self.logger.merge_logs(self.num_islands)
+        self.create_result_log()
+
+    def run_islands(self, mailbox):
+        """Запускает все острова сразу и ждет только их окончания, а не каждого поколения."""
+        population_size = len(self.islands[0].population)
+        num_migrants = max(1, int(population_size * self.migration_rate))
+        self.logger.logger_log.info(f"[{self.task_id}] || {num_migrants = }, mailbox = {self.mailbox_type}")
+
+        args = (mailbox, num_migrants, self.additional_params, self.ga_params, self.functions_routes)
+        if self.mailbox_type == MEMORY_MAILBOX:
+            # Только для тестов: потоки делят глобальный генератор numpy и журнал experiment
+            with ThreadPoolExecutor(max_workers=self.num_islands) as pool:
+                return list(pool.map(lambda island: run_async_island(island, *args), self.islands))
+
+        self.check_worker_slots()
+        task_group = group(async_run_island.s(island, *args) for island in self.islands)
+        return task_group.apply_async().get(timeout=self.island_timeout, disable_sync_subtasks=False)
+
+    def check_worker_slots(self):
+        """Предупреждает, если у воркеров меньше num_islands + 1 процессов: острова не будут работать одновременно.
+
+        С одним процессом его занимает координатор и ни один остров не начнется, поэтому запуск прерывается сразу,
+        а не по истечении island_timeout.
+        """
+        stats = app.control.inspect(timeout=1).stats()
+        if not stats:
+            return
+        worker_slots = sum(worker_stats.get("pool", {}).get("max-concurrency", 0) for worker_stats in stats.values())
+        if worker_slots <= 1:
+            raise RuntimeError(f"{worker_slots} worker slots: the coordinator occupies it and no island can start, "
+                               f"at least {self.num_islands + 1} are required")
+        if worker_slots < self.num_islands + 1:
+            self.logger.logger_log.warning(
+                f"[{self.task_id}] || {worker_slots} worker slots for {self.num_islands} islands and the coordinator: "
+                f"islands will run one after another and exchange fewer migrants")
@@ -0,0 +1,120 @@
+import numpy as np
+
+from core.models.evaluation.batch_fitness import is_vectorized
+from core.models.master_worker_model import MasterWorkerGA
+from core.models.migration import get_torus_shape
+
+# Окрестности клетки на торе: 4 соседа по сторонам или 8 с диагоналями
+VON_NEUMANN_NEIGHBOURHOOD = "von_neumann"
+MOORE_NEIGHBOURHOOD = "moore"
+
+NEIGHBOURHOOD_SHIFTS = {
+    VON_NEUMANN_NEIGHBOURHOOD: ((-1, 0), (1, 0), (0, -1), (0, 1)),
+    MOORE_NEIGHBOURHOOD: ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)),
+}
+
+# Выбор партнера в окрестности: лучший сосед или бинарный турнир среди соседей
+BEST_MATE = "best"
+TOURNAMENT_MATE = "tournament"
+
+
+def get_neighbour_indices(rows, cols, neighbourhood):
+    """Индексы соседей каждой клетки (K, rows * cols), построенные сдвигами np.roll сетки индексов."""
+    cells = np.arange(rows * cols).reshape(rows, cols)
+    return np.stack([np.roll(cells, shift, axis=(0, 1)).reshape(-1)
+                     for shift in NEIGHBOURHOOD_SHIFTS[neighbourhood]])
+
+
+class CellularGA(MasterWorkerGA):
+    REQUIRED_PARAMS = [
+        *MasterWorkerGA.REQUIRED_PARAMS
+    ]
+
+    def __init__(self, additional_params, ga_params, functions_routes):
+        """
+        Особи занимают клетки двумерного тора rows x cols и скрещиваются только с соседями.
+        Клетка хранится в строке популяции r * cols + c, поэтому блоки популяции, на которые исполнитель
+        делит оценку фитнеса, — это блоки строк сетки. selection_function не используется:
+        партнер выбирается в окрестности клетки.
+
+        cellular_kwargs: rows (число строк сетки, по умолчанию ближайшее к квадрату),
+            neighbourhood (von_neumann или moore), mate_selection (best или tournament)
+        """
+        super().__init__(additional_params, ga_params, functions_routes)
+
+        cellular_kwargs = ga_params.get("cellular_kwargs") or {}
+        rows = cellular_kwargs.get("rows")
+        if rows:
+            rows = int(rows)
+            if self.population_size % rows:
+                raise ValueError(f"Population size {self.population_size} is not divisible by {rows} rows")
+            self.grid_shape = rows, self.population_size // rows
+        else:
+            self.grid_shape = get_torus_shape(self.population_size)
+
+        self.neighbourhood = cellular_kwargs.get("neighbourhood") or VON_NEUMANN_NEIGHBOURHOOD
+        if self.neighbourhood not in NEIGHBOURHOOD_SHIFTS:
+            raise ValueError(f"Unsupported neighbourhood: {self.neighbourhood}")
+        self.mate_selection = cellular_kwargs.get("mate_selection") or TOURNAMENT_MATE
+        if self.mate_selection not in (BEST_MATE, TOURNAMENT_MATE):
+            raise ValueError(f"Unsupported mate selection: {self.mate_selection}")
+
+        self.min_max_rule = (self.selection_kwargs or {}).get("min_max_rule") or "max"
+        self.neighbour_indices = get_neighbour_indices(*self.grid_shape, self.neighbourhood)
+
+    def is_better(self, fitness, other_fitness):
+        return fitness > other_fitness if self.min_max_rule == "max" else fitness < other_fitness
+
+    def select_mates(self):
+        """Индекс партнера для каждой клетки сразу по всей сетке."""
+        cells = np.arange(self.population_size)
+        if self.mate_selection == BEST_MATE:
+            neighbours_fitness = self.fitness[self.neighbour_indices]
+            if self.min_max_rule == "max":
+                best = np.argmax(neighbours_fitness, axis=0)
+            else:
+                best = np.argmin(neighbours_fitness, axis=0)
+            return self.neighbour_indices[best, cells]
+
+        num_neighbours = len(self.neighbour_indices)
+        first = self.neighbour_indices[np.random.randint(num_neighbours, size=self.population_size), cells]
+        second = self.neighbour_indices[np.random.randint(num_neighbours, size=self.population_size), cells]
+        return np.where(self.is_better(self.fitness[second], self.fitness[first]), second, first)
+
+    def breed(self, parents, mates):
+        """Потомок каждой клетки: кроссовер с партнером и мутация по маскам событий."""
+        population_size = len(parents)
+        offspring = parents.copy()
+
+        crossover_mask = np.random.rand(population_size) < self.crossover_rate
+        mutation_mask = np.random.rand(population_size) < self.mutation_rate
+
+        if is_vectorized(self.crossover_function) and is_vectorized(self.mutation_function):
+            if crossover_mask.any():
+                crossed, _ = self.crossover_function(self, parents[crossover_mask], mates[crossover_mask])
+                offspring = offspring.astype(np.result_type(offspring, crossed), copy=False)
+                offspring[crossover_mask] = crossed
+            if mutation_mask.any():
+                mutated = self.mutation_function(self, offspring[mutation_mask])
+                offspring = offspring.astype(np.result_type(offspring, mutated), copy=False)
+                offspring[mutation_mask] = mutated
+            return offspring
+
+        # Пользовательские функции без пакетного режима вызываются по клеткам
+        children = []
+        for parent, mate, crossover_event, mutation_event in zip(parents, mates, crossover_mask, mutation_mask):
+            child = self.crossover_function(self, parent, mate)[0] if crossover_event else parent.copy()
+            children.append(self.mutation_function(self, child) if mutation_event else child)
+        return np.array(children)
+
+    def crossover_and_mutate(self):
+        """Синхронный шаг сетки: все клетки рождают потомка, потомок занимает клетку, если он не хуже.
+
+        Фитнес новой популяции уже известен и передается следующему поколению через population_fitness.
+        """
+        offspring = self.breed(self.population, self.population[self.select_mates()])
+        offspring_fitness = np.asarray(self.evaluate_fitness(offspring))
+
+        replaced = ~self.is_better(self.fitness, offspring_fitness)
+        self.population_fitness = np.where(replaced, offspring_fitness, self.fitness)
+        return np.where(replaced[:, np.newaxis], offspring, self.population)
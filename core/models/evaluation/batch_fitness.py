@@ -0,0 +1,23 @@
+import numpy as np
+
+
+def is_vectorized(function):
+    """Проверяет, поддерживает ли функция пакетный вызов сразу для всей популяции.
+
+    Функция объявляет поддержку атрибутом ``vectorized = True``.
+    """
+    return bool(getattr(function, "vectorized", False))
+
+
+def evaluate_population(fitness_function, population):
+    """Оценивает фитнес всей популяции.
+
+    Векторизованная функция вызывается один раз для матрицы (N, L),
+    остальные (например, загруженные пользователем) — построчно.
+
+    Returns:
+        np.ndarray: Вектор фитнеса размером (N,).
+    """
+    if is_vectorized(fitness_function):
+        return np.asarray(fitness_function(np.asarray(population)))
+    return np.array([fitness_function(individual) for individual in population])
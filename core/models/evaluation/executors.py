@@ -0,0 +1,325 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from multiprocessing import cpu_count
+from time import perf_counter
+
+import numpy as np
+from billiard import Pool
+from celery import group, shared_task
+
+from core.models.evaluation.batch_fitness import evaluate_population, is_vectorized
+from core.models.evaluation.function_cache import get_function, get_function_route
+from core.models.evaluation.shared_memory import SharedPopulationBuffer, init_shared_worker, evaluate_shared_range
+from modeling_system_backend import settings
+
+# Если оценка всего поколения дешевле этого порога (в секундах), параллелить нет смысла
+SERIAL_COST_THRESHOLD = 0.05
+
+# Размер выборки для замера стоимости невекторизованной фитнес-функции
+CALIBRATION_SAMPLE_SIZE = 8
+
+# Сколько секунд ждать штатного завершения процессов пула, прежде чем остановить их принудительно
+POOL_CLOSE_TIMEOUT = 5
+
+
+@shared_task
+def wrapper_fitness_chunk(fitness_route, chunk):
+    """Оценка фитнеса непрерывного блока популяции (N_chunk, L) на воркере.
+
+    Передается только маршрут функции, сама функция берется из кэша процесса воркера.
+    """
+    fitness_values = evaluate_population(get_function(fitness_route), chunk)
+    return fitness_values
+
+
+def split_population(population, num_chunks):
+    """Делит популяцию на непрерывные блоки строк."""
+    num_chunks = max(1, min(num_chunks, len(population)))
+    return np.array_split(np.asarray(population), num_chunks)
+
+
+def split_ranges(population_size, num_chunks):
+    """Делит индексы популяции на непрерывные диапазоны (offset, length)."""
+    num_chunks = max(1, min(num_chunks, population_size))
+    bounds = np.linspace(0, population_size, num_chunks + 1).astype(int)
+    return [(int(start), int(stop - start)) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def get_auto_pool_size(num_workers):
+    """Размер пула, который может выбрать auto.
+
+    Задача ГА выполняется в одном из CELERY_WORKER_CONCURRENCY процессов воркера, и у каждого может быть свой пул,
+    поэтому пул auto не берет больше своей доли ядер машины.
+    """
+    return max(1, min(num_workers, cpu_count() // max(1, settings.CELERY_WORKER_CONCURRENCY)))
+
+
+def shutdown_pool(pool, timeout=POOL_CLOSE_TIMEOUT):
+    """Закрывает пул billiard: процессы дорабатывают начатые задачи и выходят сами.
+
+    terminate() с последующим join() на пуле billiard иногда зависал, поэтому он вызывается, только если
+    процессы не завершились за timeout. join() у пула без таймаута, поэтому ожидание идет в отдельном потоке.
+    """
+    pool.close()
+    joiner = threading.Thread(target=pool.join, daemon=True)
+    joiner.start()
+    joiner.join(timeout)
+    if joiner.is_alive():
+        pool.terminate()
+        joiner.join(timeout)
+
+
+def get_future_result(future):
+    """Результат завершенной задачи пула потоков или исключение, с которым она завершилась."""
+    return future.exception() or future.result()
+
+
+class FitnessExecutor:
+    """Базовый исполнитель оценки фитнеса.
+
+    Все исполнители имеют общий интерфейс map_fitness(population) -> np.ndarray
+    и живут весь запуск алгоритма, пока не будет вызван close().
+    submit(individuals, callback) запускает оценку небольшого пакета особей без ожидания результата.
+    """
+    name = None
+
+    def __init__(self, fitness_function, num_workers, num_chunks=None, logger=None, segment_prefix=None):
+        self.fitness_function = fitness_function
+        self.num_workers = num_workers
+        self.num_chunks = num_chunks or num_workers
+        self.logger = logger
+        self.segment_prefix = segment_prefix
+
+    def map_fitness(self, population):
+        raise NotImplementedError
+
+    def submit(self, individuals, callback):
+        """Оценивает пакет особей и передает в callback вектор фитнеса или возникшее исключение.
+
+        Базовая реализация оценивает пакет сразу в текущем потоке.
+        """
+        try:
+            fitness_values = evaluate_population(self.fitness_function, individuals)
+        except Exception as error:
+            fitness_values = error
+        callback(fitness_values)
+
+    def close(self):
+        pass
+
+
+
+class SerialExecutor(FitnessExecutor):
+    """Оценка в текущем процессе без межпроцессного взаимодействия."""
+    name = "serial"
+
+    def map_fitness(self, population):
+        return evaluate_population(self.fitness_function, population)
+
+
+class ThreadExecutor(FitnessExecutor):
+    """Оценка блоков популяции в постоянном пуле потоков."""
+    name = "threads"
+
+    def __init__(self, fitness_function, num_workers, num_chunks=None, logger=None, segment_prefix=None):
+        super().__init__(fitness_function, num_workers, num_chunks, logger, segment_prefix)
+        self.pool = ThreadPoolExecutor(max_workers=num_workers)
+
+    def map_fitness(self, population):
+        chunks = split_population(population, self.num_chunks)
+        results = self.pool.map(partial(evaluate_population, self.fitness_function), chunks)
+        return np.concatenate(list(results))
+
+    def submit(self, individuals, callback):
+        future = self.pool.submit(evaluate_population, self.fitness_function, individuals)
+        future.add_done_callback(lambda done: callback(get_future_result(done)))
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+
+class ProcessExecutor(FitnessExecutor):
+    """Оценка блоков популяции в постоянном пуле процессов.
+
+    Используется billiard: в отличие от multiprocessing он позволяет создавать пул внутри воркера Celery.
+    """
+    name = "processes"
+
+    def __init__(self, fitness_function, num_workers, num_chunks=None, logger=None, segment_prefix=None):
+        super().__init__(fitness_function, num_workers, num_chunks, logger, segment_prefix)
+        self.pool = Pool(processes=num_workers)
+
+    def map_fitness(self, population):
+        chunks = split_population(population, self.num_chunks)
+        results = self.pool.map(partial(evaluate_population, self.fitness_function), chunks)
+        return np.concatenate(results)
+
+    def submit(self, individuals, callback):
+        self.pool.apply_async(evaluate_population, (self.fitness_function, individuals), callback=callback,
+                              error_callback=callback)
+
+    def close(self):
+        shutdown_pool(self.pool)
+
+
+class SharedMemoryExecutor(FitnessExecutor):
+    """Оценка в постоянном пуле процессов с популяцией в разделяемой памяти.
+
+    Популяция и вектор фитнеса лежат в блоках multiprocessing.shared_memory, выделенных один раз на запуск.
+    Процессам пула передаются только диапазоны (offset, length), фитнес записывается на место,
+    поэтому матрица популяции не сериализуется ни в одну сторону.
+    """
+    name = "shared_memory"
+
+    def __init__(self, fitness_function, num_workers, num_chunks=None, logger=None, segment_prefix=None):
+        super().__init__(fitness_function, num_workers, num_chunks, logger, segment_prefix)
+        self.buffer = SharedPopulationBuffer(segment_prefix or f"ga_pid{os.getpid()}_{id(self)}_")
+        self.pool = None
+
+    def map_fitness(self, population):
+        population = np.asarray(population)
+        if not self.buffer.fits(population):
+            self.restart_pool(population)
+
+        np.copyto(self.buffer.population, population)
+        self.pool.map(evaluate_shared_range, split_ranges(len(population), self.num_chunks))
+        return self.buffer.fitness.copy()
+
+    def submit(self, individuals, callback):
+        """Небольшие пакеты передаются процессам пула напрямую, минуя разделяемую память."""
+        if self.pool is None:
+            return super().submit(individuals, callback)
+        self.pool.apply_async(evaluate_population, (self.fitness_function, individuals), callback=callback,
+                              error_callback=callback)
+
+    def restart_pool(self, population):
+        """Пересоздает сегменты и пул, если изменилась форма или тип популяции."""
+        self.close_pool()
+        self.buffer.allocate(population.shape, population.dtype)
+        self.pool = Pool(processes=self.num_workers, initializer=init_shared_worker,
+                         initargs=(self.fitness_function, *self.buffer.describe()))
+
+    def close_pool(self):
+        if self.pool is not None:
+            shutdown_pool(self.pool)
+            self.pool = None
+
+    def close(self):
+        self.close_pool()
+        self.buffer.close()
+
+
+class CeleryExecutor(FitnessExecutor):
+    """Оценка блоков популяции задачами Celery на воркерах кластера."""
+    name = "celery"
+
+    def __init__(self, fitness_function, num_workers, num_chunks=None, logger=None, segment_prefix=None):
+        super().__init__(fitness_function, num_workers, num_chunks, logger, segment_prefix)
+        # Потоки, которые ждут результаты задач, отправленных через submit
+        self.waiters = None
+
+    def map_fitness(self, population):
+        chunks = split_population(population, self.num_chunks)
+        fitness_route = get_function_route(self.fitness_function)
+        task_group = group(wrapper_fitness_chunk.s(fitness_route, chunk) for chunk in chunks)
+        results = task_group.apply_async().get(timeout=300, disable_sync_subtasks=False)
+        return np.concatenate(results)
+
+    def submit(self, individuals, callback):
+        if self.waiters is None:
+            self.waiters = ThreadPoolExecutor(max_workers=self.num_workers)
+        result = wrapper_fitness_chunk.delay(get_function_route(self.fitness_function), individuals)
+        future = self.waiters.submit(result.get, timeout=300, disable_sync_subtasks=False)
+        future.add_done_callback(lambda done: callback(get_future_result(done)))
+
+    def close(self):
+        if self.waiters is not None:
+            self.waiters.shutdown(wait=False, cancel_futures=True)
+            self.waiters = None
+
+
+class AutoExecutor(FitnessExecutor):
+    """Выбирает исполнителя по измеренной стоимости оценки на первом поколении.
+
+    Сначала последовательно оценивается выборка (для векторизованной функции — вся популяция).
+    Если поколение обходится дешевле SERIAL_COST_THRESHOLD, остаётся последовательная оценка.
+    Иначе остаток популяции оценивается пулом процессов размера get_auto_pool_size, и для следующих поколений
+    выбирается тот исполнитель, у которого меньше время на одну особь.
+    """
+    name = "auto"
+
+    def __init__(self, fitness_function, num_workers, num_chunks=None, logger=None, segment_prefix=None):
+        super().__init__(fitness_function, num_workers, num_chunks, logger, segment_prefix)
+        self.executor = None
+
+    def map_fitness(self, population):
+        if self.executor is None:
+            return self.calibrate(population)
+        return self.executor.map_fitness(population)
+
+    def submit(self, individuals, callback):
+        if self.executor is None:
+            return super().submit(individuals, callback)
+        self.executor.submit(individuals, callback)
+
+    def calibrate(self, population):
+        population_size = len(population)
+        sample_size = population_size
+        if not is_vectorized(self.fitness_function):
+            sample_size = min(population_size, max(CALIBRATION_SAMPLE_SIZE, self.num_workers))
+
+        start = perf_counter()
+        sample_fitness = evaluate_population(self.fitness_function, population[:sample_size])
+        serial_cost = (perf_counter() - start) / sample_size
+
+        rest = population[sample_size:]
+        serial = SerialExecutor(self.fitness_function, self.num_workers, self.num_chunks)
+        pool_size = get_auto_pool_size(self.num_workers)
+
+        if serial_cost * population_size < SERIAL_COST_THRESHOLD or pool_size < 2 or not len(rest):
+            self.set_executor(serial, serial_cost)
+            if not len(rest):
+                return sample_fitness
+            return np.concatenate((sample_fitness, serial.map_fitness(rest)))
+
+        candidate = ProcessExecutor(self.fitness_function, pool_size, self.num_chunks)
+        start = perf_counter()
+        rest_fitness = candidate.map_fitness(rest)
+        parallel_cost = (perf_counter() - start) / len(rest)
+
+        if parallel_cost < serial_cost:
+            self.set_executor(candidate, parallel_cost)
+        else:
+            candidate.close()
+            self.set_executor(serial, serial_cost)
+        return np.concatenate((sample_fitness, rest_fitness))
+
+    def set_executor(self, executor, cost):
+        self.executor = executor
+        if self.logger:
+            self.logger.info(f"Fitness executor: {executor.name} (measured {cost:.6f} s per individual)")
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.close()
+
+
+EXECUTORS = {
+    SerialExecutor.name: SerialExecutor,
+    ThreadExecutor.name: ThreadExecutor,
+    ProcessExecutor.name: ProcessExecutor,
+    SharedMemoryExecutor.name: SharedMemoryExecutor,
+    CeleryExecutor.name: CeleryExecutor,
+    AutoExecutor.name: AutoExecutor,
+}
+
+
+def create_executor(executor_name, fitness_function, num_workers, num_chunks=None, logger=None,
+                    segment_prefix=None):
+    """Создает исполнителя оценки фитнеса по имени из конфигурации задачи."""
+    executor_class = EXECUTORS.get(executor_name or AutoExecutor.name)
+    if not executor_class:
+        raise ValueError(f"Unsupported executor: {executor_name}")
+    return executor_class(fitness_function, num_workers, num_chunks, logger, segment_prefix)
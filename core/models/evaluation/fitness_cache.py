@@ -0,0 +1,66 @@
+from collections import OrderedDict
+
+import numpy as np
+
+# Примерные накладные расходы на одну запись: узел OrderedDict, объект bytes и float
+ENTRY_OVERHEAD_BYTES = 120
+
+
+class FitnessCache:
+    """LRU-кэш значений фитнеса с ключом по байтам хромосомы.
+
+    Оцениваются только промахи, повторы внутри одного поколения вычисляются один раз.
+    Объем кэша ограничен max_memory_mb, при переполнении вытесняются давно не использованные записи.
+    """
+
+    def __init__(self, max_memory_mb):
+        self.max_bytes = int(float(max_memory_mb) * 1024 * 1024)
+        self.entries = OrderedDict()
+        self.used_bytes = 0
+        self.dtype = None
+
+        self.hits = 0
+        self.misses = 0
+
+    def evaluate(self, population, map_fitness):
+        """Возвращает фитнес популяции, вызывая map_fitness только для хромосом, которых нет в кэше."""
+        population = np.ascontiguousarray(population)
+        if population.dtype != self.dtype:
+            self.clear()
+            self.dtype = population.dtype
+
+        fitness = np.empty(len(population), dtype=float)
+        missed = OrderedDict()
+        for position, individual in enumerate(population):
+            key = individual.tobytes()
+            value = self.entries.get(key)
+            if value is None:
+                missed.setdefault(key, []).append(position)
+                continue
+            self.entries.move_to_end(key)
+            fitness[position] = value
+
+        if missed:
+            first_positions = [positions[0] for positions in missed.values()]
+            missed_fitness = map_fitness(population[first_positions])
+            for (key, positions), value in zip(missed.items(), missed_fitness):
+                fitness[positions] = value
+                self.store(key, float(value))
+
+        self.misses += len(missed)
+        self.hits += len(population) - len(missed)
+        return fitness
+
+    def store(self, key, value):
+        self.entries[key] = value
+        self.used_bytes += len(key) + ENTRY_OVERHEAD_BYTES
+        while self.used_bytes > self.max_bytes and self.entries:
+            evicted_key, _ = self.entries.popitem(last=False)
+            self.used_bytes -= len(evicted_key) + ENTRY_OVERHEAD_BYTES
+
+    def clear(self):
+        self.entries.clear()
+        self.used_bytes = 0
+
+    def get_stats(self):
+        return f"hits = {self.hits}, misses = {self.misses}, entries = {len(self.entries)}"
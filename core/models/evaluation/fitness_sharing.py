@@ -0,0 +1,96 @@
+import logging
+
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+# Предел памяти под один блок матрицы расстояний
+DISTANCE_MEMORY_LIMIT_BYTES = 64 * 1024 * 1024
+
+# KD-дерево выгодно только для больших популяций и небольшой размерности хромосом
+KD_TREE_MIN_POPULATION = 2000
+KD_TREE_MAX_DIMENSIONS = 16
+
+common_logger = logging.getLogger("common")
+
+# Предупреждение об отсутствии scipy выводится один раз на процесс
+_kd_tree_fallback_logged = False
+
+
+def compute_shared_fitness(population, fitness, sigma_share, alpha, memory_limit=DISTANCE_MEMORY_LIMIT_BYTES):
+    """Вычисляет разделенный фитнес f_i / m_i, где m_i = Σ_j sh(d_ij), sh(d) = 1 - (d / σ)^α при d < σ.
+
+    Для больших популяций малой размерности соседи ищутся KD-деревом (если установлен scipy),
+    иначе расстояния считаются блоками строк. В обоих случаях память ограничена memory_limit,
+    полная матрица расстояний N x N никогда не создается.
+    """
+    population = np.asarray(population, dtype=float)
+    fitness = np.asarray(fitness, dtype=float)
+
+    population_size, chrom_length = population.shape
+    use_kd_tree = population_size >= KD_TREE_MIN_POPULATION and chrom_length <= KD_TREE_MAX_DIMENSIONS
+    if use_kd_tree and cKDTree is None:
+        log_kd_tree_fallback()
+        use_kd_tree = False
+    if use_kd_tree:
+        niche_counts = get_niche_counts_kd_tree(population, sigma_share, alpha, memory_limit)
+    else:
+        niche_counts = get_niche_counts_blocked(population, sigma_share, alpha, memory_limit)
+    return fitness / niche_counts
+
+
+def log_kd_tree_fallback():
+    global _kd_tree_fallback_logged
+    if not _kd_tree_fallback_logged:
+        _kd_tree_fallback_logged = True
+        common_logger.warning("scipy не установлен: разделенный фитнес считается блоками без KD-дерева")
+
+
+def get_niche_counts_blocked(population, sigma_share, alpha, memory_limit):
+    """Считает нишевые счетчики по блокам строк матрицы расстояний."""
+    population_size = len(population)
+    squared_norms = np.einsum("ij,ij->i", population, population)
+
+    # На одну строку блока приходится несколько временных массивов длины N
+    block_rows = max(1, memory_limit // (population_size * population.itemsize * 4))
+
+    niche_counts = np.empty(population_size)
+    for start in range(0, population_size, block_rows):
+        block = population[start:start + block_rows]
+        squared_distances = squared_norms[start:start + block_rows, None] + squared_norms[None, :]
+        squared_distances -= 2 * block @ population.T
+        np.maximum(squared_distances, 0, out=squared_distances)
+
+        ratio = np.sqrt(squared_distances) / sigma_share
+        sharing = np.where(ratio < 1, 1 - ratio ** alpha, 0)
+        niche_counts[start:start + block_rows] = sharing.sum(axis=1)
+    return niche_counts
+
+
+def get_niche_counts_kd_tree(population, sigma_share, alpha, memory_limit):
+    """Считает нишевые счетчики через поиск соседей в радиусе σ.
+
+    m_i = |{j: d_ij <= σ}| - Σ_j (d_ij / σ)^α, поэтому достаточно числа соседей и расстояний до них.
+    Блоки строк подбираются по числу соседей так, чтобы список пар помещался в memory_limit.
+    """
+    tree = cKDTree(population)
+    neighbour_counts = tree.query_ball_point(population, sigma_share, return_length=True)
+
+    # Запись о паре в структурированном массиве: два индекса и расстояние
+    max_pairs = max(1, memory_limit // 24)
+
+    niche_counts = neighbour_counts.astype(float)
+    start = 0
+    while start < len(population):
+        block_pairs = np.cumsum(neighbour_counts[start:])
+        stop = start + max(1, int(np.searchsorted(block_pairs, max_pairs, side="right")))
+
+        block_tree = cKDTree(population[start:stop])
+        pairs = block_tree.sparse_distance_matrix(tree, sigma_share, output_type="ndarray")
+        penalty = np.bincount(pairs["i"], weights=(pairs["v"] / sigma_share) ** alpha, minlength=stop - start)
+        niche_counts[start:stop] -= penalty
+        start = stop
+    return niche_counts
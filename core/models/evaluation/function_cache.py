@@ -0,0 +1,69 @@
+import importlib
+import logging
+import os
+import sys
+
+from celery.signals import worker_process_init
+
+from modeling_system_backend.settings import BASE_DIR
+
+common_logger = logging.getLogger("common")
+
+# Кэш процесса: маршрут функции -> (mtime файла модуля, функция) и модуль -> mtime загруженной версии
+_functions_cache = {}
+_modules_mtime = {}
+
+
+def get_module_mtime(module_name):
+    file_path = os.path.join(BASE_DIR, *module_name.split(".")) + ".py"
+    try:
+        return os.stat(file_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def get_function(route):
+    """Возвращает функцию ГА по маршруту 'path.to.module.function'.
+
+    Функция берется из кэша процесса, пока не изменился файл ее модуля; измененный модуль перезагружается,
+    поэтому воркер не продолжает выполнять старую версию перезагруженной пользователем функции.
+    """
+    module_name, function_name = route.rsplit(".", 1)
+    mtime = get_module_mtime(module_name)
+    cached = _functions_cache.get(route)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    module = sys.modules.get(module_name)
+    if module is None:
+        module = importlib.import_module(module_name)
+    elif _modules_mtime.get(module_name, mtime) != mtime:
+        module = importlib.reload(module)
+    _modules_mtime[module_name] = mtime
+
+    function = getattr(module, function_name)
+    _functions_cache[route] = (mtime, function)
+    return function
+
+
+def get_function_route(function):
+    """Маршрут функции уровня модуля, по которому ее можно получить через get_function."""
+    return f"{function.__module__}.{function.__qualname__}"
+
+
+def preload_core_functions():
+    """Импортирует все встроенные функции ГА, чтобы первая задача воркера не тратила время на импорт."""
+    from api.utils.load_custom_funcs.core_function_utils import CORE_FUNCTIONS_FOLDERS
+    from api.utils.load_custom_funcs.load_custom_functions import get_functions_with_import_paths
+
+    for folder in CORE_FUNCTIONS_FOLDERS:
+        for route in get_functions_with_import_paths(folder, persist=False).values():
+            try:
+                get_function(route)
+            except Exception as e:
+                common_logger.error(f"Не удалось загрузить функцию {route}: {e}")
+
+
+@worker_process_init.connect
+def preload_worker_functions(**kwargs):
+    preload_core_functions()
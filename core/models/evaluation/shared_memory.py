@@ -0,0 +1,134 @@
+import os
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from celery.signals import task_revoked
+
+from core.models.evaluation.batch_fitness import evaluate_population
+
+SHARED_MEMORY_ROOT = "/dev/shm"
+SEGMENT_PREFIX = "ga_task"
+
+# Состояние процесса пула: подключенные сегменты и фитнес-функция
+_worker_state = {}
+
+
+def get_task_segment_prefix(task_id):
+    return f"{SEGMENT_PREFIX}{task_id}_"
+
+
+def get_segment_prefix(task_id, process_id):
+    return f"{get_task_segment_prefix(task_id)}p{process_id}_"
+
+
+def unlink_segment(name):
+    try:
+        segment = SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    segment.close()
+    segment.unlink()
+
+
+def cleanup_segments(prefix):
+    """Удаляет все сегменты с заданным префиксом, оставшиеся после остановленной задачи."""
+    if not os.path.isdir(SHARED_MEMORY_ROOT):
+        return
+    for name in os.listdir(SHARED_MEMORY_ROOT):
+        if name.startswith(prefix):
+            unlink_segment(name)
+
+
+@task_revoked.connect
+def cleanup_revoked_task_segments(sender=None, request=None, **kwargs):
+    """Страховка на случай, если процесс задачи был убит до освобождения сегментов."""
+    args = getattr(request, "args", None) or []
+    if not args or not isinstance(args[0], dict):
+        return
+    task_id = args[0].get("task_id")
+    if task_id is not None:
+        cleanup_segments(get_task_segment_prefix(task_id))
+
+
+class SharedPopulationBuffer:
+    """Популяция и вектор фитнеса в блоках разделяемой памяти.
+
+    Блоки выделяются один раз на запуск и пересоздаются только при изменении формы или типа популяции.
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.population_segment = None
+        self.fitness_segment = None
+        self.shape = None
+        self.dtype = None
+        self.population = None
+        self.fitness = None
+
+    @property
+    def population_name(self):
+        return f"{self.prefix}population"
+
+    @property
+    def fitness_name(self):
+        return f"{self.prefix}fitness"
+
+    def fits(self, population):
+        return self.population is not None and population.shape == self.shape and population.dtype == self.dtype
+
+    def allocate(self, shape, dtype):
+        self.close()
+        unlink_segment(self.population_name)
+        unlink_segment(self.fitness_name)
+
+        dtype = np.dtype(dtype)
+        population_size = max(1, int(np.prod(shape)) * dtype.itemsize)
+        fitness_size = max(1, shape[0] * np.dtype(float).itemsize)
+
+        self.population_segment = SharedMemory(name=self.population_name, create=True, size=population_size)
+        self.fitness_segment = SharedMemory(name=self.fitness_name, create=True, size=fitness_size)
+        self.shape = shape
+        self.dtype = dtype
+        self.population = np.ndarray(shape, dtype=dtype, buffer=self.population_segment.buf)
+        self.fitness = np.ndarray((shape[0],), dtype=float, buffer=self.fitness_segment.buf)
+
+    def describe(self):
+        return self.population_name, self.fitness_name, self.shape, self.dtype.str
+
+    def close(self):
+        self.population = None
+        self.fitness = None
+        for segment in (self.population_segment, self.fitness_segment):
+            if segment is None:
+                continue
+            segment.close()
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+        self.population_segment = None
+        self.fitness_segment = None
+
+
+def init_shared_worker(fitness_function, population_name, fitness_name, shape, dtype):
+    """Инициализатор процесса пула: подключает сегменты один раз на время жизни процесса."""
+    population_segment = SharedMemory(name=population_name)
+    fitness_segment = SharedMemory(name=fitness_name)
+    _worker_state.update({
+        "fitness_function": fitness_function,
+        "population_segment": population_segment,
+        "fitness_segment": fitness_segment,
+        "population": np.ndarray(shape, dtype=np.dtype(dtype), buffer=population_segment.buf),
+        "fitness": np.ndarray((shape[0],), dtype=float, buffer=fitness_segment.buf),
+    })
+
+
+def evaluate_shared_range(index_range):
+    """Оценивает строки [offset, offset + length) и пишет фитнес на место в разделяемый вектор."""
+    offset, length = index_range
+    population = _worker_state["population"]
+    fitness = _worker_state["fitness"]
+    fitness_function = _worker_state["fitness_function"]
+
+    fitness[offset:offset + length] = evaluate_population(fitness_function, population[offset:offset + length])
+    return length
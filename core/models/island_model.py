@@ -1,18 +1,24 @@
-import copy
-import random
+import uuid
 from datetime import datetime
 
-import numpy as np
-
 from celery import shared_task, group
 
+from core.models.island_state import IslandState, create_island_rng, run_island_generations, release_worker_islands
+from core.models.migration import migrate_islands, validate_migration_kwargs
 from core.models.mixin_models.ga_mixin_models import GeneticAlgorithmMixin
-from core.models.master_worker_model import MasterWorkerGA
+
+# Режимы запуска островов: синхронизация с координатором каждое поколение или раз в эпоху миграции
+GENERATION_DISPATCH = "generation"
+EPOCH_DISPATCH = "epoch"
+
+# Сколько секунд координатор ждет острова, прежде чем прервать запуск
+ISLAND_TIMEOUT_SECONDS = 300
 
 @shared_task
-def wrapper_run_task(island):
-    terminate_flags = island.run_generation()
-    return island, terminate_flags
+def wrapper_run_task(island_state, stop_generation, additional_params, ga_params, functions_routes, evaluate_last):
+    """Поколения острова до stop_generation. Туда и обратно передается только IslandState."""
+    return run_island_generations(island_state, stop_generation, additional_params, ga_params, functions_routes,
+                                  evaluate_last)
 
 class IslandGA(GeneticAlgorithmMixin):
     REQUIRED_PARAMS = [
@@ -23,11 +29,29 @@ class IslandGA(GeneticAlgorithmMixin):
     ]
 
     def __init__(self, additional_params, ga_params, functions_routes):
+        """
+        num_islands: Количество островов
+        migration_interval: Интервал миграции в поколениях
+        migration_rate: Доля популяции для миграции
+        migration_kwargs: Параметры миграции: topology (ring, bidirectional_ring, torus, fully_connected, random_k),
+            neighbours (для random_k), migrant_policy (best, random, diverse),
+            replacement_policy (worst, random, most_similar), min_max_rule
+        island_dispatch: Запуск островов по одному поколению (generation) или эпохами между миграциями (epoch)
+        island_timeout: Сколько секунд ждать один шаг островов, по умолчанию ISLAND_TIMEOUT_SECONDS
+        """
         super().__init__(additional_params, ga_params, functions_routes)
 
         self.num_islands = int(ga_params.get("num_islands"))
         self.migration_interval = int(ga_params.get("migration_interval"))
         self.migration_rate = float(ga_params.get("migration_rate"))
+        self.migration_kwargs = ga_params.get("migration_kwargs") or {}
+        validate_migration_kwargs(self.migration_kwargs)
+
+        self.island_dispatch = ga_params.get("island_dispatch") or GENERATION_DISPATCH
+        if self.island_dispatch not in (GENERATION_DISPATCH, EPOCH_DISPATCH):
+            raise ValueError(f"Unsupported island dispatch: {self.island_dispatch}")
+
+        self.island_timeout = float(ga_params.get("island_timeout") or ISLAND_TIMEOUT_SECONDS)
 
         self.additional_params = additional_params
         self.ga_params = ga_params
@@ -35,47 +59,58 @@ class IslandGA(GeneticAlgorithmMixin):
 
         self.islands = None
         self.generation = None
+        # Запуск отличает острова в кэшах процессов воркеров от островов прошлых запусков той же задачи
+        self.run_id = None
 
     def migrate(self):
-        """Функция миграции особей между островами."""
-        num_islands = len(self.islands)
-        population_size, chrom_length = self.islands[0].population.shape
+        """Функция миграции особей между островами.
 
-        migrated_populations = [copy.deepcopy(island.population) for island in self.islands]
+        Популяции островов к этому моменту оценены, мигранты записываются на место замещенных особей
+        вместе со своим фитнесом, поэтому размеры островов не меняются и повторная оценка не нужна.
+        """
+        population_size = len(self.islands[0].population)
 
         # Количество мигрирующих особей
         num_migrants = max(1, int(population_size * self.migration_rate))
         self.logger.logger_log.info(f"[{self.task_id}] || {num_migrants = }")
 
-        for num_island in range(num_islands):
-            next_island = (num_island + 1) % num_islands  # Определяем соседний остров
-            population = migrated_populations[num_island]
-
-            # Случайно выбираем индивидов для миграции
-            migrant_indices = random.sample(range(population_size), num_migrants)
+        min_max_rule = (self.selection_kwargs or {}).get("min_max_rule") or "max"
+        migrate_islands([island.population for island in self.islands],
+                        [island.population_fitness for island in self.islands],
+                        num_migrants, self.migration_kwargs, min_max_rule)
 
-            migrants = population[migrant_indices]
+    def start_calc(self):
+        self.init_islands()
+        try:
+            self.run_islands()
+        finally:
+            release_worker_islands(self.additional_params.get("task_id"), self.run_id)
 
-            # Добавляем мигрантов в популяцию соседнего острова
-            self.islands[next_island].population = np.vstack((self.islands[next_island].population, migrants))
+        self.logger.merge_logs(self.num_islands)
+        self.create_result_log()
 
-            # Удаляем мигрантов из текущего острова
-            self.islands[num_island].population = np.delete(self.islands[num_island].population, migrant_indices,
-                                                            axis=0)
+    def run_islands(self):
+        """Запускает острова шагами: по одному поколению или эпохами до следующей миграции.
 
-    def start_calc(self):
-        self.init_islands()
+        В режиме epoch каждый остров проходит migration_interval поколений за одну задачу и встречается
+        с координатором только на миграции, поэтому число обменов сокращается в migration_interval раз.
+        Если один из островов завершился внутри эпохи, остальные доходят до конца этой эпохи.
+        """
+        step = self.migration_interval if self.island_dispatch == EPOCH_DISPATCH else 1
 
-        for generation in range(1, self.max_generations + 1):
-            self.generation = generation
+        for start_generation in range(1, self.max_generations + 1, step):
+            stop_generation = min(start_generation + step - 1, self.max_generations)
+            self.generation = start_generation
 
             for island in self.islands:
-                island.generation = generation
+                island.generation = start_generation
 
-            task_group = group(wrapper_run_task.s(island) for island in self.islands)
+            migration_due = stop_generation % self.migration_interval == 0
+            task_group = group(wrapper_run_task.s(island, stop_generation, self.additional_params, self.ga_params,
+                                                  self.functions_routes, migration_due) for island in self.islands)
 
-            # Запускаем группу задач и ждем их завершения
-            results = task_group.apply().get(timeout=300, disable_sync_subtasks=False)
+            # Острова выполняются параллельно на воркерах, координатор ждет всю группу
+            results = task_group.apply_async().get(timeout=self.island_timeout, disable_sync_subtasks=False)
 
             # Обрабатываем результаты
             terminate_flags = []
@@ -83,34 +118,32 @@ class IslandGA(GeneticAlgorithmMixin):
                 self.islands[idx] = island_result
                 terminate_flags.append(terminate_flag)
 
-            self.logger.merge_logs(self.num_islands)
-
+            self.generation = stop_generation
             self.logger.logger_log.info(f"[{self.task_id}] || {terminate_flags = }")
 
-            is_created_log = self.create_result_log()
-            if is_created_log:
+            if any(island.terminate for island in self.islands):
                 break
 
-            if generation % self.migration_interval == 0:
+            if migration_due:
                 self.logger.logger_log.info(f"c || Migration between islands")
                 self.migrate()
                 self.logger.logger_log.info(f"[{self.task_id}] || Migration success")
 
     def init_islands(self):
         start_time = datetime.now()
+        self.run_id = uuid.uuid4().hex
 
         self.islands = []
         for num_island in range(self.num_islands):
-            island = MasterWorkerGA(self.additional_params, self.ga_params, self.functions_routes)
-            island.logger.set_process_id(num_island)
-            island.population = self.initialize_population_function(self)
-            island.task_id = self.task_id
-            if self.termination_kwargs:
-                island.termination_kwargs["start_time"] = start_time
-            self.islands.append(island)
+            termination_kwargs = dict(self.termination_kwargs) if self.termination_kwargs else self.termination_kwargs
+            if termination_kwargs:
+                termination_kwargs["start_time"] = start_time
+            population = self.initialize_population_function(self)
+            self.islands.append(IslandState(num_island, population, create_island_rng(), self.run_id,
+                                            termination_kwargs))
 
     def create_result_log(self):
         for island in self.islands:
             if island.terminate:
-                island.logger.create_result_log()
+                self.logger.create_result_log(island.island_id)
                 return True
@@ -0,0 +1,163 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+from django.core.cache import cache
+
+from core.models.master_worker_model import MasterWorkerGA
+
+# Сколько островов держит в кэше один процесс воркера
+MAX_WORKER_ISLANDS = 64
+
+# Острова процесса воркера: (id задачи, id запуска, номер острова) -> MasterWorkerGA
+_worker_islands = OrderedDict()
+# В режиме memory острова — потоки одного процесса и обращаются к кэшу одновременно
+_worker_islands_lock = threading.RLock()
+
+# Отметка о завершенном запуске в общем кэше: по ней процессы воркеров закрывают свои острова этого запуска
+FINISHED_RUN_PREFIX = "island_run_finished"
+FINISHED_RUN_TTL = 24 * 60 * 60
+
+
+class IslandState:
+    """Состояние острова, которое передается между процессами вместо экземпляра MasterWorkerGA.
+
+    Содержит только данные поколения: популяцию, фитнес, счетчики завершения и собственный генератор
+    случайных чисел острова. Функции, параметры и логгер острова восстанавливаются на воркере и кэшируются там.
+    """
+
+    def __init__(self, island_id, population, rng, run_id=None, termination_kwargs=None):
+        self.island_id = island_id
+        self.run_id = run_id
+        self.generation = None
+        self.population = population
+        self.fitness = None
+        self.population_fitness = None
+        self.previous_population = None
+        self.previous_fitness = None
+        self.termination_kwargs = termination_kwargs
+        self.rng = rng
+        self.terminate = False
+
+    def apply_to(self, island):
+        island.generation = self.generation
+        island.population = self.population
+        island.fitness = self.fitness
+        island.population_fitness = self.population_fitness
+        island.previous_population = self.previous_population
+        island.previous_fitness = self.previous_fitness
+        island.termination_kwargs = self.termination_kwargs
+        island.terminate = self.terminate
+
+    def update_from(self, island):
+        """Забирает результат поколения. Предыдущая популяция нужна только функциям завершения."""
+        self.population = island.population
+        self.fitness = island.fitness
+        self.population_fitness = island.population_fitness
+        self.previous_population = island.previous_population if island.termination_function else None
+        self.previous_fitness = island.previous_fitness
+        self.termination_kwargs = island.termination_kwargs
+        self.terminate = island.terminate
+
+    @contextmanager
+    def random_state(self):
+        """Функции ГА берут случайные числа из глобального генератора numpy: на время прогона острова
+        он засевается из генератора острова, а затем восстанавливается, и состояние процесса,
+        в котором выполняется прогон, не меняется.
+        """
+        saved_state = np.random.get_state()
+        np.random.seed(self.rng.integers(2 ** 32))
+        try:
+            yield
+        finally:
+            np.random.set_state(saved_state)
+
+
+def create_island_rng():
+    """Отдельный поток случайных чисел для острова, чтобы острова не повторяли выборки друг друга."""
+    return np.random.default_rng(np.random.randint(2 ** 31))
+
+
+def get_finished_run_key(run_id):
+    return f"{FINISHED_RUN_PREFIX}:{run_id}"
+
+
+def release_finished_runs(current_run_id):
+    """Закрывает острова завершенных запусков, оставшиеся в кэше этого процесса.
+
+    Координатор не может освободить кэш в чужих процессах воркеров, поэтому каждый процесс
+    проверяет отметки завершения сам, когда получает следующий остров.
+    """
+    with _worker_islands_lock:
+        run_ids = {key[1] for key in _worker_islands if key[1] != current_run_id}
+    if not run_ids:
+        return
+    finished = cache.get_many([get_finished_run_key(run_id) for run_id in run_ids])
+    with _worker_islands_lock:
+        for key in [key for key in _worker_islands if get_finished_run_key(key[1]) in finished]:
+            close_island(_worker_islands.pop(key))
+
+
+def get_worker_island(island_state, additional_params, ga_params, functions_routes):
+    """Возвращает экземпляр острова из кэша процесса, создавая его при первом обращении.
+
+    Экземпляр подключается к уже идущему запуску: журналы других островов не удаляются.
+    """
+    release_finished_runs(island_state.run_id)
+    key = (additional_params.get("task_id"), island_state.run_id, island_state.island_id)
+    with _worker_islands_lock:
+        island = _worker_islands.get(key)
+        if island is None:
+            island = MasterWorkerGA({**additional_params, "reset_results": False}, ga_params, functions_routes)
+            island.logger.set_process_id(island_state.island_id)
+            island.task_id = additional_params.get("task_id")
+            _worker_islands[key] = island
+            while len(_worker_islands) > MAX_WORKER_ISLANDS:
+                _, evicted_island = _worker_islands.popitem(last=False)
+                close_island(evicted_island)
+        _worker_islands.move_to_end(key)
+    return island
+
+
+def run_island_generations(island_state, stop_generation, additional_params, ga_params, functions_routes,
+                           evaluate_last=False):
+    """Прогоняет поколения острова с island_state.generation по stop_generation включительно.
+
+    Между поколениями остров не обменивается данными с координатором; прогон прерывается,
+    если сработало условие завершения. evaluate_last оценивает итоговую популяцию для миграции,
+    эта оценка используется следующим поколением вместо повторной.
+    """
+    island = get_worker_island(island_state, additional_params, ga_params, functions_routes)
+    island_state.apply_to(island)
+
+    terminate_flag = False
+    with island_state.random_state():
+        for generation in range(island_state.generation, stop_generation + 1):
+            island.generation = generation
+            terminate_flag = island.run_generation()
+            if terminate_flag:
+                break
+
+        if evaluate_last and not terminate_flag:
+            island.population_fitness = island.evaluate_fitness(island.population)
+
+    # Записи поколений должны быть на диске до того, как остров продолжит другой процесс
+    island.logger.drain()
+    island_state.generation = island.generation
+    island_state.update_from(island)
+    return island_state, terminate_flag
+
+
+def close_island(island):
+    island.close_executor()
+    island.logger.close()
+
+
+def release_worker_islands(task_id, run_id=None):
+    """Отмечает запуск завершенным для процессов воркеров и закрывает острова задачи в текущем процессе."""
+    if run_id is not None:
+        cache.set(get_finished_run_key(run_id), True, FINISHED_RUN_TTL)
+    with _worker_islands_lock:
+        for key in [key for key in _worker_islands if key[0] == task_id]:
+            close_island(_worker_islands.pop(key))
@@ -0,0 +1,108 @@
+import pickle
+import queue
+import threading
+
+from redis import Redis
+
+from modeling_system_backend import settings
+
+# Почтовые ящики островов: Redis для островов на разных воркерах, память процесса для островов-потоков
+REDIS_MAILBOX = "redis"
+MEMORY_MAILBOX = "memory"
+
+MAILBOX_PREFIX = "ga_mailbox"
+# Ящики остановленной задачи не должны жить в Redis вечно
+MAILBOX_TTL_SECONDS = 24 * 60 * 60
+
+
+class MemoryMailbox:
+    """Почтовые ящики в памяти процесса. Подходят, когда острова работают потоками одного процесса."""
+
+    def __init__(self, num_islands):
+        self.boxes = [queue.SimpleQueue() for _ in range(num_islands)]
+        self.stopped = threading.Event()
+
+    def send(self, island_id, migrants, migrants_fitness):
+        self.boxes[island_id].put((migrants, migrants_fitness))
+
+    def receive(self, island_id):
+        """Забирает все пришедшие посылки, не дожидаясь новых."""
+        parcels = []
+        while True:
+            try:
+                parcels.append(self.boxes[island_id].get_nowait())
+            except queue.Empty:
+                return parcels
+
+    def stop(self):
+        self.stopped.set()
+
+    def is_stopped(self):
+        return self.stopped.is_set()
+
+    def clear(self):
+        self.stopped.clear()
+        for island_id in range(len(self.boxes)):
+            self.receive(island_id)
+
+
+class RedisMailbox:
+    """Почтовые ящики островов в списках Redis. Передается в задачи Celery без открытого соединения."""
+
+    def __init__(self, task_id, host=None, port=None):
+        self.prefix = f"{MAILBOX_PREFIX}:{task_id}"
+        self.host = host or settings.REDIS_HOST
+        self.port = port or settings.REDIS_PORT
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = Redis(host=self.host, port=self.port)
+        return self._client
+
+    def get_box_key(self, island_id):
+        return f"{self.prefix}:island_{island_id}"
+
+    def get_stop_key(self):
+        return f"{self.prefix}:stop"
+
+    def send(self, island_id, migrants, migrants_fitness):
+        key = self.get_box_key(island_id)
+        pipeline = self.client.pipeline()
+        pipeline.rpush(key, pickle.dumps((migrants, migrants_fitness)))
+        pipeline.expire(key, MAILBOX_TTL_SECONDS)
+        pipeline.execute()
+
+    def receive(self, island_id):
+        """Атомарно забирает и очищает ящик острова, не дожидаясь новых посылок."""
+        key = self.get_box_key(island_id)
+        pipeline = self.client.pipeline()
+        pipeline.lrange(key, 0, -1)
+        pipeline.delete(key)
+        parcels, _ = pipeline.execute()
+        return [pickle.loads(parcel) for parcel in parcels]
+
+    def stop(self):
+        self.client.set(self.get_stop_key(), 1, ex=MAILBOX_TTL_SECONDS)
+
+    def is_stopped(self):
+        return bool(self.client.exists(self.get_stop_key()))
+
+    def clear(self):
+        keys = list(self.client.scan_iter(f"{self.prefix}:*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_client"] = None
+        return state
+
+
+def create_mailbox(mailbox_type, task_id, num_islands):
+    if mailbox_type == MEMORY_MAILBOX:
+        return MemoryMailbox(num_islands)
+    if mailbox_type == REDIS_MAILBOX:
+        return RedisMailbox(task_id)
+    raise ValueError(f"Unsupported mailbox: {mailbox_type}")
@@ -1,15 +1,13 @@
 from datetime import datetime
 
 import numpy as np
-from celery import group, shared_task
 
+from core.models.evaluation.batch_fitness import is_vectorized
 from core.models.mixin_models.ga_mixin_models import GeneticAlgorithmMixin
 
+# Сколько раз пакетная версия перевыбирает второго родителя, совпавшего с первым
+MAX_PARENT_REDRAWS = 10
 
-@shared_task
-def wrapper_fitness_function(fitness_function, individual):
-    fitness_value = fitness_function(individual)
-    return fitness_value
 
 class MasterWorkerGA(GeneticAlgorithmMixin):
     REQUIRED_PARAMS = [
@@ -27,18 +25,13 @@ class MasterWorkerGA(GeneticAlgorithmMixin):
 
         self.fitness = None
         self.previous_fitness = None
+        # Фитнес текущей популяции, если она уже оценена (например, перед миграцией островов)
+        self.population_fitness = None
         self.terminate = False
 
     def evaluate_fitness(self, population):
-        """Оценка фитнеса для каждой хромосомы в популяции с использованием Celery."""
-
-        task_group = group(wrapper_fitness_function.s(self.fitness_function, individual) for individual in population)
-        results = task_group.apply().get(timeout=300, disable_sync_subtasks=False)
-        return np.array(results)
-
-        # with Pool(processes=self.num_workers) as pool:
-        #     fitness_values = pool.map(self.fitness_function, population)
-        # return np.array(fitness_values)
+        """Оценка фитнеса для каждой хромосомы в популяции исполнителем, выбранным в конфигурации задачи."""
+        return self.map_fitness(population)
 
     def check_termination_conditions(self):
         """Проверка условий завершения алгоритма."""
@@ -55,7 +48,10 @@ class MasterWorkerGA(GeneticAlgorithmMixin):
 
     def run_generation(self):
         """Запуск одного поколения алгоритма."""
-        self.fitness = self.evaluate_fitness(self.population)
+        if self.population_fitness is not None:
+            self.fitness, self.population_fitness = self.population_fitness, None
+        else:
+            self.fitness = self.evaluate_fitness(self.population)
         self.log_process(self.task_id, self.generation, self.population, self.fitness)
         if self.check_termination_conditions():
             self.terminate = True
@@ -74,6 +70,10 @@ class MasterWorkerGA(GeneticAlgorithmMixin):
 
     def crossover_and_mutate(self):
         """Проводит кроссовер и мутацию на основе вероятностей событий."""
+        batched_functions = (self.selection_function, self.crossover_function, self.mutation_function)
+        if all(is_vectorized(function) for function in batched_functions):
+            return self.batched_crossover_and_mutate()
+
         offspring = []
         for _ in range(self.population_size // 2):
             parent1 = self.selection_function(self)
@@ -93,6 +93,49 @@ class MasterWorkerGA(GeneticAlgorithmMixin):
             offspring.extend([child1, child2])
         return np.array(offspring)
 
+    def redraw_identical_parents(self, parent_indices, num_pairs):
+        """Перевыбирает второго родителя в парах из одинаковых хромосом, как цикл while в построчной версии.
+
+        Пары перевыбираются пакетом не более MAX_PARENT_REDRAWS раз: в сошедшейся популяции
+        одинаковые родители неизбежны, и построчный цикл в этом случае не завершился бы.
+        """
+        second_parents = parent_indices[num_pairs:]
+        for _ in range(MAX_PARENT_REDRAWS):
+            identical = np.flatnonzero(np.all(self.population[parent_indices[:num_pairs]]
+                                              == self.population[second_parents], axis=1))
+            if not len(identical):
+                return
+            second_parents[identical] = np.asarray(self.selection_function(self, size=len(identical)))
+
+    def batched_crossover_and_mutate(self):
+        """Векторизованный шаг поколения над массивами индексов.
+
+        Селекция возвращает индексы всех родителей за один вызов, кроссовер применяется
+        к матрицам пар (N/2, L) по маске событий кроссовера, мутация — к строкам по маске событий мутации.
+        """
+        num_pairs = self.population_size // 2
+
+        parent_indices = np.array(self.selection_function(self, size=2 * num_pairs))
+        self.redraw_identical_parents(parent_indices, num_pairs)
+        offspring = self.population[parent_indices]
+        children1 = offspring[:num_pairs]
+        children2 = offspring[num_pairs:]
+
+        crossover_mask = np.random.rand(num_pairs) < self.crossover_rate
+        if crossover_mask.any():
+            crossed1, crossed2 = self.crossover_function(self, children1[crossover_mask], children2[crossover_mask])
+            offspring = offspring.astype(np.result_type(offspring, crossed1, crossed2), copy=False)
+            offspring[:num_pairs][crossover_mask] = crossed1
+            offspring[num_pairs:][crossover_mask] = crossed2
+
+        mutation_mask = np.random.rand(len(offspring)) < self.mutation_rate
+        if mutation_mask.any():
+            mutated = self.mutation_function(self, offspring[mutation_mask])
+            offspring = offspring.astype(np.result_type(offspring, mutated), copy=False)
+            offspring[mutation_mask] = mutated
+
+        return offspring
+
     def start_calc(self):
         self.population = self.initialize_population_function(self)
         if self.termination_kwargs:
@@ -100,10 +143,10 @@ class MasterWorkerGA(GeneticAlgorithmMixin):
 
         for generation in range(1, self.max_generations + 1):
             self.generation = generation
-            process = self.logger.get_process_id()
             terminate_flag = self.run_generation()
-            self.logger.merge_logs(process + 1)
             if terminate_flag:
                 break
 
+        process = self.logger.get_process_id()
+        self.logger.merge_logs(process + 1)
         self.logger.create_result_log()
@@ -0,0 +1,183 @@
+import numpy as np
+
+# Топологии связей между островами
+RING_TOPOLOGY = "ring"
+BIDIRECTIONAL_RING_TOPOLOGY = "bidirectional_ring"
+TORUS_TOPOLOGY = "torus"
+FULLY_CONNECTED_TOPOLOGY = "fully_connected"
+RANDOM_K_TOPOLOGY = "random_k"
+
+# Политики выбора мигрантов и замещения особей на принимающем острове
+BEST_MIGRANTS = "best"
+RANDOM_MIGRANTS = "random"
+DIVERSE_MIGRANTS = "diverse"
+
+WORST_REPLACEMENT = "worst"
+RANDOM_REPLACEMENT = "random"
+MOST_SIMILAR_REPLACEMENT = "most_similar"
+
+MIGRATION_TOPOLOGIES = (RING_TOPOLOGY, BIDIRECTIONAL_RING_TOPOLOGY, TORUS_TOPOLOGY, FULLY_CONNECTED_TOPOLOGY,
+                        RANDOM_K_TOPOLOGY)
+MIGRANT_POLICIES = (BEST_MIGRANTS, RANDOM_MIGRANTS, DIVERSE_MIGRANTS)
+REPLACEMENT_POLICIES = (WORST_REPLACEMENT, RANDOM_REPLACEMENT, MOST_SIMILAR_REPLACEMENT)
+
+
+def validate_migration_kwargs(migration_kwargs):
+    """Проверяет параметры миграции до запуска, чтобы ошибка не всплыла только на первой миграции."""
+    for param, allowed in (("topology", MIGRATION_TOPOLOGIES), ("migrant_policy", MIGRANT_POLICIES),
+                           ("replacement_policy", REPLACEMENT_POLICIES)):
+        value = migration_kwargs.get(param)
+        if value and value not in allowed:
+            raise ValueError(f"Unsupported migration {param}: {value}")
+
+
+def get_torus_shape(num_islands):
+    """Решетка rows x cols, максимально близкая к квадратной."""
+    rows = int(np.sqrt(num_islands))
+    while num_islands % rows:
+        rows -= 1
+    return rows, num_islands // rows
+
+
+def get_migration_sources(topology, num_islands, neighbours=1):
+    """Для каждого острова возвращает список островов, от которых он принимает мигрантов."""
+    if topology == RING_TOPOLOGY:
+        sources = [[(island - 1) % num_islands] for island in range(num_islands)]
+    elif topology == BIDIRECTIONAL_RING_TOPOLOGY:
+        sources = [[(island - 1) % num_islands, (island + 1) % num_islands] for island in range(num_islands)]
+    elif topology == TORUS_TOPOLOGY:
+        rows, cols = get_torus_shape(num_islands)
+        sources = []
+        for island in range(num_islands):
+            row, col = divmod(island, cols)
+            sources.append([((row - 1) % rows) * cols + col, ((row + 1) % rows) * cols + col,
+                            row * cols + (col - 1) % cols, row * cols + (col + 1) % cols])
+    elif topology == FULLY_CONNECTED_TOPOLOGY:
+        sources = [list(range(num_islands)) for _ in range(num_islands)]
+    elif topology == RANDOM_K_TOPOLOGY:
+        # Связи выбираются заново на каждой миграции
+        neighbours = max(1, min(int(neighbours), num_islands - 1))
+        sources = []
+        for island in range(num_islands):
+            candidates = np.delete(np.arange(num_islands), island)
+            sources.append(np.random.choice(candidates, neighbours, replace=False).tolist())
+    else:
+        raise ValueError(f"Unsupported migration topology: {topology}")
+
+    # Остров не принимает мигрантов от себя, повторные связи (кольцо из двух островов) убираются
+    return [sorted({source for source in island_sources if source != island})
+            for island, island_sources in enumerate(sources)]
+
+
+def get_best_indices(fitness, count, min_max_rule):
+    order = np.argsort(fitness, kind="stable")
+    return order[:count] if min_max_rule == "min" else order[::-1][:count]
+
+
+def get_distances(individuals, population):
+    """Евклидовы расстояния (для бинарных хромосом — корень из расстояния Хэмминга) между строками."""
+    individuals = np.asarray(individuals, dtype=float)
+    population = np.asarray(population, dtype=float)
+    squared = (np.einsum("ij,ij->i", individuals, individuals)[:, None]
+               + np.einsum("ij,ij->i", population, population)[None, :] - 2 * individuals @ population.T)
+    return np.sqrt(np.maximum(squared, 0))
+
+
+def select_migrants(policy, population, fitness, count, min_max_rule):
+    """Индексы мигрантов: лучшие, случайные или разнообразные (жадный выбор самых удаленных, начиная с лучшей)."""
+    count = min(count, len(population))
+    if policy == BEST_MIGRANTS:
+        return get_best_indices(fitness, count, min_max_rule)
+    if policy == RANDOM_MIGRANTS:
+        return np.random.choice(len(population), count, replace=False)
+    if policy == DIVERSE_MIGRANTS:
+        selected = [get_best_indices(fitness, 1, min_max_rule)[0]]
+        min_distances = get_distances(population[selected], population)[0]
+        while len(selected) < count:
+            min_distances[selected] = -1
+            candidate = int(np.argmax(min_distances))
+            selected.append(candidate)
+            min_distances = np.minimum(min_distances, get_distances(population[[candidate]], population)[0])
+        return np.array(selected)
+    raise ValueError(f"Unsupported migrant policy: {policy}")
+
+
+def select_replaced(policy, population, fitness, migrants, min_max_rule):
+    """Индексы особей принимающего острова, на место которых встают мигранты."""
+    count = len(migrants)
+    if policy == WORST_REPLACEMENT:
+        return get_best_indices(fitness, count, "max" if min_max_rule == "min" else "min")
+    if policy == RANDOM_REPLACEMENT:
+        return np.random.choice(len(population), count, replace=False)
+    if policy == MOST_SIMILAR_REPLACEMENT:
+        # Каждый мигрант замещает ближайшую к нему особь, еще не замещенную другим мигрантом
+        distances = get_distances(migrants, population)
+        replaced = []
+        for migrant_distances in distances:
+            migrant_distances[replaced] = np.inf
+            replaced.append(int(np.argmin(migrant_distances)))
+        return np.array(replaced)
+    raise ValueError(f"Unsupported replacement policy: {policy}")
+
+
+def get_migration_params(migration_kwargs, min_max_rule="max"):
+    """Параметры миграции со значениями по умолчанию: topology, neighbours, migrant_policy, replacement_policy,
+    min_max_rule."""
+    migration_kwargs = migration_kwargs or {}
+    return {
+        "topology": migration_kwargs.get("topology") or RING_TOPOLOGY,
+        "neighbours": migration_kwargs.get("neighbours") or 1,
+        "migrant_policy": migration_kwargs.get("migrant_policy") or RANDOM_MIGRANTS,
+        "replacement_policy": migration_kwargs.get("replacement_policy") or RANDOM_REPLACEMENT,
+        "min_max_rule": migration_kwargs.get("min_max_rule") or min_max_rule,
+    }
+
+
+def get_migration_targets(topology, num_islands, neighbours=1):
+    """Для каждого острова возвращает список островов, которым он отправляет мигрантов."""
+    sources = get_migration_sources(topology, num_islands, neighbours)
+    return [[island for island, island_sources in enumerate(sources) if source in island_sources]
+            for source in range(num_islands)]
+
+
+def accept_migrants(population, fitness, migrants, migrants_fitness, num_migrants, migrant_policy,
+                    replacement_policy, min_max_rule):
+    """Записывает на место замещенных особей не больше num_migrants мигрантов вместе с их фитнесом."""
+    if len(migrants) > num_migrants:
+        accepted = select_migrants(migrant_policy, migrants, migrants_fitness, num_migrants, min_max_rule)
+        migrants, migrants_fitness = migrants[accepted], migrants_fitness[accepted]
+
+    replaced = select_replaced(replacement_policy, population, fitness, migrants, min_max_rule)
+    population[replaced] = migrants
+    fitness[replaced] = migrants_fitness
+
+
+def migrate_islands(populations, fitnesses, num_migrants, migration_kwargs=None, min_max_rule="max"):
+    """Миграция между островами на месте.
+
+    Каждый остров принимает num_migrants особей: мигранты всех его соседей по топологии собираются вместе,
+    и из них по той же политике выбираются num_migrants. Принятые особи и их фитнес записываются
+    в существующие массивы populations и fitnesses вместо замещенных, размеры островов не меняются.
+
+    migration_kwargs: topology, neighbours (для random_k), migrant_policy, replacement_policy, min_max_rule
+    """
+    params = get_migration_params(migration_kwargs, min_max_rule)
+    migrant_policy = params["migrant_policy"]
+    min_max_rule = params["min_max_rule"]
+
+    num_islands = len(populations)
+    sources = get_migration_sources(params["topology"], num_islands, params["neighbours"])
+
+    # Мигранты копируются до записи, чтобы остров не отправил уже принятых особей
+    emigrants = []
+    for population, fitness in zip(populations, fitnesses):
+        indices = select_migrants(migrant_policy, population, fitness, num_migrants, min_max_rule)
+        emigrants.append((population[indices], fitness[indices]))
+
+    for island, island_sources in enumerate(sources):
+        if not island_sources:
+            continue
+        migrants = np.concatenate([emigrants[source][0] for source in island_sources])
+        migrants_fitness = np.concatenate([emigrants[source][1] for source in island_sources])
+        accept_migrants(populations[island], fitnesses[island], migrants, migrants_fitness, num_migrants,
+                        migrant_policy, params["replacement_policy"], min_max_rule)
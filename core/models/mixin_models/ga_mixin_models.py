@@ -1,4 +1,5 @@
-import importlib
+import signal
+import threading
 from datetime import datetime
 import traceback
 from abc import abstractmethod
@@ -7,17 +8,14 @@ from multiprocessing import cpu_count
 import numpy as np
 
 from api.utils.custom_logger import ExperimentLogger
+from core.models.evaluation.executors import create_executor
+from core.models.evaluation.fitness_cache import FitnessCache
+from core.models.evaluation.function_cache import get_function
+from core.models.evaluation.shared_memory import get_segment_prefix
 from task_modeling.models import Task, Experiment
 from task_modeling.utils.set_experiment_status import set_experiment_status
 
 
-def get_function_from_string(path: str):
-    """Импортирует функцию по строковому пути."""
-    module_name, function_name = path.rsplit(".", 1)
-    module = importlib.import_module(module_name)
-    return getattr(module, function_name)
-
-
 class LogResultMixin:
     def log_process(self, task_id, generation, population, fitness):
         (min_fitness, min_fitness_individual,
@@ -52,7 +50,51 @@ class LogResultMixin:
         return average_fitness
 
 
-class GeneticAlgorithmMixin(LogResultMixin):
+class SelectionCacheMixin:
+    """Состояние селекции, которое строится один раз за поколение.
+
+    Фитнес не меняется в пределах поколения, поэтому кумулятивные распределения и ранги кэшируются
+    и сбрасываются при присваивании нового значения self.fitness.
+    """
+
+    @property
+    def fitness(self):
+        return self.__dict__.get("_fitness")
+
+    @fitness.setter
+    def fitness(self, fitness):
+        self._fitness = fitness
+        self.selection_cache = {}
+
+    def get_selection_state(self, key, build):
+        """Возвращает build(self.fitness), вычисленный не более одного раза за поколение."""
+        selection_cache = self.__dict__.setdefault("selection_cache", {})
+        if key not in selection_cache:
+            selection_cache[key] = build(self.fitness)
+        return selection_cache[key]
+
+    def sample_by_weights(self, key, get_weights, size=None):
+        """Выбирает индексы особей пропорционально весам get_weights(fitness).
+
+        Кумулятивное распределение строится один раз за поколение, каждый выбор — бинарный поиск,
+        поэтому выбор N родителей стоит O(N log N). Отрицательные веса, как и в np.random.choice, недопустимы:
+        с ними кумулятивная сумма не монотонна и бинарный поиск вернул бы неверные индексы.
+        """
+        def build_cumulative(fitness):
+            weights = np.asarray(get_weights(fitness), dtype=float)
+            if np.any(weights < 0):
+                raise ValueError("Selection weights must be non-negative")
+            if not weights.sum() > 0:
+                raise ValueError("Selection weights must have a positive sum")
+            return np.cumsum(weights)
+
+        cumulative = self.get_selection_state(key, build_cumulative)
+        draws = np.random.rand(1 if size is None else size) * cumulative[-1]
+        indices = np.minimum(np.searchsorted(cumulative, draws, side="right"), len(cumulative) - 1)
+        return indices[0] if size is None else indices
+
+
+class GeneticAlgorithmMixin(LogResultMixin, SelectionCacheMixin):
     REQUIRED_PARAMS = [
         "algorithm",
         "population_size",
@@ -79,6 +121,12 @@ class GeneticAlgorithmMixin(LogResultMixin):
         crossover_rate: Вероятность кроссовера
 
         num_workers: Количество рабочих процессов для параллельных вычислений
+        executor: Исполнитель оценки фитнеса (auto по умолчанию, serial, threads, processes, shared_memory
+            или celery); auto выбирает исполнителя по замеру стоимости оценки на первом поколении
+        fitness_chunks: Количество блоков, на которые делится популяция при параллельной оценке
+        fitness_cache_size: Объем кэша значений фитнеса в МБ (кэш выключен, если не задан)
+        log_writer: Запись журнала поколений в потоке ГА (sync) или в фоновом потоке (background)
+        log_backpressure: Поведение при заполнении очереди фонового журнала (block или drop_detail)
 
         adaptation_function: Функция адаптации параметров
         adaptation_kwargs: Параметры функции адаптации
@@ -112,6 +160,14 @@ class GeneticAlgorithmMixin(LogResultMixin):
 
         self.num_workers = int(ga_params.get("num_workers")) or cpu_count()
 
+        fitness_chunks = ga_params.get("fitness_chunks")
+        self.fitness_chunks = int(fitness_chunks) if fitness_chunks else self.num_workers
+        self.executor_name = ga_params.get("executor") or "auto"
+        self.executor = None
+
+        fitness_cache_size = ga_params.get("fitness_cache_size")
+        self.fitness_cache = FitnessCache(fitness_cache_size) if fitness_cache_size else None
+
         # Пользовательские функции
         self.adaptation_kwargs = ga_params.get("adaptation_kwargs")
         self.crossover_kwargs = ga_params.get("crossover_kwargs")
@@ -133,17 +189,61 @@ class GeneticAlgorithmMixin(LogResultMixin):
         experiment_name = additional_params.get("experiment_name")
         user_id = additional_params.get("user_id")
         task_id = additional_params.get("task_id")
-        logger = ExperimentLogger(experiment_name, user_id, task_id)
+        logger = ExperimentLogger(experiment_name, user_id, task_id, additional_params.get("reset_results", True))
         logger.set_process_id(0)
+        logger.configure_writer(ga_params.get("log_writer"), ga_params.get("log_backpressure"))
         self.logger = logger
 
         self.task_id = None
 
     def init_class_functions(self, functions_routes):
+        self.functions_routes = functions_routes
         for function_name, function_route in functions_routes.items():
-            ga_function = get_function_from_string(function_route)
+            ga_function = get_function(function_route)
             setattr(self, function_name, ga_function)
 
+    def get_executor(self):
+        """Возвращает исполнителя оценки фитнеса, создавая его один раз на весь запуск."""
+        if self.executor is None:
+            segment_prefix = get_segment_prefix(self.logger.task_id, self.logger.get_process_id())
+            self.executor = create_executor(self.executor_name, self.fitness_function,
+                                            self.num_workers, self.fitness_chunks, self.logger.logger_log,
+                                            segment_prefix)
+        return self.executor
+
+    def map_fitness(self, population):
+        """Оценка фитнеса популяции выбранным исполнителем (через кэш, если он включен)."""
+        executor = self.get_executor()
+        if self.fitness_cache is None:
+            return executor.map_fitness(population)
+
+        fitness = self.fitness_cache.evaluate(population, executor.map_fitness)
+        self.logger.logger_log.info(f"[{self.task_id}/{self.logger.get_process_id()}] || "
+                                    f"Fitness cache: {self.fitness_cache.get_stats()}")
+        return fitness
+
+    def close_executor(self):
+        if self.executor is not None:
+            self.executor.close()
+            self.executor = None
+
+    def __getstate__(self):
+        """В задачи Celery передаются маршруты функций, а не сами функции."""
+        state = self.__dict__.copy()
+        state["executor"] = None
+        for function_name in self.functions_routes:
+            state[function_name] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.init_class_functions(self.functions_routes)
+
+    @staticmethod
+    def stop_on_signal(signum, frame):
+        """Превращает SIGTERM от revoke(terminate=True) в SystemExit, чтобы отработали блоки finally."""
+        raise SystemExit(f"Stopped by signal {signum}")
+
     @abstractmethod
     def start_calc(self):
         pass
@@ -163,13 +263,33 @@ class GeneticAlgorithmMixin(LogResultMixin):
             self.termination_kwargs["start_time"] = start_time
             self.termination_kwargs["stagnation_generation_count"] = 0
 
+        previous_handler = None
+        if threading.current_thread() is threading.main_thread():
+            previous_handler = signal.signal(signal.SIGTERM, self.stop_on_signal)
+
+        stop_signal = None
         try:
             self.start_calc()
+        except SystemExit as stop:
+            # Остановка через revoke: статус и время работы записываются, затем процесс завершается
+            self.logger.logger_log.info(f"[{task_id}] || Algorithm was stopped: {stop}")
+            status = Task.Action.STOPPED
+            stop_signal = stop
         except Exception as error:
             self.logger.logger_log.error(f"[Task id: {task_id}] || Algorithm has {error = }")
             self.logger.logger_log.error(traceback.format_exc())
 
             status = Task.Action.ERROR
+        finally:
+            self.close_executor()
+            try:
+                self.logger.close()
+            except Exception as error:
+                # Ошибка фоновой записи журнала, о которой поток ГА еще не узнал
+                self.logger.logger_log.error(f"[Task id: {task_id}] || Log writer has {error = }")
+                status = Task.Action.ERROR
+            if previous_handler is not None:
+                signal.signal(signal.SIGTERM, previous_handler)
 
         finish_time = datetime.now()
         self.logger.logger_log.info(f"[{task_id}] || finished with status {status}")
@@ -180,6 +300,8 @@ class GeneticAlgorithmMixin(LogResultMixin):
         self.logger.logger_log.debug("")
 
         self.finish(task_id, status)
+        if stop_signal is not None:
+            raise stop_signal
 
     @staticmethod
     def finish(task_id, status):
@@ -0,0 +1,148 @@
+import queue
+from datetime import datetime
+from time import perf_counter
+
+import numpy as np
+
+from core.models.evaluation.batch_fitness import is_vectorized
+from core.models.master_worker_model import MasterWorkerGA
+
+# Политики замещения: худшая особь популяции или проигравший в турнире
+WORST_REPLACEMENT = "worst"
+TOURNAMENT_REPLACEMENT = "tournament"
+
+
+class SteadyStateGA(MasterWorkerGA):
+    REQUIRED_PARAMS = [
+        *MasterWorkerGA.REQUIRED_PARAMS
+    ]
+
+    def __init__(self, additional_params, ga_params, functions_routes):
+        """
+        Потомки рождаются по одному: на исполнителе всегда num_workers оценок, и каждый вернувшийся
+        результат сразу вставляется в популяцию, а освободившийся исполнитель получает нового потомка.
+
+        steady_state_kwargs: replacement (worst или tournament), tournament_size (для tournament),
+            log_interval (число оцененных потомков в одном псевдопоколении журнала, по умолчанию размер популяции)
+        """
+        super().__init__(additional_params, ga_params, functions_routes)
+
+        steady_state_kwargs = ga_params.get("steady_state_kwargs") or {}
+        self.replacement = steady_state_kwargs.get("replacement") or WORST_REPLACEMENT
+        if self.replacement not in (WORST_REPLACEMENT, TOURNAMENT_REPLACEMENT):
+            raise ValueError(f"Unsupported replacement: {self.replacement}")
+        self.replacement_tournament_size = int(steady_state_kwargs.get("tournament_size") or 3)
+        self.log_interval = int(steady_state_kwargs.get("log_interval") or self.population_size)
+
+        self.min_max_rule = (self.selection_kwargs or {}).get("min_max_rule") or "max"
+        # Оцененные потомки задают границы псевдопоколений, вставки — только принятые в популяцию
+        self.evaluations = 0
+        self.insertions = 0
+
+    def breed_child(self):
+        """Один потомок: селекция двух родителей, кроссовер и мутация по вероятностям событий."""
+        batched_functions = (self.selection_function, self.crossover_function, self.mutation_function)
+        if all(is_vectorized(function) for function in batched_functions):
+            parents = self.population[np.asarray(self.selection_function(self, size=2))]
+            parent1, parent2 = parents[:1], parents[1:]
+        else:
+            parent1 = self.selection_function(self)
+            parent2 = self.selection_function(self)
+
+        if np.random.rand() < self.crossover_rate:
+            child, _ = self.crossover_function(self, parent1, parent2)
+        else:
+            child = parent1.copy()
+
+        if np.random.rand() < self.mutation_rate:
+            child = self.mutation_function(self, child)
+        return np.asarray(child).reshape(-1)
+
+    def get_replaced_index(self):
+        if self.replacement == TOURNAMENT_REPLACEMENT:
+            contestants = np.random.choice(self.population_size, self.replacement_tournament_size, replace=False)
+            contestants_fitness = self.fitness[contestants]
+            loser = np.argmax(contestants_fitness) if self.min_max_rule == "min" else np.argmin(contestants_fitness)
+            return contestants[loser]
+        return np.argmax(self.fitness) if self.min_max_rule == "min" else np.argmin(self.fitness)
+
+    def insert_child(self, child, child_fitness):
+        """Вставляет потомка на место замещаемой особи. Худшая особь замещается, только если потомок не хуже.
+
+        Возвращает True, если потомок вставлен.
+        """
+        index = self.get_replaced_index()
+        if self.replacement == WORST_REPLACEMENT:
+            difference = child_fitness - self.fitness[index]
+            if (difference < 0) if self.min_max_rule == "max" else (difference > 0):
+                return False
+
+        # Кэш селекции (кумулятивные веса рулетки и рангов) не перестраивается после каждой вставки,
+        # иначе псевдопоколение стоило бы O(N^2); он обновляется раз в псевдопоколение
+        self.population[index] = child
+        self.fitness[index] = child_fitness
+        return True
+
+    def finish_pseudo_generation(self):
+        """Записывает псевдопоколение из log_interval оцененных потомков и проверяет условия завершения."""
+        self.generation += 1
+        # Присваивание сбрасывает кэш селекции, построенный по фитнесу прошлого псевдопоколения
+        self.fitness = self.fitness
+        self.log_process(self.task_id, self.generation, self.population, self.fitness)
+        if self.check_termination_conditions():
+            self.terminate = True
+            return True
+
+        # Популяция меняется на месте, поэтому функциям завершения нужны копии
+        self.previous_population = self.population.copy()
+        self.previous_fitness = self.fitness.copy()
+        return False
+
+    def start_calc(self):
+        executor = self.get_executor()
+        if self.termination_kwargs:
+            self.termination_kwargs["start_time"] = datetime.now()
+
+        self.population = np.array(self.initialize_population_function(self))
+        self.fitness = np.asarray(self.map_fitness(self.population), dtype=float)
+        self.generation = 0
+        self.previous_population = self.population.copy()
+        self.previous_fitness = self.fitness.copy()
+
+        completed = queue.SimpleQueue()
+        in_flight = 0
+        waiting_time = 0
+        start_time = perf_counter()
+
+        def submit_child():
+            child = self.breed_child()
+            executor.submit(child[np.newaxis], lambda result: completed.put((child, result)))
+
+        for _ in range(self.num_workers):
+            in_flight += 1
+            submit_child()
+
+        while in_flight:
+            wait_start = perf_counter()
+            child, result = completed.get()
+            waiting_time += perf_counter() - wait_start
+            in_flight -= 1
+            if isinstance(result, BaseException):
+                raise result
+
+            self.insertions += self.insert_child(child, np.asarray(result)[0])
+            self.evaluations += 1
+            if self.evaluations % self.log_interval == 0 and self.finish_pseudo_generation():
+                break
+
+            in_flight += 1
+            submit_child()
+
+        elapsed_time = perf_counter() - start_time
+        self.logger.logger_log.info(f"[{self.task_id}] || Steady state: {self.evaluations} evaluations, "
+                                    f"{self.insertions} insertions, {in_flight} evaluations dropped, "
+                                    f"waited for results {waiting_time:.3f} s of {elapsed_time:.3f} s")
+
+        process = self.logger.get_process_id()
+        self.logger.merge_logs(process + 1)
+        self.logger.create_result_log()
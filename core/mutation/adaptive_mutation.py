@@ -10,6 +10,9 @@ def adaptive_mutation(self, chromosome):
     max_generations = self.max_generations
 
     adaptive_rate = mutation_rate * (1 - generation / max_generations)
-    mutation_mask = np.random.rand(len(chromosome)) < adaptive_rate
+    mutation_mask = np.random.rand(*chromosome.shape) < adaptive_rate
     mutated = np.where(mutation_mask, 1 - chromosome, chromosome)
-    return mutated
\ No newline at end of file
+    return mutated
+
+
+adaptive_mutation.vectorized = True
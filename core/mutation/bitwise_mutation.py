@@ -6,7 +6,7 @@ def bitwise_mutation(self, chromosome):
 
     Args:
         self: Ссылка на класс
-        chromosome (np.ndarray): Бинарная хромосома.
+        chromosome (np.ndarray): Бинарная хромосома (L,) или матрица хромосом (N, L).
 
     Returns:
         np.ndarray: Мутировавшая хромосома.
@@ -15,6 +15,9 @@ def bitwise_mutation(self, chromosome):
 
     mutation_rate = self.mutation_rate
 
-    mutation_mask = np.random.rand(len(chromosome)) < mutation_rate
+    mutation_mask = np.random.rand(*chromosome.shape) < mutation_rate
     mutated = np.where(mutation_mask, 1 - chromosome, chromosome)
-    return mutated
\ No newline at end of file
+    return mutated
+
+
+bitwise_mutation.vectorized = True
@@ -12,7 +12,10 @@ def creep_mutation(self, chromosome):
 
     creep_range = float(creep_range) if creep_range else None
 
-    mutation_mask = np.random.rand(len(chromosome)) < mutation_rate
-    creep_values = np.random.uniform(-creep_range, creep_range, size=len(chromosome))
+    mutation_mask = np.random.rand(*chromosome.shape) < mutation_rate
+    creep_values = np.random.uniform(-creep_range, creep_range, size=chromosome.shape)
     mutated = chromosome + mutation_mask * creep_values
-    return mutated
\ No newline at end of file
+    return mutated
+
+
+creep_mutation.vectorized = True
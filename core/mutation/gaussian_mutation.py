@@ -15,7 +15,10 @@ def gaussian_mutation(self, chromosome):
     mean = float(mean) if mean else None
     std = float(std) if std else None
 
-    mutation_mask = np.random.rand(len(chromosome)) < mutation_rate
-    mutations = np.random.normal(mean, std, size=len(chromosome))
+    mutation_mask = np.random.rand(*chromosome.shape) < mutation_rate
+    mutations = np.random.normal(mean, std, size=chromosome.shape)
     mutated = chromosome + mutation_mask * mutations
-    return mutated
\ No newline at end of file
+    return mutated
+
+
+gaussian_mutation.vectorized = True
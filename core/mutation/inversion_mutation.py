@@ -2,9 +2,25 @@ import numpy as np
 
 
 def inversion_mutation(self, chromosome):
-    """Переворачивает случайный подотрезок хромосомы."""
+    """Переворачивает случайный подотрезок хромосомы.
+
+    Для матрицы хромосом (N, L) у каждой строки переворачивается свой подотрезок.
+    """
     _ru_function_name = "Инверсионная мутация"
 
-    start, end = sorted(np.random.choice(len(chromosome), 2, replace=False))
-    chromosome[start:end] = chromosome[start:end][::-1]
-    return chromosome
\ No newline at end of file
+    chrom_length = chromosome.shape[-1]
+    bounds_shape = chromosome.shape[:-1] + (1,)
+
+    # Две различные точки из [0, L): вторая сдвигается, если совпала с первой
+    start = np.random.randint(chrom_length, size=bounds_shape)
+    end = np.random.randint(chrom_length - 1, size=bounds_shape)
+    end = end + (end >= start)
+    start, end = np.minimum(start, end), np.maximum(start, end)
+
+    genes = np.arange(chrom_length)
+    inside = (genes >= start) & (genes < end)
+    source = np.where(inside, start + end - 1 - genes, genes)
+    return np.take_along_axis(chromosome, np.broadcast_to(source, chromosome.shape), axis=-1)
+
+
+inversion_mutation.vectorized = True
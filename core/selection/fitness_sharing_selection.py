@@ -1,28 +1,35 @@
-import numpy as np
+from core.models.evaluation import fitness_sharing
 
-from core.selection.roulette_wheel_selection import roulette_wheel_selection
 
+def fitness_sharing_selection(self, size=None):
+    """Учитывает разнообразие популяции через разделение фитнеса.
 
-def fitness_sharing_selection(self):
-    """Учитывает разнообразие популяции через разделение фитнеса."""
+    Разделенный фитнес вычисляется один раз за поколение, затем родители выбираются рулеткой по нему.
+
+    Args:
+        self
+        size (int, optional): Количество родителей. Если задано, возвращает массив их индексов
+            за один вызов вместо одной хромосомы.
+    """
     _ru_function_name = "Разнообразие популяции через разделение фитнеса"
     _ru_sigma_share = "Порог схожести (σ для фитнес-шейринга)"
     _ru_alpha = "Альфа"
 
     population = self.population
-    fitness = self.fitness
 
     sigma_share = self.selection_kwargs.get("sigma_share")
     alpha = self.selection_kwargs.get("alpha")
 
     sigma_share = float(sigma_share) if sigma_share else None
-    alpha = float(alpha) if alpha else None
-
-    shared_fitness = np.copy(fitness)
-    for i in range(len(population)):
-        for j in range(len(population)):
-            if i != j:
-                dist = np.linalg.norm(population[i] - population[j])
-                if dist < sigma_share:
-                    shared_fitness[i] *= (1 - (dist / sigma_share) ** alpha)
-    return roulette_wheel_selection(population, shared_fitness)
\ No newline at end of file
+    alpha = float(alpha) if alpha else 1.0
+
+    def get_shared_fitness(fitness):
+        return fitness_sharing.compute_shared_fitness(population, fitness, sigma_share, alpha)
+
+    chosen = self.sample_by_weights("fitness_sharing_selection", get_shared_fitness, size)
+    if size is not None:
+        return chosen
+    return population[chosen]
+
+
+fitness_sharing_selection.vectorized = True
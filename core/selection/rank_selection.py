@@ -1,14 +1,24 @@
 import numpy as np
 
 
-def rank_selection(self):
-    """Выполняет ранговую селекцию."""
+def rank_selection(self, size=None):
+    """Выполняет ранговую селекцию.
+
+    Ранги и их кумулятивное распределение вычисляются один раз за поколение (см. sample_by_weights).
+
+    Args:
+        self
+        size (int, optional): Количество родителей. Если задано, возвращает массив их индексов
+            за один вызов вместо одной хромосомы.
+    """
     _ru_function_name = "Ранговая селекция"
 
     population = self.population
-    fitness = self.fitness
 
-    ranks = np.argsort(np.argsort(fitness))
-    selection_probs = ranks / np.sum(ranks)
-    chosen_index = np.random.choice(len(population), p=selection_probs)
-    return population[chosen_index]
\ No newline at end of file
+    chosen = self.sample_by_weights("rank_selection", lambda fitness: np.argsort(np.argsort(fitness)), size)
+    if size is not None:
+        return chosen
+    return population[chosen]
+
+
+rank_selection.vectorized = True
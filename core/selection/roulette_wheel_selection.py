@@ -1,14 +1,21 @@
-import numpy as np
+def roulette_wheel_selection(self, size=None):
+    """Выполняет селекцию методом рулетки.
 
+    Кумулятивное распределение вероятностей строится один раз за поколение (см. sample_by_weights).
 
-def roulette_wheel_selection(self):
-    """Выполняет селекцию методом рулетки."""
+    Args:
+        self
+        size (int, optional): Количество родителей. Если задано, возвращает массив их индексов
+            за один вызов вместо одной хромосомы.
+    """
     _ru_function_name = "Селекция рулеткой"
 
     population = self.population
-    fitness = self.fitness
 
-    fitness_sum = np.sum(fitness)
-    selection_probs = fitness / fitness_sum
-    chosen_index = np.random.choice(len(population), p=selection_probs)
-    return population[chosen_index]
\ No newline at end of file
+    chosen = self.sample_by_weights("roulette_wheel_selection", lambda fitness: fitness, size)
+    if size is not None:
+        return chosen
+    return population[chosen]
+
+
+roulette_wheel_selection.vectorized = True
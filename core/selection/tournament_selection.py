@@ -1,14 +1,16 @@
 import numpy as np
 
 
-def tournament_selection(self):
+def tournament_selection(self, size=None):
     """Выполняет турнирную селекцию.
 
     Args:
         self
+        size (int, optional): Количество родителей. Если задано, проводится size турниров сразу
+            (участники каждого турнира выбираются с возвращением) и возвращается массив индексов победителей.
 
     Returns:
-        np.ndarray: Выбранная хромосома.
+        np.ndarray: Выбранная хромосома или индексы выбранных хромосом.
     """
     _ru_function_name = "Турнирная селекция"
     _ru_tournament_size = "Размер турнира"
@@ -22,9 +24,21 @@ def tournament_selection(self):
 
     tournament_size = int(tournament_size) if tournament_size else None
 
+    if size is not None:
+        contestants = np.random.randint(len(population), size=(size, tournament_size))
+        contestants_fitness = fitness[contestants]
+        if min_max_rule == "min":
+            winners = np.argmin(contestants_fitness, axis=1)
+        else:
+            winners = np.argmax(contestants_fitness, axis=1)
+        return contestants[np.arange(size), winners]
+
     selected = np.random.choice(len(population), tournament_size, replace=False)
     if  min_max_rule == "min":
         index = selected[np.argmin(fitness[selected])]
     else:
         index = selected[np.argmax(fitness[selected])]
-    return population[index]
\ No newline at end of file
+    return population[index]
+
+
+tournament_selection.vectorized = True
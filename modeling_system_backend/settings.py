@@ -214,6 +214,16 @@ CELERY_RESULT_SERIALIZER = "pickle"
 CELERYD_POOL = "prefork"
 CELERY_DISABLE_SYNC_SUBTASKS = False
 
+# Модули с задачами импортируются только воркером: веб-процесс загружает модели ГА лениво
+CELERY_IMPORTS = (
+    "core.models.evaluation.function_cache",
+    "core.models.evaluation.executors",
+    "core.models.island_model",
+    "core.models.asynchronous_model",
+    "task_modeling.utils.start_task",
+    "task_modeling.utils.export_task",
+)
+
 EMAIL_BACKEND = os.environ.get("EMAIL_BACKEND")
 EMAIL_HOST = os.environ.get("EMAIL_HOST")
 EMAIL_PORT = os.environ.get("EMAIL_PORT")
@@ -0,0 +1,72 @@
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Тяжелые модули, которые не должны загружаться при старте веб-процесса и воркера
+HEAVY_MODULES = (
+    "matplotlib",
+    "xhtml2pdf",
+    "reportlab",
+    "redis.asyncio",
+    "core.models.master_worker_model",
+    "core.models.island_model",
+    "core.models.asynchronous_model",
+    "core.models.steady_state_model",
+    "core.models.cellular_model",
+)
+
+# Замер выполняется в отдельном интерпретаторе, чтобы уже загруженные модули не искажали время
+PROBE_SCRIPT = """
+import importlib
+import json
+import sys
+import time
+
+started = time.perf_counter()
+import django
+django.setup()
+timings = {"django.setup": time.perf_counter() - started}
+
+for module in sys.argv[2:]:
+    module_started = time.perf_counter()
+    importlib.import_module(module)
+    timings[module] = time.perf_counter() - module_started
+timings["total"] = time.perf_counter() - started
+
+heavy_modules = json.loads(sys.argv[1])
+print(json.dumps({"timings": timings, "loaded": [module for module in heavy_modules if module in sys.modules]}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Измеряет время холодного старта: django.setup, URLconf и приложение Celery"
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=3, help="Число запусков, берется лучшее время")
+        parser.add_argument("modules", nargs="*", help="Модули для импорта после django.setup")
+
+    def handle(self, *args, **options):
+        modules = options["modules"] or [settings.ROOT_URLCONF, "modeling_system_backend.celery"]
+
+        runs = [self.run_probe(modules) for _ in range(max(1, options["repeat"]))]
+        for step in runs[0]["timings"]:
+            best_time = min(run["timings"][step] for run in runs)
+            self.stdout.write(f"{step:<40} {best_time * 1000:8.1f} ms")
+
+        loaded = runs[0]["loaded"]
+        if loaded:
+            self.stdout.write(self.style.WARNING(f"Загружены при старте: {', '.join(loaded)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Тяжелые модули при старте не загружаются"))
+
+    @staticmethod
+    def run_probe(modules):
+        completed = subprocess.run(
+            [sys.executable, "-c", PROBE_SCRIPT, json.dumps(HEAVY_MODULES), *modules],
+            capture_output=True, text=True, check=True, cwd=settings.BASE_DIR
+        )
+        return json.loads(completed.stdout.strip().splitlines()[-1])
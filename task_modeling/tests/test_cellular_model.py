@@ -0,0 +1,29 @@
+import numpy as np
+
+from api.utils import custom_logger
+from api.utils.custom_logger import load_results
+from core.models.cellular_model import CellularGA, get_neighbour_indices
+from task_modeling.tests.test_data.data_for_testing import TEST_GA_PARAMS, get_results_folder, run_ga_model
+
+CELLULAR_GA_PARAMS = {
+    **TEST_GA_PARAMS, "population_size": 24, "max_generations": 6,
+    "cellular_kwargs": {"rows": 4, "neighbourhood": "moore"},
+}
+
+
+def test_neighbour_indices_wrap_around_torus():
+    neighbours = get_neighbour_indices(3, 4, "von_neumann")
+    assert neighbours.shape == (4, 12)
+    # Клетка (0, 0): соседи сверху (2, 0), снизу (1, 0), слева (0, 3) и справа (0, 1)
+    assert sorted(neighbours[:, 0].tolist()) == [1, 3, 4, 8]
+    assert get_neighbour_indices(3, 4, "moore").shape == (8, 12)
+
+
+def test_cellular_replacement_never_worsens_cells(tmp_path, monkeypatch):
+    monkeypatch.setattr(custom_logger, "RESULT_ROOT", str(tmp_path))
+    ga = run_ga_model(CellularGA, CELLULAR_GA_PARAMS, 15)
+
+    assert ga.grid_shape == (4, 6) and ga.population.shape == (24, 16)
+    generations = load_results(get_results_folder(tmp_path, 15))["process_0"]
+    assert generations["generation"].tolist() == [1, 2, 3, 4, 5, 6]
+    assert np.all(np.diff(generations["avg_fitness"]) <= 1e-9)
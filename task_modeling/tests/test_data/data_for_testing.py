@@ -1,3 +1,5 @@
+import os
+
 TEST_TASK_CONFIG = {
     "name": "test_config",
     "config": {
@@ -39,3 +41,37 @@ TEST_EXPERIMENT = {
         }
     ]
 }
+
+TEST_FUNCTIONS_ROUTES = {
+    "crossover_function": "core.crossover.single_point_crossover.single_point_crossover",
+    "fitness_function": "core.fitness.rastrigin_fitness.rastrigin_fitness",
+    "initialize_population_function": "core.init_population.random_init.random_init",
+    "mutation_function": "core.mutation.bitwise_mutation.bitwise_mutation",
+    "selection_function": "core.selection.tournament_selection.tournament_selection",
+}
+
+TEST_GA_PARAMS = {
+    "population_size": 40, "max_generations": 10, "mutation_rate": 0.1, "crossover_rate": 0.9,
+    "num_workers": 1, "executor": "serial", "initialize_population_kwargs": {"chrom_length": 16},
+    "selection_kwargs": {"tournament_size": 3, "min_max_rule": "min"}, "crossover_kwargs": {},
+    "mutation_kwargs": {}, "fitness_kwargs": {}, "termination_kwargs": {},
+}
+
+
+def get_additional_params(task_id):
+    return {"experiment_name": "experiment", "user_id": 1, "task_id": task_id}
+
+
+def get_results_folder(result_root, task_id):
+    return os.path.join(str(result_root), "user_id-1", "experiment", f"task_id-{task_id}")
+
+
+def run_ga_model(model_class, ga_params, task_id):
+    """Прогоняет модель с тестовыми функциями и закрывает ее исполнитель и журнал."""
+    ga = model_class(get_additional_params(task_id), ga_params, TEST_FUNCTIONS_ROUTES)
+    try:
+        ga.start_calc()
+    finally:
+        ga.close_executor()
+        ga.logger.close()
+    return ga
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from api.utils import custom_logger
+from core.models.evaluation import executors
+from core.models.master_worker_model import MasterWorkerGA
+from task_modeling.models import Task
+from task_modeling.tests.test_data.data_for_testing import TEST_FUNCTIONS_ROUTES, TEST_GA_PARAMS, \
+    get_additional_params, run_ga_model
+
+
+def run_with_executor(executor, task_id):
+    np.random.seed(7)
+    ga_params = {**TEST_GA_PARAMS, "max_generations": 5, "num_workers": 2, "executor": executor}
+    return run_ga_model(MasterWorkerGA, ga_params, task_id)
+
+
+@pytest.mark.parametrize("executor", ["threads", "processes", "shared_memory", "auto"])
+def test_parallel_executors_match_serial(executor, tmp_path, monkeypatch):
+    monkeypatch.setattr(custom_logger, "RESULT_ROOT", str(tmp_path))
+    # Нулевой порог заставляет auto откалибровать пул процессов даже на дешевой фитнес-функции
+    monkeypatch.setattr(executors, "SERIAL_COST_THRESHOLD", 0)
+    monkeypatch.setattr(executors, "cpu_count", lambda: 8)
+
+    serial = run_with_executor("serial", 21)
+    parallel = run_with_executor(executor, 22)
+
+    assert np.array_equal(parallel.population, serial.population)
+    assert np.array_equal(parallel.fitness, serial.fitness)
+
+
+def test_executor_defaults_to_auto():
+    assert isinstance(executors.create_executor(None, len, 2), executors.AutoExecutor)
+
+
+def test_auto_pool_takes_its_share_of_cores(monkeypatch):
+    monkeypatch.setattr(executors, "cpu_count", lambda: 8)
+    monkeypatch.setattr(executors.settings, "CELERY_WORKER_CONCURRENCY", 4)
+    assert executors.get_auto_pool_size(16) == 2
+    assert executors.get_auto_pool_size(1) == 1
+    monkeypatch.setattr(executors.settings, "CELERY_WORKER_CONCURRENCY", 16)
+    assert executors.get_auto_pool_size(16) == 1
+
+
+class RevokedGA(MasterWorkerGA):
+    def start_calc(self):
+        self.map_fitness(self.initialize_population_function(self))
+        self.stop_on_signal(15, None)
+
+
+def test_revoked_run_records_stopped_status(tmp_path, monkeypatch):
+    monkeypatch.setattr(custom_logger, "RESULT_ROOT", str(tmp_path))
+    finished = []
+    monkeypatch.setattr(RevokedGA, "finish", staticmethod(lambda task_id, status: finished.append((task_id, status))))
+
+    ga = RevokedGA(get_additional_params(23), {**TEST_GA_PARAMS, "executor": "threads"}, TEST_FUNCTIONS_ROUTES)
+    # SIGTERM от revoke не перехватывается как ошибка: статус записан, процесс все равно завершается
+    with pytest.raises(SystemExit):
+        ga.run(23, {})
+    assert finished == [(23, Task.Action.STOPPED)]
+    assert ga.executor is None
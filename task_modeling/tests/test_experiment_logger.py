@@ -0,0 +1,70 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from api.utils import custom_logger
+from api.utils.custom_logger import ExperimentLogger, load_json_log, load_results, ALL_JSON_RESULTS_FILE_NAME, \
+    RESULT_KEY, BACKGROUND_LOG_WRITER, BACKPRESSURE_DROP_DETAIL, BackgroundLogWriter
+
+
+def test_generation_log_is_appended_and_merged(tmp_path, monkeypatch):
+    monkeypatch.setattr(custom_logger, "RESULT_ROOT", str(tmp_path))
+    logger = ExperimentLogger("experiment", 1, 1)
+    logger.set_process_id(0)
+
+    for generation in range(1, 4):
+        logger.log(1, generation, 0.5, [0], 2.5, [1], 1.5)
+        # Копия логгера передается между процессами без открытого файла
+        logger = pickle.loads(pickle.dumps(logger))
+
+    results_folder = os.path.dirname(logger.log_file_json)
+    assert not os.path.exists(os.path.join(results_folder, ALL_JSON_RESULTS_FILE_NAME))
+
+    # Для незавершенной задачи сводный журнал собирается по запросу
+    result_dict = load_json_log(results_folder)
+    assert [entry["generation"] for entry in result_dict["process_0"]] == [1, 2, 3]
+
+    logger.merge_logs(1)
+    logger.create_result_log()
+    result_dict = load_json_log(results_folder)
+    assert result_dict[RESULT_KEY] == result_dict["process_0"]
+
+    results = load_results(results_folder, process_keys=[RESULT_KEY], start_generation=2)
+    assert list(results) == [RESULT_KEY]
+    assert results[RESULT_KEY]["generation"].tolist() == [2, 3]
+
+
+def test_background_writer_drains_all_generations(tmp_path, monkeypatch):
+    monkeypatch.setattr(custom_logger, "RESULT_ROOT", str(tmp_path))
+    logger = ExperimentLogger("experiment", 1, 2)
+    logger.set_process_id(0)
+    logger.configure_writer(BACKGROUND_LOG_WRITER, BACKPRESSURE_DROP_DETAIL, queue_size=4)
+
+    individual = np.zeros(5)
+    for generation in range(1, 501):
+        logger.log(2, generation, 0.5, individual, 2.5, individual, 1.5)
+    logger.merge_logs(1)
+
+    result_dict = load_json_log(os.path.dirname(logger.log_file_json))
+    assert [entry["generation"] for entry in result_dict["process_0"]] == list(range(1, 501))
+    logger.close()
+
+
+def test_background_writer_error_reaches_ga_thread():
+    def fail(records):
+        raise OSError("disk full")
+
+    # Очередь на одну запись: без проверки ошибки submit ждал бы места вечно
+    writer = BackgroundLogWriter(fail, queue_size=1)
+    with pytest.raises(OSError):
+        for generation in range(100):
+            writer.submit({"generation": generation})
+    writer.close()
+    assert not writer.thread.is_alive()
+
+    writer = BackgroundLogWriter(fail, queue_size=1)
+    writer.submit({"generation": 1})
+    with pytest.raises(OSError):
+        writer.close()
@@ -0,0 +1,36 @@
+import json
+
+import numpy as np
+
+from api.utils.export_results import lttb_indices, stream_results_csv, stream_results_json
+from api.utils.result_store import entries_to_columns
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    x = np.arange(100000)
+    y = np.sin(x / 5000)
+    y[31337] = 50
+    y[77777] = -50
+
+    indices = lttb_indices(x, y, 500)
+
+    assert len(indices) == 500
+    assert indices[0] == 0 and indices[-1] == len(x) - 1
+    assert np.all(np.diff(indices) > 0)
+    assert {31337, 77777} <= set(indices.tolist())
+    assert lttb_indices(x[:10], y[:10], 500).tolist() == list(range(10))
+
+
+def test_stream_results_in_chunks(monkeypatch):
+    monkeypatch.setattr("api.utils.export_results.STREAM_CHUNK_ROWS", 3)
+    entries = [{"generation": generation, "min_fitness": 1.0, "max_fitness": 2.0, "avg_fitness": 1.5,
+                "timestamp": "2024-01-01T00:00:00"} for generation in range(1, 8)]
+    results = {"process_0": entries_to_columns(entries), "results": entries_to_columns(entries[:2])}
+
+    csv_chunks = list(stream_results_csv(results))
+    csv_lines = "".join(csv_chunks).splitlines()
+    assert len(csv_chunks) > 2
+    assert len(csv_lines) == 1 + 7 + 2
+    assert csv_lines[1].startswith("process_0,1,")
+
+    assert json.loads("".join(stream_results_json(results))) == {"process_0": entries, "results": entries[:2]}
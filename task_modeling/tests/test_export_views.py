@@ -0,0 +1,165 @@
+import os
+
+import pytest
+from django.test import RequestFactory, override_settings
+from rest_framework.request import Request
+
+from api.utils import custom_logger
+from api.utils.custom_logger import ExperimentLogger
+from api.utils.export_results import EXPORT_FILE_NAMES, FINAL_RESULT_PNG, build_export_artifact
+from task_modeling.tests.test_data.data_for_testing import get_results_folder
+from task_modeling.utils.export_task import get_export_job_path_key
+from task_modeling.views.task_views import task_views
+
+TASK_ID = 31
+
+
+class Stub:
+    pass
+
+
+@pytest.fixture
+def results_folder(tmp_path, monkeypatch):
+    """Результаты задачи из 10 поколений одного процесса в отдельном RESULT_ROOT"""
+    monkeypatch.setattr(custom_logger, "RESULT_ROOT", str(tmp_path))
+    monkeypatch.setattr(task_views, "RESULT_ROOT", str(tmp_path))
+
+    logger = ExperimentLogger("experiment", 1, TASK_ID)
+    logger.set_process_id(0)
+    for generation in range(1, 11):
+        logger.log(TASK_ID, generation, 0.5, [0, 1], 2.5, [1, 1], 1.5)
+    logger.merge_logs(1)
+    logger.create_result_log(0)
+    logger.close()
+    return get_results_folder(tmp_path, TASK_ID)
+
+
+def call_view(view_class, query, headers=None, **kwargs):
+    """Вызывает представление выгрузки без базы данных: задача и пользователь подставляются заглушками"""
+    task = Stub()
+    task.id = TASK_ID
+    task.experiment = Stub()
+    task.experiment.name = "experiment"
+    user = Stub()
+    user.id = 1
+
+    request = Request(RequestFactory().get("/export_result", query, **(headers or {})))
+    request._user = user
+    view = view_class()
+    view.request = request
+    view.kwargs = kwargs
+    view.get_object = lambda: task
+    return view.get(request)
+
+
+def close_file(response):
+    """Закрывает отданный файл, не вызывая response.close(): тот шлет request_finished, закрывающий соединения с БД"""
+    response.file_to_stream.close()
+
+
+def test_export_etag_and_not_modified(results_folder):
+    response = call_view(task_views.ExportResult, {"csv_all_results": "true"})
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert b"".join(response.streaming_content).startswith(b"Process,Generation,")
+
+    not_modified = call_view(task_views.ExportResult, {"csv_all_results": "true"}, {"HTTP_IF_NONE_MATCH": etag})
+    assert not_modified.status_code == 304
+
+
+def test_export_artifact_is_reused_until_results_change(results_folder):
+    artifact_path = os.path.join(results_folder, EXPORT_FILE_NAMES[FINAL_RESULT_PNG])
+
+    response = call_view(task_views.ExportResult, {FINAL_RESULT_PNG: "true"})
+    close_file(response)
+    etag = response.headers["ETag"]
+    built_mtime = os.stat(artifact_path).st_mtime_ns
+
+    response = call_view(task_views.ExportResult, {FINAL_RESULT_PNG: "true"})
+    close_file(response)
+    assert response.headers["ETag"] == etag
+    assert os.stat(artifact_path).st_mtime_ns == built_mtime
+
+    # Изменение источников результатов меняет отпечаток: выгрузка строится заново, ETag клиента устаревает
+    meta_path = custom_logger.get_results_source_paths(results_folder)[-1]
+    os.utime(meta_path, ns=(built_mtime + 10 ** 9, built_mtime + 10 ** 9))
+    response = call_view(task_views.ExportResult, {FINAL_RESULT_PNG: "true"}, {"HTTP_IF_NONE_MATCH": etag})
+    close_file(response)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert os.stat(artifact_path).st_mtime_ns != built_mtime
+
+
+class StubAsyncResult:
+    """Состояния фоновых заданий выгрузки по id вместо брокера Celery"""
+    jobs = {}
+
+    def __init__(self, job_id, app=None):
+        self.state, self.info = self.jobs.get(job_id, ("PENDING", None))
+        self.result = self.info
+
+
+@pytest.fixture
+def export_jobs(results_folder, monkeypatch):
+    """Любая тяжелая выгрузка уходит в фон; постановка заданий записывается, а не отправляется брокеру"""
+    enqueued = []
+    monkeypatch.setattr(task_views, "SYNC_EXPORT_MAX_RECORDS", 0)
+    monkeypatch.setattr(task_views, "AsyncResult", StubAsyncResult)
+    monkeypatch.setattr(task_views.wrapper_export_result, "apply_async",
+                        lambda args, task_id: enqueued.append((args, task_id)))
+    monkeypatch.setattr(StubAsyncResult, "jobs", {})
+    with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}):
+        task_views.cache.clear()
+        yield enqueued
+
+
+def test_repeated_heavy_export_reuses_job(export_jobs):
+    first = call_view(task_views.ExportResult, {FINAL_RESULT_PNG: "true"})
+    second = call_view(task_views.ExportResult, {FINAL_RESULT_PNG: "true"})
+
+    assert first.status_code == second.status_code == 202
+    assert first.data["detail"] == second.data["detail"]
+    assert len(export_jobs) == 1
+    assert export_jobs[0][1] == first.data["detail"]
+    job_path = task_views.cache.get(get_export_job_path_key(first.data["detail"]))
+    assert job_path == os.path.abspath(export_jobs[0][0][0])
+
+
+def test_failed_export_job_is_enqueued_again(export_jobs):
+    first = call_view(task_views.ExportResult, {FINAL_RESULT_PNG: "true"})
+    StubAsyncResult.jobs[first.data["detail"]] = ("FAILURE", RuntimeError("export failed"))
+
+    second = call_view(task_views.ExportResult, {FINAL_RESULT_PNG: "true"})
+    assert second.status_code == 202
+    assert second.data["detail"] != first.data["detail"]
+    assert len(export_jobs) == 2
+
+
+def test_export_job_status(export_jobs, results_folder, tmp_path):
+    artifact_path, not_valid = build_export_artifact(results_folder, FINAL_RESULT_PNG, "fingerprint")
+    assert not not_valid
+    StubAsyncResult.jobs.update({
+        "progress": ("PROGRESS", {"stage": "plotting", "progress": 0.3}),
+        "failure": ("FAILURE", RuntimeError("export failed")),
+        "outside": ("SUCCESS", (str(tmp_path / EXPORT_FILE_NAMES[FINAL_RESULT_PNG]), FINAL_RESULT_PNG)),
+        "ga_run": ("SUCCESS", None),
+        "success": ("SUCCESS", (artifact_path, FINAL_RESULT_PNG)),
+        "not_export": ("SUCCESS", (artifact_path, FINAL_RESULT_PNG)),
+    })
+    for job_id in ("progress", "pending", "failure", "outside", "ga_run", "success"):
+        task_views.cache.set(get_export_job_path_key(job_id), os.path.abspath(results_folder))
+
+    progress = call_view(task_views.ExportJobView, {}, job_id="progress")
+    assert progress.status_code == 200
+    assert progress.data["detail"] == {"status": "PROGRESS", "stage": "plotting", "progress": 0.3}
+    assert call_view(task_views.ExportJobView, {}, job_id="pending").data["detail"] == {"status": "PENDING"}
+    assert call_view(task_views.ExportJobView, {}, job_id="failure").status_code == 400
+    # Файл вне папки результатов задачи не отдается, даже если задание его вернуло
+    assert call_view(task_views.ExportJobView, {}, job_id="outside").status_code == 404
+    # Id, не поставленные как выгрузка этой задачи, и результаты не той формы не отдаются
+    assert call_view(task_views.ExportJobView, {}, job_id="not_export").status_code == 404
+    assert call_view(task_views.ExportJobView, {}, job_id="ga_run").status_code == 404
+    response = call_view(task_views.ExportJobView, {}, job_id="success")
+    close_file(response)
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "image/png"
@@ -0,0 +1,45 @@
+import numpy as np
+
+from core.models.evaluation.fitness_cache import ENTRY_OVERHEAD_BYTES, FitnessCache
+
+
+class CountingFitness:
+    """Фитнес — сумма генов; запоминает, какие хромосомы были переданы на оценку"""
+
+    def __init__(self):
+        self.evaluated = []
+
+    def __call__(self, population):
+        self.evaluated.extend(individual.tolist() for individual in population)
+        return population.sum(axis=1).astype(float)
+
+
+def test_fitness_cache_counts_hits_and_keeps_falsy_values():
+    cache = FitnessCache(1)
+    map_fitness = CountingFitness()
+    population = np.array([[0, 0], [1, 0], [0, 0]])
+
+    assert cache.evaluate(population, map_fitness).tolist() == [0.0, 1.0, 0.0]
+    # Повтор внутри поколения оценивается один раз
+    assert map_fitness.evaluated == [[0, 0], [1, 0]]
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    # Нулевой фитнес — тоже попадание в кэш, а не повод оценить заново
+    assert cache.evaluate(np.array([[0, 0]]), map_fitness).tolist() == [0.0]
+    assert map_fitness.evaluated == [[0, 0], [1, 0]]
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_fitness_cache_evicts_least_recently_used_within_budget():
+    entry_bytes = np.zeros(2, dtype=np.int64).nbytes + ENTRY_OVERHEAD_BYTES
+    cache = FitnessCache(2 * entry_bytes / (1024 * 1024))
+    map_fitness = CountingFitness()
+
+    cache.evaluate(np.array([[1, 0], [2, 0]]), map_fitness)
+    # Обращение к [1, 0] делает давно не использованной запись [2, 0]
+    cache.evaluate(np.array([[1, 0]]), map_fitness)
+    cache.evaluate(np.array([[3, 0]]), map_fitness)
+
+    assert len(cache.entries) == 2 and cache.used_bytes <= cache.max_bytes
+    cache.evaluate(np.array([[1, 0], [2, 0]]), map_fitness)
+    assert map_fitness.evaluated == [[1, 0], [2, 0], [3, 0], [2, 0]]
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from core.fitness.ackley_function import ackley_function
+from core.fitness.rastrigin_fitness import rastrigin_fitness
+from core.fitness.rosenbrock_function import rosenbrock_function
+from core.fitness.sphere_function import sphere_function
+from core.models.evaluation.batch_fitness import evaluate_population, is_vectorized
+
+FITNESS_FUNCTIONS = [ackley_function, rastrigin_fitness, rosenbrock_function, sphere_function]
+
+
+@pytest.fixture
+def population():
+    """Создает тестовую популяцию вещественных хромосом"""
+    rng = np.random.default_rng(0)
+    return rng.uniform(-5, 5, size=(50, 12))
+
+
+@pytest.mark.parametrize("fitness_function", FITNESS_FUNCTIONS)
+def test_batched_fitness_matches_per_row(fitness_function, population):
+    assert is_vectorized(fitness_function)
+
+    batched = evaluate_population(fitness_function, population)
+    per_row = np.array([fitness_function(individual) for individual in population])
+
+    assert batched.shape == (len(population),)
+    assert np.allclose(batched, per_row)
+
+
+def test_known_minimums():
+    zeros = np.zeros((3, 5))
+
+    assert np.allclose(rastrigin_fitness(zeros), 0)
+    assert np.allclose(sphere_function(zeros), 0)
+    assert np.allclose(ackley_function(zeros), 0)
+    assert np.allclose(rosenbrock_function(np.ones((3, 5))), 0)
+
+
+def test_per_row_fallback_for_user_function(population):
+    def user_fitness(individual):
+        return float(np.sum(np.abs(individual)))
+
+    assert not is_vectorized(user_fitness)
+    assert np.allclose(evaluate_population(user_fitness, population), np.abs(population).sum(axis=1))
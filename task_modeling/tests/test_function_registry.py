@@ -0,0 +1,66 @@
+import os
+
+from api.utils.load_custom_funcs import load_custom_functions
+from api.utils.load_custom_funcs.load_custom_functions import get_functions_index, refresh_functions_index, \
+    read_functions_index
+from core.models.evaluation import function_cache
+
+USER_FUNCTION_SOURCE = '''
+import os
+from math import sqrt
+
+
+def scaled_fitness(self, individual):
+    _ru_function_name = "Масштабированный фитнес"
+    _ru_scale = "Масштаб"
+    scale = self.fitness_kwargs.get("scale", 1)
+    return sqrt(sum(individual)) * scale
+
+
+def _helper():
+    pass
+'''
+
+
+def test_functions_index_parses_without_import(tmp_path, monkeypatch):
+    (tmp_path / "user_fitness.py").write_text(USER_FUNCTION_SOURCE, encoding="utf-8")
+    folder = str(tmp_path)
+
+    functions = get_functions_index(folder)
+    assert list(functions) == ["scaled_fitness"]
+    assert functions["scaled_fitness"]["path"].endswith("user_fitness.scaled_fitness")
+    assert functions["scaled_fitness"]["kwargs"] == ["scale"]
+    assert functions["scaled_fitness"]["translations"] == {"scale": "Масштаб",
+                                                           "scaled_fitness": "Масштабированный фитнес"}
+    assert read_functions_index(folder)["functions"] == functions
+
+    parsed_files = []
+    index_module_file = load_custom_functions.index_module_file
+    monkeypatch.setattr(load_custom_functions, "index_module_file",
+                        lambda file_path: parsed_files.append(file_path) or index_module_file(file_path))
+
+    get_functions_index(folder)
+    assert parsed_files == []
+
+    (tmp_path / "second.py").write_text("def second_function(self):\n    pass\n")
+    assert set(get_functions_index(folder)) == {"scaled_fitness", "second_function"}
+    assert len(parsed_files) == 2
+
+    (tmp_path / "second.py").unlink()
+    refresh_functions_index(folder)
+    assert list(get_functions_index(folder)) == ["scaled_fitness"]
+
+
+def test_worker_function_cache_reloads_changed_module(tmp_path, monkeypatch):
+    monkeypatch.setattr(function_cache, "BASE_DIR", str(tmp_path))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module_path = tmp_path / "cached_user_fitness.py"
+    module_path.write_text("def user_fitness(individual):\n    return 1\n")
+
+    user_fitness = function_cache.get_function("cached_user_fitness.user_fitness")
+    assert function_cache.get_function_route(user_fitness) == "cached_user_fitness.user_fitness"
+    assert function_cache.get_function("cached_user_fitness.user_fitness") is user_fitness
+
+    module_path.write_text("def user_fitness(individual):\n    return 2\n")
+    os.utime(module_path, ns=(0, 0))
+    assert function_cache.get_function("cached_user_fitness.user_fitness")(None) == 2
@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+
+from core.crossover.single_point_crossover import single_point_crossover
+from core.crossover.two_point_crossover import two_point_crossover
+from core.crossover.uniform_crossover import uniform_crossover
+from core.models.evaluation.batch_fitness import is_vectorized
+from core.models.evaluation import fitness_sharing
+from core.models.evaluation.fitness_sharing import compute_shared_fitness
+from core.models.master_worker_model import MAX_PARENT_REDRAWS, MasterWorkerGA
+from core.models.mixin_models.ga_mixin_models import SelectionCacheMixin
+from core.mutation.bitwise_mutation import bitwise_mutation
+from core.mutation.inversion_mutation import inversion_mutation
+from core.selection.rank_selection import rank_selection
+from core.selection.roulette_wheel_selection import roulette_wheel_selection
+from core.selection.tournament_selection import tournament_selection
+
+
+class FakeModel(SelectionCacheMixin):
+    """Минимальный набор атрибутов модели, который читают операторы"""
+
+    def __init__(self, population, fitness):
+        self.population = population
+        self.fitness = fitness
+        self.mutation_rate = 0.5
+        self.selection_kwargs = {"tournament_size": "3", "min_max_rule": "max"}
+        self.crossover_kwargs = {"prob": "0.5"}
+        self.mutation_kwargs = {}
+
+
+@pytest.fixture
+def model():
+    """Создает модель с популяцией, где фитнес равен номеру особи"""
+    population = np.arange(1, 201).reshape(20, 10)
+    fitness = np.arange(1, 21, dtype=float)
+    return FakeModel(population, fitness)
+
+
+@pytest.mark.parametrize("selection_function", [roulette_wheel_selection, rank_selection, tournament_selection])
+def test_batched_selection_returns_indices(selection_function, model):
+    assert is_vectorized(selection_function)
+
+    indices = selection_function(model, size=500)
+
+    assert indices.shape == (500,)
+    assert indices.min() >= 0 and indices.max() < len(model.population)
+    assert model.fitness[indices].mean() > model.fitness.mean()
+    assert selection_function(model).shape == (10,)
+
+
+def test_selection_state_is_rebuilt_for_new_fitness(model):
+    roulette_wheel_selection(model, size=10)
+    cached = model.selection_cache["roulette_wheel_selection"]
+    assert cached[-1] == model.fitness.sum()
+
+    model.fitness = model.fitness[::-1].copy()
+    assert model.selection_cache == {}
+
+    indices = roulette_wheel_selection(model, size=1000)
+    assert model.fitness[indices].mean() > model.fitness.mean()
+
+
+def test_roulette_rejects_negative_fitness(model):
+    model.fitness = model.fitness - model.fitness.mean()
+    with pytest.raises(ValueError):
+        roulette_wheel_selection(model, size=10)
+
+
+@pytest.mark.parametrize("crossover_function", [single_point_crossover, two_point_crossover, uniform_crossover])
+def test_batched_crossover_mixes_genes_by_position(crossover_function, model):
+    parents1 = model.population[:10]
+    parents2 = -model.population[10:]
+
+    children1, children2 = crossover_function(model, parents1, parents2)
+
+    assert children1.shape == parents1.shape
+    assert np.array_equal(np.abs(children1) + np.abs(children2), np.abs(parents1) + np.abs(parents2))
+    assert np.array_equal(np.where(children1 > 0, children1, children2), parents1)
+
+
+def test_batched_step_redraws_identical_parents(model):
+    model.population = np.array([[0, 0], [1, 0], [0, 1], [1, 1]])
+    model.selection_draws = 0
+
+    def select_last(self, size=None):
+        self.selection_draws += 1
+        return np.full(size, 3)
+
+    model.selection_function = select_last
+    parent_indices = np.array([0, 1, 0, 2])
+    MasterWorkerGA.redraw_identical_parents(model, parent_indices, 2)
+    # Пара (0, 0) получила другого второго родителя, пара (1, 2) не изменилась
+    assert parent_indices.tolist() == [0, 1, 3, 2]
+
+    # В сошедшейся популяции перевыбор ограничен, а не бесконечен
+    model.population = np.zeros((4, 2))
+    model.selection_draws = 0
+    MasterWorkerGA.redraw_identical_parents(model, np.array([0, 1, 2, 3]), 2)
+    assert model.selection_draws == MAX_PARENT_REDRAWS
+
+
+def test_batched_mutations(model):
+    binary = np.random.randint(2, size=(50, 16))
+    mutated = bitwise_mutation(model, binary)
+    assert mutated.shape == binary.shape
+    assert set(np.unique(mutated)) <= {0, 1}
+
+    inverted = inversion_mutation(model, model.population)
+    assert np.array_equal(np.sort(inverted, axis=1), model.population)
+
+
+def test_shared_fitness_matches_pairwise_definition():
+    rng = np.random.default_rng(0)
+    population = rng.random((60, 4))
+    population[:5] = population[0]
+    fitness = rng.random(60) + 1
+
+    distances = np.linalg.norm(population[:, None] - population[None, :], axis=-1)
+    sharing = np.where(distances < 0.5, 1 - (distances / 0.5) ** 2, 0)
+    expected = fitness / sharing.sum(axis=1)
+
+    # Маленький предел памяти заставляет считать расстояния несколькими блоками
+    shared_fitness = compute_shared_fitness(population, fitness, 0.5, 2, memory_limit=2048)
+
+    assert np.allclose(shared_fitness, expected)
+
+
+def test_shared_fitness_logs_missing_scipy_once(monkeypatch):
+    warnings = []
+    monkeypatch.setattr(fitness_sharing, "cKDTree", None)
+    monkeypatch.setattr(fitness_sharing, "KD_TREE_MIN_POPULATION", 10)
+    monkeypatch.setattr(fitness_sharing, "_kd_tree_fallback_logged", False)
+    monkeypatch.setattr(fitness_sharing.common_logger, "warning", warnings.append)
+
+    population = np.random.rand(20, 3)
+    for _ in range(2):
+        compute_shared_fitness(population, np.ones(20), 0.5, 2)
+
+    assert len(warnings) == 1
@@ -0,0 +1,257 @@
+import multiprocessing
+import pickle
+
+import numpy as np
+import pytest
+from django.test import override_settings
+
+from api.utils import custom_logger
+from api.utils.custom_logger import load_results
+from core.models import asynchronous_model, island_model, island_state as island_state_module
+from core.models.asynchronous_model import AsynchronousGA, run_async_island
+from core.models.island_model import IslandGA
+from core.models.island_state import IslandState, create_island_rng, run_island_generations, \
+    release_worker_islands
+from core.models.mailbox import MemoryMailbox, create_mailbox
+from core.models.migration import get_migration_sources, get_migration_targets, migrate_islands
+from task_modeling.tests.test_data.data_for_testing import TEST_FUNCTIONS_ROUTES, TEST_GA_PARAMS, \
+    get_additional_params, get_results_folder, run_ga_model
+
+ISLAND_GA_PARAMS = {
+    **TEST_GA_PARAMS, "num_islands": 2, "migration_interval": 5, "migration_rate": 0.1, "island_dispatch": "epoch",
+}
+
+# Барьер процессов пула: каждый шаг островов выполняется, только когда оба острова запущены одновременно
+_pool_barrier = None
+
+
+def set_pool_barrier(barrier):
+    global _pool_barrier
+    _pool_barrier = barrier
+
+
+def run_island_in_pool(*args):
+    _pool_barrier.wait(timeout=30)
+    return run_island_generations(*args)
+
+
+class PoolGroup:
+    """Группа задач островов, которую вместо брокера выполняет пул процессов, как воркеры Celery"""
+    pool = None
+
+    def __init__(self, signatures):
+        self.signatures = list(signatures)
+
+    def apply_async(self):
+        return self
+
+    def get(self, timeout, disable_sync_subtasks):
+        results = [self.pool.apply_async(run_island_in_pool, signature.args) for signature in self.signatures]
+        return [result.get(timeout) for result in results]
+
+def test_island_state_survives_worker_cache_miss(tmp_path, monkeypatch):
+    monkeypatch.setattr(custom_logger, "RESULT_ROOT", str(tmp_path))
+    additional_params = get_additional_params(11)
+    population = np.random.randint(2, size=(40, 16))
+    island_state = IslandState(1, population, create_island_rng())
+
+    for generation in range(1, 4):
+        island_state.generation = generation
+        island_state = pickle.loads(pickle.dumps(island_state))
+        island_state, _ = run_island_generations(island_state, generation, additional_params, TEST_GA_PARAMS,
+                                                 TEST_FUNCTIONS_ROUTES)
+        # Следующее поколение острова может достаться процессу, в кэше которого острова нет
+        release_worker_islands(11)
+
+    results_folder = get_results_folder(tmp_path, 11)
+    assert load_results(results_folder)["process_1"]["generation"].tolist() == [1, 2, 3]
+
+
+def test_island_state_payload_is_close_to_population_bytes(tmp_path, monkeypatch):
+    monkeypatch.setattr(custom_logger, "RESULT_ROOT", str(tmp_path))
+    population = np.random.randint(2, size=(200, 64))
+    island_state = IslandState(0, population, create_island_rng())
+    island_state.generation = 1
+    try:
+        island_state, _ = run_island_generations(island_state, 2, get_additional_params(17), TEST_GA_PARAMS,
+                                                 TEST_FUNCTIONS_ROUTES, evaluate_last=True)
+    finally:
+        release_worker_islands(17)
+
+    # Популяция, фитнес текущего и прошлого поколения, оценка для миграции и генератор острова
+    payload = len(pickle.dumps(island_state))
+    assert payload < population.nbytes + 3 * island_state.fitness.nbytes + 1024
+
+
+def test_island_rng_does_not_touch_process_rng(tmp_path, monkeypatch):
+    monkeypatch.setattr(custom_logger, "RESULT_ROOT", str(tmp_path))
+    population = np.random.randint(2, size=(40, 16))
+    populations = []
+    try:
+        for _ in range(2):
+            island_state = IslandState(0, population.copy(), np.random.default_rng(5))
+            island_state.generation = 1
+            process_state = np.random.get_state()
+            island_state, _ = run_island_generations(island_state, 3, get_additional_params(18), TEST_GA_PARAMS,
+                                                     TEST_FUNCTIONS_ROUTES)
+            assert np.array_equal(np.random.get_state()[1], process_state[1])
+            populations.append(island_state.population)
+            release_worker_islands(18)
+    finally:
+        release_worker_islands(18)
+
+    # Прогон острова определяется только его генератором
+    assert np.array_equal(populations[0], populations[1])
+
+
+def test_migration_topologies_and_in_place_policies():
+    assert get_migration_sources("ring", 4) == [[3], [0], [1], [2]]
+    assert get_migration_sources("bidirectional_ring", 2) == [[1], [0]]
+    assert get_migration_sources("torus", 6)[0] == [1, 2, 3]
+    assert get_migration_sources("fully_connected", 3) == [[1, 2], [0, 2], [0, 1]]
+    assert all(len(sources) == 2 for sources in get_migration_sources("random_k", 5, neighbours=2))
+
+    populations = [np.full((6, 4), island, dtype=float) for island in range(3)]
+    fitnesses = [np.arange(6, dtype=float) + 10 * island for island in range(3)]
+    buffers = [population.__array_interface__["data"][0] for population in populations]
+
+    migrate_islands(populations, fitnesses, 2, {"migrant_policy": "best", "replacement_policy": "worst"}, "max")
+
+    assert [population.__array_interface__["data"][0] for population in populations] == buffers
+    assert all(population.shape == (6, 4) for population in populations)
+    # Остров 1 получил две лучшие особи острова 0 на место двух своих худших
+    assert fitnesses[1].tolist() == [5, 4, 12, 13, 14, 15]
+    assert populations[1][:2].tolist() == [[0] * 4, [0] * 4]
+    assert fitnesses[0].tolist() == [25, 24, 2, 3, 4, 5]
+
+
+def test_async_island_does_not_wait_for_neighbours(tmp_path, monkeypatch):
+    monkeypatch.setattr(custom_logger, "RESULT_ROOT", str(tmp_path))
+    additional_params = get_additional_params(12)
+    ga_params = {**TEST_GA_PARAMS, "num_islands": 2, "migration_interval": 5, "migration_rate": 0.1}
+    assert get_migration_targets("ring", 3) == [[1], [2], [0]]
+
+    mailbox = MemoryMailbox(2)
+    islands = [IslandState(island, np.random.randint(2, size=(40, 16)), create_island_rng()) for island in range(2)]
+    try:
+        # Первый остров проходит все поколения, пока второй еще не запущен
+        first = run_async_island(islands[0], mailbox, 4, additional_params, ga_params, TEST_FUNCTIONS_ROUTES)
+        assert first.generation == 10 and first.terminate
+        assert mailbox.boxes[1].qsize() == 1
+
+        second = run_async_island(islands[1], mailbox, 4, additional_params, ga_params, TEST_FUNCTIONS_ROUTES)
+        assert second.generation == 10
+        assert mailbox.receive(1) == [] and len(mailbox.receive(0)) == 1
+    finally:
+        release_worker_islands(12)
+
+
+def test_islands_run_in_parallel_worker_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(custom_logger, "RESULT_ROOT", str(tmp_path))
+    monkeypatch.setattr(island_model, "group", PoolGroup)
+    context = multiprocessing.get_context("fork")
+    cache_settings = {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                                  "LOCATION": str(tmp_path / "cache")}}
+    with override_settings(CACHES=cache_settings), \
+            context.Pool(2, initializer=set_pool_barrier, initargs=(context.Barrier(2),)) as pool:
+        PoolGroup.pool = pool
+        ga = run_ga_model(IslandGA, ISLAND_GA_PARAMS, 19)
+        assert island_state_module.cache.get(island_state_module.get_finished_run_key(ga.run_id))
+
+    results = load_results(get_results_folder(tmp_path, 19))
+    assert results["process_0"]["generation"].tolist() == list(range(1, 11))
+    assert results["process_1"]["generation"].tolist() == list(range(1, 11))
+
+
+def test_worker_releases_islands_of_finished_runs(tmp_path, monkeypatch):
+    monkeypatch.setattr(custom_logger, "RESULT_ROOT", str(tmp_path))
+    additional_params = get_additional_params(20)
+    with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}):
+        try:
+            first_run = IslandState(0, np.random.randint(2, size=(40, 16)), create_island_rng(), "first")
+            first_island = island_state_module.get_worker_island(first_run, additional_params, TEST_GA_PARAMS,
+                                                                 TEST_FUNCTIONS_ROUTES)
+            # Координатор отмечает запуск завершенным из другого процесса
+            island_state_module.cache.set(island_state_module.get_finished_run_key("first"), True)
+
+            second_run = IslandState(0, np.random.randint(2, size=(40, 16)), create_island_rng(), "second")
+            second_island = island_state_module.get_worker_island(second_run, additional_params, TEST_GA_PARAMS,
+                                                                  TEST_FUNCTIONS_ROUTES)
+            assert second_island is not first_island
+            assert [key[1] for key in island_state_module._worker_islands] == ["second"]
+        finally:
+            release_worker_islands(20)
+
+
+def test_async_run_clears_mailbox_of_crashed_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(custom_logger, "RESULT_ROOT", str(tmp_path))
+    stale_mailbox = MemoryMailbox(2)
+    stale_mailbox.stop()
+    stale_mailbox.send(0, np.zeros((4, 16)), np.zeros(4))
+    monkeypatch.setattr(asynchronous_model, "create_mailbox", lambda *args: stale_mailbox)
+
+    ga_params = {**ISLAND_GA_PARAMS, "mailbox": "memory"}
+    with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}):
+        ga = run_ga_model(AsynchronousGA, ga_params, 21)
+
+    # Флаг остановки прошлого запуска остановил бы острова на первой миграции
+    assert [island.generation for island in ga.islands] == [10, 10]
+
+
+class RecordingGroup:
+    calls = []
+
+    def __init__(self, signatures):
+        self.signatures = list(signatures)
+
+    def apply_async(self):
+        return self
+
+    def get(self, **kwargs):
+        self.calls.append(kwargs)
+        return [signature.args[0] for signature in self.signatures]
+
+
+def stub_worker_slots(monkeypatch, worker_slots):
+    inspector = type("Inspector", (), {"stats": lambda self: {"worker": {"pool": {"max-concurrency": worker_slots}}}})()
+    monkeypatch.setattr(asynchronous_model.app.control, "inspect", lambda timeout: inspector)
+
+
+def test_async_redis_dispatch_waits_with_timeout_and_checks_worker_slots(tmp_path, monkeypatch):
+    monkeypatch.setattr(custom_logger, "RESULT_ROOT", str(tmp_path))
+    monkeypatch.setattr(asynchronous_model, "group", RecordingGroup)
+    monkeypatch.setattr(RecordingGroup, "calls", [])
+    stub_worker_slots(monkeypatch, 2)
+
+    ga_params = {**ISLAND_GA_PARAMS, "island_timeout": 30}
+    ga = AsynchronousGA(get_additional_params(22), ga_params, TEST_FUNCTIONS_ROUTES)
+    try:
+        ga.init_islands()
+        warnings = []
+        monkeypatch.setattr(ga.logger.logger_log, "warning", warnings.append)
+        ga.run_islands(create_mailbox("memory", 22, 2))
+    finally:
+        ga.close_executor()
+        ga.logger.close()
+
+    assert RecordingGroup.calls == [{"timeout": 30.0, "disable_sync_subtasks": False}]
+    # Два процесса на два острова и координатора: острова не смогут работать одновременно
+    assert len(warnings) == 1 and "2 worker slots" in warnings[0]
+
+
+def test_async_redis_dispatch_refuses_single_worker_slot(tmp_path, monkeypatch):
+    monkeypatch.setattr(custom_logger, "RESULT_ROOT", str(tmp_path))
+    monkeypatch.setattr(asynchronous_model, "group", RecordingGroup)
+    monkeypatch.setattr(RecordingGroup, "calls", [])
+    stub_worker_slots(monkeypatch, 1)
+
+    ga = AsynchronousGA(get_additional_params(23), ISLAND_GA_PARAMS, TEST_FUNCTIONS_ROUTES)
+    try:
+        ga.init_islands()
+        # Единственный процесс занят координатором: ждать island_timeout бессмысленно
+        with pytest.raises(RuntimeError):
+            ga.run_islands(create_mailbox("memory", 23, 2))
+    finally:
+        ga.close_executor()
+        ga.logger.close()
+    assert RecordingGroup.calls == []
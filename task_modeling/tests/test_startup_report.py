@@ -0,0 +1,23 @@
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+
+from task_modeling.management.commands.startup_report import Command
+
+
+def test_startup_report_prints_timings():
+    stdout = StringIO()
+    call_command("startup_report", "--repeat", "1", stdout=stdout)
+
+    report = stdout.getvalue()
+    assert "django.setup" in report and "total" in report
+    assert "modeling_system_backend.celery" in report
+
+
+def test_startup_does_not_load_export_libraries():
+    probe = Command.run_probe([settings.ROOT_URLCONF, "modeling_system_backend.celery"])
+
+    # Графики и PDF нужны только выгрузкам и импортируются при первом обращении к ним
+    assert "matplotlib" not in probe["loaded"]
+    assert "xhtml2pdf" not in probe["loaded"]
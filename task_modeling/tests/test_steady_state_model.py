@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from api.utils import custom_logger
+from api.utils.custom_logger import load_results
+from core.models.steady_state_model import SteadyStateGA
+from task_modeling.tests.test_data.data_for_testing import TEST_FUNCTIONS_ROUTES, TEST_GA_PARAMS, \
+    get_additional_params, get_results_folder, run_ga_model
+
+STEADY_STATE_GA_PARAMS = {
+    **TEST_GA_PARAMS, "population_size": 20, "max_generations": 4, "num_workers": 3, "executor": "threads",
+    "steady_state_kwargs": {"log_interval": 10},
+}
+
+
+def test_steady_state_logs_pseudo_generations(tmp_path, monkeypatch):
+    monkeypatch.setattr(custom_logger, "RESULT_ROOT", str(tmp_path))
+    ga = run_ga_model(SteadyStateGA, STEADY_STATE_GA_PARAMS, 13)
+
+    assert ga.evaluations == 40 and ga.generation == 4 and ga.terminate
+    # Худшая замена отклоняет потомков хуже замещаемой особи, поэтому вставок не больше оценок
+    assert 0 < ga.insertions <= ga.evaluations
+    assert ga.population.shape == (20, 16)
+    # Худшая особь замещается только не худшим потомком, поэтому лучший фитнес не ухудшается
+    generations = load_results(get_results_folder(tmp_path, 13))["process_0"]
+    assert generations["generation"].tolist() == [1, 2, 3, 4]
+    assert np.all(np.diff(generations["min_fitness"]) <= 0)
+
+
+def test_steady_state_rejects_unknown_replacement(tmp_path, monkeypatch):
+    monkeypatch.setattr(custom_logger, "RESULT_ROOT", str(tmp_path))
+    ga_params = {**STEADY_STATE_GA_PARAMS, "steady_state_kwargs": {"replacement": "oldest"}}
+    with pytest.raises(ValueError):
+        SteadyStateGA(get_additional_params(14), ga_params, TEST_FUNCTIONS_ROUTES)
+
+
+class CountingSteadyStateGA(SteadyStateGA):
+    def get_selection_state(self, key, build):
+        def counted_build(fitness):
+            self.selection_builds += 1
+            return build(fitness)
+        self.__dict__.setdefault("selection_builds", 0)
+        return super().get_selection_state(key, counted_build)
+
+
+def test_steady_state_rebuilds_selection_cache_once_per_pseudo_generation(tmp_path, monkeypatch):
+    monkeypatch.setattr(custom_logger, "RESULT_ROOT", str(tmp_path))
+    ga_params = {**STEADY_STATE_GA_PARAMS, "executor": "serial", "num_workers": 1}
+    routes = {**TEST_FUNCTIONS_ROUTES,
+              "selection_function": "core.selection.roulette_wheel_selection.roulette_wheel_selection"}
+    ga = CountingSteadyStateGA(get_additional_params(16), ga_params, routes)
+    try:
+        ga.start_calc()
+    finally:
+        ga.close_executor()
+        ga.logger.close()
+
+    # Начальная популяция и три псевдопоколения после нее, а не 40 перестроений по числу потомков
+    assert ga.evaluations == 40
+    assert ga.selection_builds == 4
@@ -4,7 +4,8 @@ from task_modeling.views.experiment_views.experiment_views import ExperimentView
     MultipleLaunchView
 from task_modeling.views.task_config_views.task_config_views import TaskConfigView, TaskConfigManagementView
 from task_modeling.views.math_functions.math_functions_view import MathFunctionsView, GetSupportedAlgorithmView
-from task_modeling.views.task_views.task_views import TaskView, TaskManagementView, ExportResult, StartedTaskView
+from task_modeling.views.task_views.task_views import TaskView, TaskManagementView, ExportResult, ExportJobView, \
+    StartedTaskView
 from task_modeling.views.translation_view import TranslationView
 
 urlpatterns = [
@@ -13,6 +14,8 @@ urlpatterns = [
     path("experiment/<str:experiment_id>/task", TaskView.as_view(), name="list_tasks_create_task"),
     path("experiment/<str:experiment_id>/task/<str:task_id>", TaskManagementView.as_view(), name="task_management"),
     path("experiment/<str:experiment_id>/task/<str:task_id>/export_result", ExportResult.as_view(), name="task_management"),
+    path("experiment/<str:experiment_id>/task/<str:task_id>/export_result/<str:job_id>", ExportJobView.as_view(),
+         name="export_job_status"),
 
     path("started_task", StartedTaskView.as_view(), name="started_task"),
 
@@ -0,0 +1,37 @@
+import hashlib
+
+from celery import shared_task
+
+from api.utils.export_results import build_export_artifact
+
+# Задачи с большим числом записей статистики выгружаются в фоне, маленькие — прямо в запросе
+SYNC_EXPORT_MAX_RECORDS = 20000
+
+EXPORT_PROGRESS_STATE = "PROGRESS"
+
+# Сколько секунд помнить id фонового задания, чтобы повторные запросы той же выгрузки не ставили новое
+EXPORT_JOB_TTL = 60 * 60
+
+
+def get_export_job_key(result_path, export_type, fingerprint):
+    """Ключ кэша задания выгрузки: одни и те же результаты, тип выгрузки и отпечаток источников."""
+    path_hash = hashlib.sha1(result_path.encode()).hexdigest()
+    return f"export_job:{path_hash}:{export_type}:{fingerprint}"
+
+
+def get_export_job_path_key(job_id):
+    """Ключ кэша с папкой результатов поставленного задания: по нему отличаются id заданий выгрузки."""
+    return f"export_job_path:{job_id}"
+
+
+@shared_task(bind=True)
+def wrapper_export_result(self, result_path, export_type, fingerprint):
+    """Построение тяжелой выгрузки (график, PDF) на воркере Celery с сообщением о ходе работы."""
+
+    def set_progress(stage, progress):
+        self.update_state(state=EXPORT_PROGRESS_STATE, meta={"stage": stage, "progress": progress})
+
+    artifact_path, not_valid = build_export_artifact(result_path, export_type, fingerprint, set_progress)
+    if not_valid:
+        raise ValueError(not_valid)
+    return artifact_path, export_type
@@ -17,6 +17,11 @@ class PrepareTaskConfigMixin:
         "crossover_rate",
 
         "num_workers",
+        "executor",
+        "fitness_chunks",
+        "fitness_cache_size",
+        "log_writer",
+        "log_backpressure",
 
         "adaptation_function",
         "adaptation_kwargs",
@@ -42,6 +47,11 @@ class PrepareTaskConfigMixin:
         "num_islands",
         "migration_interval",
         "migration_rate",
+        "migration_kwargs",
+        "island_dispatch",
+        "mailbox",
+        "steady_state_kwargs",
+        "cellular_kwargs",
     ]
 
     @classmethod
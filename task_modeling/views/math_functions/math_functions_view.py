@@ -9,7 +9,7 @@ from api.statuses import SCHEMA_GET_POST_STATUSES, SCHEMA_PERMISSION_DENIED, STA
     SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES
 from api.utils.load_custom_funcs.UserFunctionMixin import UserFunctionMixin
 from api.utils.load_custom_funcs.core_function_utils import SUPPORTED_MODELS_GA
-from api.utils.load_custom_funcs.load_custom_functions import extract_kwargs_params_from_module_path
+from api.utils.load_custom_funcs.load_custom_functions import refresh_functions_index
 from task_modeling.serializers import MathFunctionsSerializer
 
 
@@ -29,9 +29,9 @@ class MathFunctionsView(generics.GenericAPIView, UserFunctionMixin):
     def get(self, request, *args, **kwargs):
         user = self.request.user
         user_id = user.id
-        functions_mapping = self.get_functions_mapping(user_id)
-        if isinstance(functions_mapping, Response):
-            return functions_mapping
+        functions_index = self.get_functions_index(user_id)
+        if isinstance(functions_index, Response):
+            return functions_index
 
         keys = [
             "adaptation_functions",
@@ -47,12 +47,8 @@ class MathFunctionsView(generics.GenericAPIView, UserFunctionMixin):
             "supported_models": SUPPORTED_MODELS_GA.keys(),
         }
 
-        for key, function_mapping in zip(keys, functions_mapping):
-            function_response = {}
-            for function_name, function_path in function_mapping.items():
-                function_kwargs = extract_kwargs_params_from_module_path(function_path)
-                function_response[function_name] = function_kwargs
-            response[key] = function_response
+        for key, function_index in zip(keys, functions_index):
+            response[key] = {function_name: function["kwargs"] for function_name, function in function_index.items()}
 
         return Response(response, status=status.HTTP_200_OK)
 
@@ -110,6 +106,7 @@ class MathFunctionsView(generics.GenericAPIView, UserFunctionMixin):
         with open(file_path, 'wb') as f:
             for chunk in uploaded_file.chunks():
                 f.write(chunk)
+        refresh_functions_index(user_function_folder)
 
         return success_response("The file was uploaded successfully")
 
@@ -146,6 +143,7 @@ class MathFunctionsView(generics.GenericAPIView, UserFunctionMixin):
         file_path = os.path.join(user_function_folder, function_name)
         if os.path.exists(file_path):
             os.remove(file_path)
+            refresh_functions_index(user_function_folder)
             return no_content_response(function_name)
         else:
             return not_found_response(f"function with {function_name = }")
@@ -1,26 +1,33 @@
-import json
 import os
 import shutil
+import uuid
 
-from django.http import FileResponse
+from celery.result import AsyncResult
+from django.core.cache import cache
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter
 from rest_framework import generics, status
 from rest_framework.response import Response
 
 from api.responses import not_found_response, permission_denied_response, bad_request_response, no_content_response, \
-    success_response
+    success_response, accepted_response
 from api.statuses import SCHEMA_GET_POST_STATUSES, SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES, \
     SCHEMA_PERMISSION_DENIED, STATUS_204
-from api.utils.custom_logger import get_user_folder_name, get_task_folder_name, ALL_JSON_RESULTS_FILE_NAME, \
-    BEST_PLOT_FILE_NAME, ALL_RESULTS_PLOT_FILE_NAME, ALL_CSV_RESULTS_FILE_NAME, CSV_RESULT_FILE_NAME, \
-    JSON_RESULT_FILE_NAME, PDF_RESULTS_FILE_NAME
-from api.utils.export_results import plot_results, save_results_to_csv, best_result_json, save_results_to_pdf
+from api.utils.custom_logger import get_user_folder_name, get_task_folder_name, load_results, RESULT_KEY
+from api.utils.export_results import EXPORT_TYPES, EXPORT_FILE_NAMES, HEAVY_EXPORTS, STREAMING_EXPORTS, \
+    BEST_RESULT_EXPORTS, FINAL_RESULT_PNG, ALL_WORKERS_PNG, CSV_BEST_RESULTS, CSV_ALL_RESULTS, build_export_artifact, \
+    get_results_fingerprint, is_artifact_fresh, stream_results_csv, stream_results_json
+from api.utils.result_store import count_records
 from modeling_system_backend.celery import app
 from modeling_system_backend.settings import RESULT_ROOT
 
 from task_modeling.models import Task
 from task_modeling.serializers import TaskSerializer
 from task_modeling.utils.prepare_task_config import PrepareTaskConfigMixin
+from task_modeling.utils.export_task import wrapper_export_result, get_export_job_key, get_export_job_path_key, \
+    SYNC_EXPORT_MAX_RECORDS, EXPORT_JOB_TTL
 from task_modeling.utils.start_task import run_task
 
 
@@ -179,6 +186,7 @@ class TaskManagementView(TaskMixin,
         if not celery_task_id:
             return bad_request_response("exist celery task id")
 
+        # Сегменты разделяемой памяти в /dev/shm воркера освобождает обработчик task_revoked на самом воркере
         app.control.revoke(celery_task_id, terminate=True)
 
         task.status = Task.Action.STOPPED
@@ -255,6 +263,19 @@ class ExportResult(TaskMixin, generics.GenericAPIView):
                 name="pdf_results", description='The parameter for getting all results in pdf',
                 type=bool, enum=[True, False], required=False
             ),
+            OpenApiParameter(
+                name="process", description='Comma-separated process keys for csv/json export (e.g. process_0,process_2)',
+                type=str, required=False
+            ),
+            OpenApiParameter(
+                name="start_generation", description='First generation for csv/json export', type=int, required=False
+            ),
+            OpenApiParameter(
+                name="stop_generation", description='Last generation for csv/json export', type=int, required=False
+            ),
+            OpenApiParameter(
+                name="stride", description='Export every n-th generation in csv/json export', type=int, required=False
+            ),
         ],
         responses={
             status.HTTP_200_OK: TaskSerializer,
@@ -268,100 +289,113 @@ class ExportResult(TaskMixin, generics.GenericAPIView):
         if isinstance(task, Response):
             return task
 
+        result_path = self.get_result_path(task)
+
+        # Отпечаток источников результатов: по нему проверяется актуальность выгрузок и кэша клиента
+        self.fingerprint, self.last_modified = get_results_fingerprint(result_path)
+        etag = quote_etag(self.fingerprint) if self.fingerprint else None
+        if etag:
+            not_modified = get_conditional_response(request, etag=etag, last_modified=self.last_modified)
+            if not_modified is not None:
+                return not_modified
+
+        response = self.get_export_response(request, result_path)
+        if etag and response is not None and response.status_code == status.HTTP_200_OK:
+            response.headers["ETag"] = etag
+            response.headers["Last-Modified"] = http_date(self.last_modified)
+        return response
+
+    def get_result_path(self, task):
         user = self.request.user
         user_id = user.id
         user_folder_name = get_user_folder_name(user_id)
         experiment_name = task.experiment.name
         task_id = task.id
         task_folder_name = get_task_folder_name(task_id)
-        result_path = os.path.join(RESULT_ROOT, user_folder_name, experiment_name, task_folder_name)
-
-        final_result_png = request.query_params.get("final_result_png", "false")
-        if final_result_png.lower() == "true":
-            return self.get_final_result_png(result_path, only_best_result=True)
-        all_workers = request.query_params.get("all_workers_png", "false")
-        if all_workers.lower() == "true":
-            return self.get_final_result_png(result_path, only_best_result=False)
-
-        csv_best_results = request.query_params.get("csv_best_results", "false")
-        if csv_best_results.lower() == "true":
-            return self.get_final_result_csv(result_path, only_best_result=True)
-        csv_all_results = request.query_params.get("csv_all_results", "false")
-        if csv_all_results.lower() == "true":
-            return self.get_final_result_csv(result_path, only_best_result=False)
-
-        json_best_results = request.query_params.get("json_best_results", "false")
-        if json_best_results.lower() == "true":
-            return self.get_final_result_json(result_path, only_best_result=True)
-        json_all_results = request.query_params.get("json_all_results", "false")
-        if json_all_results.lower() == "true":
-            return self.get_final_result_json(result_path, only_best_result=False)
-
-        pdf_results = request.query_params.get("pdf_results", "false")
-        if pdf_results.lower() == "true":
-            return self.get_final_result_pdf(result_path)
-
-    def get_final_result_png(self, result_path, only_best_result=False):
-        file_name = ALL_RESULTS_PLOT_FILE_NAME
-        if only_best_result:
-            file_name = BEST_PLOT_FILE_NAME
-        json_path = os.path.join(result_path, ALL_JSON_RESULTS_FILE_NAME)
-        with open(json_path, "r") as json_file:
-            result_dict = json.load(json_file)
-        plot_path = os.path.join(result_path, file_name)
-        not_valid = plot_results(result_dict, plot_path, only_best_result=only_best_result)
+        return os.path.join(RESULT_ROOT, user_folder_name, experiment_name, task_folder_name)
+
+    def get_export_response(self, request, result_path):
+        for export_type in EXPORT_TYPES:
+            if request.query_params.get(export_type, "false").lower() == "true":
+                if export_type in STREAMING_EXPORTS:
+                    return self.get_streaming_response(request, result_path, export_type)
+                return self.export_result(result_path, export_type)
+
+    def export_result(self, result_path, export_type):
+        """Тяжелые выгрузки больших задач строятся фоновой задачей, клиенту возвращается id задания."""
+        artifact_path = os.path.join(result_path, EXPORT_FILE_NAMES[export_type])
+        if export_type in HEAVY_EXPORTS and not is_artifact_fresh(artifact_path, self.fingerprint):
+            records_count = count_records(result_path)
+            if records_count is not None and records_count > SYNC_EXPORT_MAX_RECORDS:
+                return accepted_response(self.get_export_job_id(result_path, export_type))
+
+        artifact_path, not_valid = build_export_artifact(result_path, export_type, self.fingerprint)
         if not_valid:
             return bad_request_response(not_valid)
-        return self.get_picture_response(plot_path)
-
-    def get_final_result_csv(self, result_path, only_best_result=False):
-        file_name = ALL_CSV_RESULTS_FILE_NAME
-        if only_best_result:
-            file_name = CSV_RESULT_FILE_NAME
-
-        json_path = os.path.join(result_path, ALL_JSON_RESULTS_FILE_NAME)
-        with open(json_path, "r") as json_file:
-            result_dict = json.load(json_file)
-        csv_path = os.path.join(result_path, file_name)
-
-        not_valid = save_results_to_csv(result_dict, csv_path, only_best_result=only_best_result)
-        if not_valid:
-            return bad_request_response(not_valid)
-        return self.get_csv_response(csv_path)
-
-    def get_final_result_json(self, result_path, only_best_result=False):
-        json_path = os.path.join(result_path, ALL_JSON_RESULTS_FILE_NAME)
-
-        if only_best_result:
-            file_name = JSON_RESULT_FILE_NAME
-            with open(json_path, "r") as json_file:
-                result_dict = json.load(json_file)
-            json_best_path = os.path.join(result_path, file_name)
-
-            not_valid = best_result_json(result_dict, json_best_path)
-            if not_valid:
-                return bad_request_response(not_valid)
-            return self.get_json_response(json_best_path)
-        return self.get_json_response(json_path)
-
-    def get_final_result_pdf(self, result_path):
-        json_path = os.path.join(result_path, ALL_JSON_RESULTS_FILE_NAME)
-        with open(json_path, "r") as json_file:
-            result_dict = json.load(json_file)
-        plot_path = os.path.join(result_path, ALL_RESULTS_PLOT_FILE_NAME)
-        not_valid = plot_results(result_dict, plot_path, only_best_result=False)
+        return self.get_artifact_response(export_type, artifact_path)
+
+    def get_export_job_id(self, result_path, export_type):
+        """Ставит фоновое задание выгрузки, если такое же еще не поставлено.
+
+        Повторные запросы клиента до завершения задания получают id уже поставленного;
+        упавшее задание ставится заново.
+        """
+        job_key = get_export_job_key(result_path, export_type, self.fingerprint)
+        job_id = cache.get(job_key)
+        if job_id is not None and AsyncResult(job_id, app=app).state == "FAILURE":
+            cache.delete(job_key)
+            job_id = None
+
+        if job_id is None:
+            new_job_id = str(uuid.uuid4())
+            # Из двух одновременных запросов задание ставит только тот, кто первым записал ключ
+            if cache.add(job_key, new_job_id, EXPORT_JOB_TTL):
+                cache.set(get_export_job_path_key(new_job_id), os.path.abspath(result_path), EXPORT_JOB_TTL)
+                wrapper_export_result.apply_async((result_path, export_type, self.fingerprint), task_id=new_job_id)
+                return new_job_id
+            job_id = cache.get(job_key)
+        return job_id
+
+    def get_streaming_response(self, request, result_path, export_type):
+        """CSV и JSON формируются по мере отправки блоками строк из хранилища статистики."""
+        results_filters, not_valid = self.get_results_filters(request)
         if not_valid:
             return bad_request_response(not_valid)
+        if export_type in BEST_RESULT_EXPORTS:
+            results_filters["process_keys"] = [RESULT_KEY]
 
-        file_name = PDF_RESULTS_FILE_NAME
-        with open(json_path, "r") as json_file:
-            result_dict = json.load(json_file)
-        pdf_path = os.path.join(result_path, file_name)
+        results = load_results(result_path, **results_filters)
+        if not results:
+            return bad_request_response("Невозможно выгрузить данные")
 
-        not_valid = save_results_to_pdf(result_dict, plot_path, pdf_path)
-        if not_valid:
-            return bad_request_response(not_valid)
-        return self.get_pdf_response(pdf_path)
+        if export_type in (CSV_BEST_RESULTS, CSV_ALL_RESULTS):
+            response = StreamingHttpResponse(stream_results_csv(results), content_type="text/csv")
+            response['Content-Disposition'] = 'attachment; filename="csv_results.csv"'
+        else:
+            response = StreamingHttpResponse(stream_results_json(results), content_type="application/json")
+            response['Content-Disposition'] = 'attachment; filename="json_results.json"'
+        return response
+
+    @staticmethod
+    def get_results_filters(request):
+        """Фильтры потоковой выгрузки: процессы через запятую, диапазон поколений и шаг прореживания."""
+        process = request.query_params.get("process")
+        results_filters = {"process_keys": process.split(",") if process else None}
+
+        for param in ("start_generation", "stop_generation", "stride"):
+            value = request.query_params.get(param)
+            if value is None:
+                results_filters[param] = None
+                continue
+            if not value.isdigit() or (param == "stride" and int(value) < 1):
+                return None, f"Invalid {param}: {value}"
+            results_filters[param] = int(value)
+        return results_filters, None
+
+    def get_artifact_response(self, export_type, artifact_path):
+        if export_type in (FINAL_RESULT_PNG, ALL_WORKERS_PNG):
+            return self.get_picture_response(artifact_path)
+        return self.get_pdf_response(artifact_path)
 
     @staticmethod
     def get_picture_response(plot_path):
@@ -370,21 +404,6 @@ class ExportResult(TaskMixin, generics.GenericAPIView):
             response['Content-Disposition'] = 'attachment; filename="plot_results.png"'
         return response
 
-    @staticmethod
-    def get_csv_response(csv_path):
-        with open(csv_path, 'rb'):
-            response = FileResponse(open(csv_path, 'rb'), content_type="text/csv", filename="csv_results.csv")
-            response['Content-Disposition'] = 'attachment; filename="csv_results.csv"'
-        return response
-
-    @staticmethod
-    def get_json_response(json_path):
-        with open(json_path, 'rb'):
-            response = FileResponse(open(json_path, 'rb'), content_type="application/json",
-                                    filename="json_results.json")
-            response['Content-Disposition'] = 'attachment; filename="json_results.json"'
-        return response
-
     @staticmethod
     def get_pdf_response(pdf_path):
         with open(pdf_path, 'rb'):
@@ -393,6 +412,44 @@ class ExportResult(TaskMixin, generics.GenericAPIView):
         return response
 
 
+class ExportJobView(ExportResult):
+    @extend_schema(
+        tags=['Tasks'],
+        summary="Get export job status",
+        description="Returns the progress of a background export job, or the exported file once it is ready",
+        responses={
+            status.HTTP_200_OK: TaskSerializer,
+            **SCHEMA_RETRIEVE_UPDATE_DESTROY_STATUSES,
+            **SCHEMA_PERMISSION_DENIED
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        task = self.get_object()
+
+        if isinstance(task, Response):
+            return task
+
+        job_id = self.kwargs.get("job_id")
+        result_path = os.path.abspath(self.get_result_path(task))
+        # Отдаются только задания выгрузки этой задачи, а не любые id Celery
+        if cache.get(get_export_job_path_key(job_id)) != result_path:
+            return not_found_response(f"{job_id = }")
+        export_job = AsyncResult(job_id, app=app)
+
+        if export_job.state == "FAILURE":
+            return bad_request_response(str(export_job.result))
+        if export_job.state != "SUCCESS":
+            job_info = export_job.info if isinstance(export_job.info, dict) else {}
+            return success_response({"status": export_job.state, **job_info})
+
+        if not isinstance(export_job.result, (list, tuple)) or len(export_job.result) != 2:
+            return not_found_response(f"{job_id = }")
+        artifact_path, export_type = export_job.result
+        if os.path.dirname(os.path.abspath(artifact_path)) != result_path:
+            return not_found_response(f"{job_id = }")
+        return self.get_artifact_response(export_type, artifact_path)
+
+
 class StartedTaskView(generics.ListAPIView):
     serializer_class = TaskSerializer
 
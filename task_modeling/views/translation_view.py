@@ -4,7 +4,6 @@ from rest_framework.response import Response
 
 from api.statuses import SCHEMA_GET_POST_STATUSES, SCHEMA_PERMISSION_DENIED
 from api.utils.load_custom_funcs.UserFunctionMixin import UserFunctionMixin
-from api.utils.load_custom_funcs.load_custom_functions import get_translations_from_function
 
 
 class TranslationView(generics.GenericAPIView, UserFunctionMixin):
@@ -31,11 +30,18 @@ class TranslationView(generics.GenericAPIView, UserFunctionMixin):
             "master_worker": 'Модель мастер-воркер',
             "island_model": 'Островная модель',
             "asynchronous_model": 'Асинхронная модель',
+            "steady_state_model": 'Стационарная модель (замещение по одной особи)',
+            "cellular_model": 'Клеточная модель',
         }
         task_config = {
             "algorithm": 'Алгоритм',
             "num_islands": 'Количество островов',
             "num_workers": 'Количество рабочих процессов',
+            "executor": 'Исполнитель оценки фитнеса',
+            "fitness_chunks": 'Количество блоков популяции для оценки фитнеса',
+            "fitness_cache_size": 'Объем кэша фитнеса (МБ)',
+            "log_writer": 'Режим записи журнала',
+            "log_backpressure": 'Поведение при переполнении очереди журнала',
             "mutation_rate": 'Вероятность мутации',
             "crossover_rate": 'Вероятность кроссинговера',
             "fitness_kwargs": 'Аргументы функции приспособленности',
@@ -50,6 +56,20 @@ class TranslationView(generics.GenericAPIView, UserFunctionMixin):
             "mutation_function": 'Функция мутации',
             "crossover_function": 'Функция кроссинговера',
             "migration_interval": 'Интервал миграции',
+            "migration_kwargs": 'Параметры миграции',
+            "topology": 'Топология связей островов',
+            "neighbours": 'Количество соседей острова',
+            "migrant_policy": 'Выбор мигрантов',
+            "replacement_policy": 'Замещение особей мигрантами',
+            "island_dispatch": 'Запуск островов (по поколению или эпохами между миграциями)',
+            "mailbox": 'Почтовые ящики асинхронной миграции (redis или memory)',
+            "steady_state_kwargs": 'Параметры стационарной модели',
+            "replacement": 'Замещение особей потомками (worst или tournament)',
+            "log_interval": 'Количество вставок потомков в одном поколении журнала',
+            "cellular_kwargs": 'Параметры клеточной модели',
+            "rows": 'Количество строк сетки',
+            "neighbourhood": 'Окрестность клетки (von_neumann или moore)',
+            "mate_selection": 'Выбор партнера в окрестности (best или tournament)',
             "selection_function": 'Функция селекции',
             "termination_kwargs": 'Аргументы функции завершения',
             "termination_function": 'Функция завершения',
@@ -67,16 +87,12 @@ class TranslationView(generics.GenericAPIView, UserFunctionMixin):
         }
         user = self.request.user
         user_id = user.id
-        functions_mapping = self.get_functions_mapping(user_id)
-        if isinstance(functions_mapping, Response):
-            return functions_mapping
+        functions_index = self.get_functions_index(user_id)
+        if isinstance(functions_index, Response):
+            return functions_index
 
-        functions_translate = {}
-        for function_mapping in functions_mapping:
-            for _, function_path in function_mapping.items():
-                function_args_translate = get_translations_from_function(function_path)
-                functions_translate.update(function_args_translate)
-
-        translations.update(functions_translate)
+        for function_index in functions_index:
+            for function in function_index.values():
+                translations.update(function["translations"])
 
         return Response(translations, status=status.HTTP_200_OK)